@@ -6,6 +6,19 @@
 -- Database creation is handled by Docker POSTGRES_DB environment variable
 -- CREATE DATABASE asset_db;
 
+-- ---------------------------------------------------------
+-- 0. TENANTS (One row per company; every other table carries tenant_id)
+-- ---------------------------------------------------------
+-- All indexes lead with tenant_id, so each company's queries stay within its own index ranges.
+-- The API picks the tenant from the X-Tenant-ID header (default: tenant 1).
+
+CREATE TABLE tenants (
+    id SERIAL PRIMARY KEY,
+    code VARCHAR(50) NOT NULL UNIQUE, -- Short company code (e.g., ACME)
+    name VARCHAR(150) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- ---------------------------------------------------------
 -- 1. REFERENCE TABLES (Categories, Locations, Vendors, Departments)
 -- ---------------------------------------------------------
@@ -13,25 +26,33 @@
 -- 1.1 Departments (Mirrors HR Structure)
 CREATE TABLE departments (
     id SERIAL PRIMARY KEY,
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
     name VARCHAR(100) NOT NULL,
     cost_center_code VARCHAR(50), -- Useful for Finance/HR
     manager_employee_id INT, -- Soft link to employees.id
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP -- Set by the API on every change (integrity scans)
 );
+CREATE INDEX ix_departments_tenant_id ON departments (tenant_id, id);
+CREATE INDEX ix_departments_tenant_manager ON departments (tenant_id, manager_employee_id);
+CREATE INDEX ix_departments_tenant_updated ON departments (tenant_id, updated_at);
 
 -- 1.2 Locations (Physical places where assets live)
 CREATE TABLE locations (
     id SERIAL PRIMARY KEY,
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
     site_name VARCHAR(100) NOT NULL, -- e.g., "HQ - Building A", "Remote"
     address TEXT,
     city VARCHAR(50),
     country VARCHAR(50),
     is_active BOOLEAN DEFAULT TRUE
 );
+CREATE INDEX ix_locations_tenant_id ON locations (tenant_id, id);
 
 -- 1.3 Vendors (Procurement sources)
 CREATE TABLE vendors (
     id SERIAL PRIMARY KEY,
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
     vendor_name VARCHAR(150) NOT NULL,
     contact_person VARCHAR(100),
     contact_email VARCHAR(150),
@@ -39,14 +60,22 @@ CREATE TABLE vendors (
     website VARCHAR(200),
     contract_expiry_date DATE
 );
+CREATE INDEX ix_vendors_tenant_id ON vendors (tenant_id, id);
+CREATE INDEX ix_vendors_tenant_contract_expiry ON vendors (tenant_id, contract_expiry_date);
 
 -- 1.4 Asset Categories (Taxonomy)
 CREATE TABLE asset_categories (
     id SERIAL PRIMARY KEY,
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
     category_name VARCHAR(100) NOT NULL, -- e.g., "Laptop", "Furniture"
     parent_category_id INT, -- Soft link for hierarchy (e.g., Hardware -> Laptop)
-    depreciation_years INT DEFAULT 3 -- For Finance usage
+    depreciation_years INT DEFAULT 3, -- For Finance usage
+    maintenance_interval_days INT, -- Preventive maintenance cadence (NULL = none)
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP -- Set by the API on every change (integrity scans)
 );
+CREATE INDEX ix_asset_categories_tenant_id ON asset_categories (tenant_id, id);
+CREATE INDEX ix_asset_categories_tenant_parent ON asset_categories (tenant_id, parent_category_id);
+CREATE INDEX ix_asset_categories_tenant_updated ON asset_categories (tenant_id, updated_at);
 
 -- ---------------------------------------------------------
 -- 2. CORE ENTITIES (Employees, Assets)
@@ -55,31 +84,43 @@ CREATE TABLE asset_categories (
 -- 2.1 Employees (The "1000 Users")
 CREATE TABLE employees (
     id SERIAL PRIMARY KEY,
-    employee_code VARCHAR(50) NOT NULL UNIQUE, -- The HR ID (e.g., EMP-1092)
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
+    employee_code VARCHAR(50) NOT NULL, -- The HR ID (e.g., EMP-1092), unique per tenant
     first_name VARCHAR(100) NOT NULL,
     last_name VARCHAR(100) NOT NULL,
-    email VARCHAR(150) NOT NULL UNIQUE,
+    email VARCHAR(150) NOT NULL, -- Unique per tenant
     phone_number VARCHAR(50),
     job_title VARCHAR(100),
     department_id INT, -- Soft link to departments.id
     location_id INT, -- Soft link to locations.id (Home base)
     employment_status VARCHAR(50) DEFAULT 'Active', -- Active, Terminated, On Leave
     hire_date DATE,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP -- Set by the API on every change (integrity scans)
 );
+CREATE UNIQUE INDEX ux_employees_tenant_code ON employees (tenant_id, employee_code);
+CREATE UNIQUE INDEX ux_employees_tenant_email ON employees (tenant_id, email);
+CREATE INDEX ix_employees_tenant_id ON employees (tenant_id, id);
+CREATE INDEX ix_employees_tenant_department ON employees (tenant_id, department_id);
+CREATE INDEX ix_employees_tenant_location ON employees (tenant_id, location_id);
+CREATE INDEX ix_employees_tenant_updated ON employees (tenant_id, updated_at);
 
 -- 2.2 Assets ( The Main Inventory)
+-- Lifecycle states; allowed transitions are enforced by the API (app/lifecycle.py)
+CREATE TYPE asset_status AS ENUM ('In Stock', 'Assigned', 'In Repair', 'Retired', 'Lost');
+
 CREATE TABLE assets (
     id SERIAL PRIMARY KEY,
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
     -- Identification
-    asset_tag VARCHAR(50) NOT NULL UNIQUE, -- Internal Sticker ID
+    asset_tag VARCHAR(50) NOT NULL, -- Internal Sticker ID, unique per tenant
     serial_number VARCHAR(100), -- Manufacturer Serial
     asset_name VARCHAR(150) NOT NULL,
     model_number VARCHAR(100),
     
     -- Classification
     category_id INT, -- Soft link to asset_categories.id
-    status VARCHAR(50) DEFAULT 'In Stock', -- In Stock, Assigned, In Repair, Retired, Lost
+    status asset_status DEFAULT 'In Stock', -- 4-byte enum instead of free text
     condition_grade VARCHAR(20), -- New, Good, Fair, Poor
     
     -- Financials & Procurement
@@ -98,6 +139,18 @@ CREATE TABLE assets (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     last_updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+CREATE UNIQUE INDEX ux_assets_tenant_tag ON assets (tenant_id, asset_tag);
+CREATE INDEX ix_assets_tenant_id ON assets (tenant_id, id);
+CREATE INDEX ix_assets_tenant_status_category ON assets (tenant_id, status, category_id);
+CREATE INDEX ix_assets_tenant_category ON assets (tenant_id, category_id);
+CREATE INDEX ix_assets_tenant_vendor ON assets (tenant_id, vendor_id);
+CREATE INDEX ix_assets_tenant_purchase_date ON assets (tenant_id, purchase_date);
+CREATE INDEX ix_assets_tenant_purchase_cost ON assets (tenant_id, purchase_cost);
+CREATE INDEX ix_assets_tenant_warranty_expiry ON assets (tenant_id, warranty_expiry_date);
+CREATE INDEX ix_assets_tenant_employee ON assets (tenant_id, current_employee_id);
+CREATE INDEX ix_assets_tenant_location ON assets (tenant_id, current_location_id);
+CREATE INDEX ix_assets_tenant_condition ON assets (tenant_id, condition_grade);
+CREATE INDEX ix_assets_tenant_last_updated ON assets (tenant_id, last_updated_at);
 
 -- ---------------------------------------------------------
 -- 3. LOGGING & LIFECYCLE (History, Maintenance)
@@ -106,32 +159,170 @@ CREATE TABLE assets (
 -- 3.1 Asset Assignment History (The "Audit Trail")
 -- CRITICAL: This table answers "Who had this laptop 6 months ago?"
 CREATE TABLE asset_assignment_history (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
     asset_id INT NOT NULL, -- Soft link to assets.id
     employee_id INT, -- Soft link to employees.id
-    assigned_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    assigned_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, -- Partition key
     returned_date TIMESTAMP,
     assigned_by_admin_id INT, -- Who performed the action
-    notes TEXT -- e.g., "Given for temporary project"
-);
+    notes TEXT, -- e.g., "Given for temporary project"
+    PRIMARY KEY (id, assigned_date)
+) PARTITION BY RANGE (assigned_date);
+-- One partition per year; archive.ensure_partitions() adds upcoming years
+CREATE TABLE asset_assignment_history_2023 PARTITION OF asset_assignment_history FOR VALUES FROM ('2023-01-01') TO ('2024-01-01');
+CREATE TABLE asset_assignment_history_2024 PARTITION OF asset_assignment_history FOR VALUES FROM ('2024-01-01') TO ('2025-01-01');
+CREATE TABLE asset_assignment_history_2025 PARTITION OF asset_assignment_history FOR VALUES FROM ('2025-01-01') TO ('2026-01-01');
+CREATE TABLE asset_assignment_history_2026 PARTITION OF asset_assignment_history FOR VALUES FROM ('2026-01-01') TO ('2027-01-01');
+CREATE TABLE asset_assignment_history_2027 PARTITION OF asset_assignment_history FOR VALUES FROM ('2027-01-01') TO ('2028-01-01');
+CREATE TABLE asset_assignment_history_default PARTITION OF asset_assignment_history DEFAULT;
+CREATE INDEX ix_asset_assignment_history_tenant_id ON asset_assignment_history (tenant_id, id);
+CREATE INDEX ix_asset_assignment_history_tenant_asset_assigned ON asset_assignment_history (tenant_id, asset_id, assigned_date);
+CREATE INDEX ix_asset_assignment_history_tenant_employee ON asset_assignment_history (tenant_id, employee_id);
+CREATE INDEX ix_asset_assignment_history_tenant_returned ON asset_assignment_history (tenant_id, returned_date);
 
 -- 3.2 Maintenance Logs (Repairs & Upgrades)
 CREATE TABLE maintenance_logs (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
     asset_id INT NOT NULL, -- Soft link to assets.id
     maintenance_type VARCHAR(100), -- Repair, Upgrade, Cleaning
     description TEXT,
     cost DECIMAL(10, 2),
     vendor_id INT, -- Soft link to vendors.id (Who fixed it)
-    start_date DATE,
+    start_date DATE NOT NULL DEFAULT CURRENT_DATE, -- Partition key
     completion_date DATE,
-    status VARCHAR(50) -- Scheduled, In Progress, Completed
+    status VARCHAR(50), -- Scheduled, In Progress, Completed
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- Set by the API on every change (integrity scans)
+    PRIMARY KEY (id, start_date)
+) PARTITION BY RANGE (start_date);
+CREATE TABLE maintenance_logs_2023 PARTITION OF maintenance_logs FOR VALUES FROM ('2023-01-01') TO ('2024-01-01');
+CREATE TABLE maintenance_logs_2024 PARTITION OF maintenance_logs FOR VALUES FROM ('2024-01-01') TO ('2025-01-01');
+CREATE TABLE maintenance_logs_2025 PARTITION OF maintenance_logs FOR VALUES FROM ('2025-01-01') TO ('2026-01-01');
+CREATE TABLE maintenance_logs_2026 PARTITION OF maintenance_logs FOR VALUES FROM ('2026-01-01') TO ('2027-01-01');
+CREATE TABLE maintenance_logs_2027 PARTITION OF maintenance_logs FOR VALUES FROM ('2027-01-01') TO ('2028-01-01');
+CREATE TABLE maintenance_logs_default PARTITION OF maintenance_logs DEFAULT;
+CREATE INDEX ix_maintenance_logs_tenant_id ON maintenance_logs (tenant_id, id);
+CREATE INDEX ix_maintenance_logs_tenant_asset_start ON maintenance_logs (tenant_id, asset_id, start_date);
+CREATE INDEX ix_maintenance_logs_tenant_vendor ON maintenance_logs (tenant_id, vendor_id);
+CREATE INDEX ix_maintenance_logs_tenant_completion ON maintenance_logs (tenant_id, completion_date);
+CREATE INDEX ix_maintenance_logs_tenant_updated ON maintenance_logs (tenant_id, updated_at);
+
+-- ---------------------------------------------------------
+-- 3A. DERIVED DATA (Maintained by background jobs)
+-- ---------------------------------------------------------
+
+-- 3A.1 Expiry Due (Warranties & contracts expiring within the scheduler horizon)
+CREATE TABLE expiry_due (
+    id SERIAL PRIMARY KEY,
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
+    entity_type VARCHAR(20) NOT NULL, -- Asset, Vendor
+    entity_id INT NOT NULL, -- Soft link to assets.id / vendors.id
+    label VARCHAR(150),
+    expiry_date DATE NOT NULL,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX ix_expiry_due_tenant_expiry ON expiry_due (tenant_id, expiry_date);
+CREATE INDEX ix_expiry_due_tenant_entity ON expiry_due (tenant_id, entity_type, entity_id);
+
+-- 3A.2 Asset Holdings (Materialized count & value held per employee, department, location)
+CREATE TABLE asset_holdings (
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
+    scope VARCHAR(20) NOT NULL, -- employee, department, location
+    scope_id INT NOT NULL, -- Soft link to employees.id / departments.id / locations.id
+    asset_count INT NOT NULL DEFAULT 0,
+    total_cost DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (tenant_id, scope, scope_id)
+);
+
+-- 3A.3 Job Watermarks (Where each incremental job left off)
+CREATE TABLE job_watermarks (
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
+    name VARCHAR(100) NOT NULL,
+    last_run_at TIMESTAMP,
+    last_date DATE,
+    last_id INT,
+    PRIMARY KEY (tenant_id, name)
+);
+
+-- 3A.4 Idempotency Keys (Stored POST responses replayed to retrying clients)
+CREATE TABLE idempotency_keys (
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
+    key VARCHAR(255) NOT NULL,
+    request_hash VARCHAR(64) NOT NULL, -- SHA-256 of method, path, query string and body
+    status_code INT, -- NULL while the first request is still running
+    headers JSON, -- Response headers as [name, value] pairs
+    body BYTEA, -- zlib-compressed response body
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL, -- Hold of a running request, then replay TTL
+    PRIMARY KEY (tenant_id, key)
+);
+CREATE INDEX ix_idempotency_keys_expires_at ON idempotency_keys (expires_at);
+
+-- 3A.5 Jobs (Queue of long-running bulk operations run by `python -m app.worker`)
+CREATE TABLE jobs (
+    id SERIAL PRIMARY KEY,
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
+    job_type VARCHAR(50) NOT NULL, -- offboard, hr_sync, export_assets, rebuild_holdings, ...
+    status VARCHAR(20) NOT NULL DEFAULT 'Queued', -- Queued, Running, Succeeded, Failed
+    params JSON,
+    result JSON,
+    error TEXT,
+    progress_done INT DEFAULT 0,
+    progress_total INT, -- NULL when unknown in advance
+    attempts INT DEFAULT 0,
+    worker VARCHAR(100), -- host:pid of the worker running it
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    heartbeat_at TIMESTAMP, -- Refreshed while running; stale jobs are requeued
+    finished_at TIMESTAMP
+);
+CREATE INDEX ix_jobs_status_id ON jobs (status, id); -- Workers claim across tenants
+CREATE INDEX ix_jobs_tenant_id ON jobs (tenant_id, id);
+
+-- 3A.6 Integrity Orphans (Soft links pointing at missing rows, found by `python -m app.integrity`)
+CREATE TABLE integrity_orphans (
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
+    link VARCHAR(100) NOT NULL, -- Referencing column, e.g. 'assets.vendor_id'
+    row_id INT NOT NULL, -- id of the referencing row
+    missing_id INT NOT NULL, -- Value that points nowhere
+    detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (tenant_id, link, row_id)
+);
+
+-- 3A.7 Stock Snapshots (Append-only daily stock per location, category and status)
+CREATE TABLE stock_snapshots (
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
+    snapshot_date DATE NOT NULL,
+    location_id INT NOT NULL, -- Soft link to locations.id (0 = no location)
+    category_id INT NOT NULL, -- Soft link to asset_categories.id (0 = no category)
+    status VARCHAR(20) NOT NULL,
+    asset_count INT NOT NULL,
+    total_value DECIMAL(14, 2) NOT NULL, -- Sum of purchase_cost
+    PRIMARY KEY (tenant_id, snapshot_date, location_id, category_id, status)
+);
+
+-- 3A.8 Refresh Forecast (Assets reaching end of life per quarter, category and holder's department)
+CREATE TABLE refresh_forecast (
+    tenant_id INT NOT NULL DEFAULT 1, -- Soft link to tenants.id
+    eol_year INT NOT NULL, -- Year of purchase_date + asset_categories.depreciation_years
+    eol_quarter INT NOT NULL, -- 1-4
+    category_id INT NOT NULL, -- Soft link to asset_categories.id (0 = no category)
+    department_id INT NOT NULL, -- Soft link to departments.id of the holder (0 = not held / no department)
+    asset_count INT NOT NULL DEFAULT 0,
+    total_cost DECIMAL(14, 2) NOT NULL DEFAULT 0, -- Sum of purchase_cost
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (tenant_id, eol_year, eol_quarter, category_id, department_id)
 );
 
 -- ---------------------------------------------------------
 -- 4. DUMMY DATA INSERTION (For Testing)
 -- ---------------------------------------------------------
 
+-- 4.0 Setup the default tenant (rows below take tenant_id 1 by default)
+INSERT INTO tenants (code, name) VALUES ('default', 'Default company');
+
 -- 4.1 Setup Departments
 INSERT INTO departments (name, cost_center_code) VALUES 
 ('Executive Leadership', 'CC-001'),
@@ -0,0 +1,160 @@
+"""
+Admission control: per-client rate limiting and a cap on requests in flight.
+
+Each client address gets a token bucket of RATE_LIMIT_BURST requests refilled at
+RATE_LIMIT_PER_SECOND; an empty bucket answers 429. The address is the peer of
+the connection (behind a reverse proxy, run uvicorn with --proxy-headers and
+--forwarded-allow-ips so it is the forwarded client address); nothing the client
+sends in its own headers chooses its bucket. At most MAX_IN_FLIGHT_REQUESTS requests run at once; a request
+that cannot get a slot within ADMISSION_WAIT_SECONDS answers 503. Both carry
+`Retry-After`, so clients back off instead of queueing for a pooled database
+connection until they time out. Long-lived streams (the live asset feed) are
+rate-limited but hold no in-flight slot: they use no connection while idle.
+"""
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+
+from . import database, live
+
+# Sustained requests per second allowed per client (0 disables rate limiting)
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "20"))
+# Requests a client may burst above the sustained rate
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "40"))
+# Requests processed concurrently by this process (0 disables the cap); the default matches
+# SQLAlchemy's connection pool (5 connections + 10 overflow)
+MAX_IN_FLIGHT_REQUESTS = int(os.getenv("MAX_IN_FLIGHT_REQUESTS", "15"))
+# How long a request may wait for an in-flight slot before it is shed with 503
+ADMISSION_WAIT_SECONDS = float(os.getenv("ADMISSION_WAIT_SECONDS", "0.5"))
+# Client buckets kept in memory; beyond this the least recently seen client is forgotten
+MAX_TRACKED_CLIENTS = int(os.getenv("MAX_TRACKED_CLIENTS", "10000"))
+
+# Probes and monitoring stay reachable when the API is saturated
+EXEMPT_PATHS = ("/health", "/api/admin/metrics")
+# Streams stay open indefinitely, so they do not count against the in-flight cap
+STREAMING_PATHS = (live.STREAM_PATH,)
+
+# Counters since process start, served by GET /api/admin/metrics
+counters = {
+    "admitted": 0,
+    "rate_limited": 0,
+    "shed": 0,
+    "in_flight": 0,
+    "peak_in_flight": 0,
+}
+
+# Client address -> TokenBucket, least recently seen first
+_buckets = OrderedDict()
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `capacity`; each request takes one."""
+
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, capacity: int, now: float):
+        self.tokens = float(capacity)
+        self.updated_at = now
+
+    def take(self, rate: float, capacity: int, now: float) -> float:
+        """Take a token; returns 0 on success, otherwise the seconds until one is available."""
+        self.tokens = min(capacity, self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / rate
+
+
+def _client_key(scope) -> str:
+    return scope["client"][0] if scope.get("client") else "unknown"
+
+
+def metrics() -> dict:
+    """Admission counters plus the primary connection pool's state."""
+    pool = database.engine.pool if database.engine is not None else None
+    return {
+        **counters,
+        "tracked_clients": len(_buckets),
+        "max_in_flight": MAX_IN_FLIGHT_REQUESTS,
+        "rate_limit_per_second": RATE_LIMIT_PER_SECOND,
+        "rate_limit_burst": RATE_LIMIT_BURST,
+        "pool_checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+        "pool_size": pool.size() if hasattr(pool, "size") else None,
+        "live_subscribers": live.broker.subscriber_count,
+    }
+
+
+class AdmissionMiddleware:
+    """
+    Rate-limit each client and cap concurrent requests, answering 429/503 rather than queueing.
+    Runs on the event loop only, so the buckets and counters need no lock.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.slots = asyncio.Semaphore(MAX_IN_FLIGHT_REQUESTS) if MAX_IN_FLIGHT_REQUESTS > 0 else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if RATE_LIMIT_PER_SECOND > 0:
+            wait = _take_token(_client_key(scope))
+            if wait:
+                counters["rate_limited"] += 1
+                await _send_error(send, 429, "Rate limit exceeded; retry later.", wait)
+                return
+
+        if scope["path"] in STREAMING_PATHS:
+            counters["admitted"] += 1
+            await self.app(scope, receive, send)
+            return
+
+        if self.slots is not None:
+            try:
+                await asyncio.wait_for(self.slots.acquire(), timeout=ADMISSION_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                counters["shed"] += 1
+                await _send_error(send, 503, "Server is at capacity; retry later.", 1)
+                return
+
+        counters["admitted"] += 1
+        counters["in_flight"] += 1
+        counters["peak_in_flight"] = max(counters["peak_in_flight"], counters["in_flight"])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            counters["in_flight"] -= 1
+            if self.slots is not None:
+                self.slots.release()
+
+
+def _take_token(client: str) -> float:
+    now = time.monotonic()
+    bucket = _buckets.get(client)
+    if bucket is None:
+        while len(_buckets) >= MAX_TRACKED_CLIENTS:
+            _buckets.popitem(last=False)
+        bucket = _buckets[client] = TokenBucket(RATE_LIMIT_BURST, now)
+    else:
+        _buckets.move_to_end(client)
+    return bucket.take(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, now)
+
+
+async def _send_error(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
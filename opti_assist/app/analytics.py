@@ -0,0 +1,204 @@
+"""
+Vendor performance analytics over the maintenance logs.
+
+- Per maintaining vendor: repair count, median and p90 turnaround (days from
+  start to completion of completed repairs), and cost per repair.
+- Per asset model: how many assets needed a repair, and repairs per asset.
+
+Counts and sums are grouped in SQL. Percentiles use `percentile_cont` on
+Postgres; other databases get one ordered extract of (vendor, days, cost) and the
+same interpolation in Python. Results are cached per tenant until this process
+commits a write to `maintenance_logs` or `assets`, or ANALYTICS_CACHE_TTL_SECONDS
+passes (writes from other processes); at most ANALYTICS_CACHE_MAX_ENTRIES results
+are kept.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import models, counting, tenancy
+from .planner import SERVICE_TYPES
+
+# Cached results are reused at most this long, even without writes
+ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "300"))
+# Cached results kept in memory (one per report, tenant and arguments); the least recently used go first
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "256"))
+# Tables whose writes invalidate cached analytics
+SOURCE_TABLES = ("maintenance_logs", "assets")
+
+# (report, tenant, arguments) -> (expires_at, table versions, result), least recently used first
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cached(name: str, arguments: tuple, compute):
+    key = (name, tenancy.current_tenant_id(), arguments)
+    version = counting.table_version(*SOURCE_TABLES)
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and hit[0] > now and hit[1] == version:
+            _cache.move_to_end(key)
+            return hit[2]
+    result = compute()
+    with _cache_lock:
+        for stale in [stale for stale, entry in _cache.items() if entry[0] <= now or entry[1] != version]:
+            del _cache[stale]
+        _cache[key] = (now + ANALYTICS_CACHE_TTL_SECONDS, version, result)
+        _cache.move_to_end(key)
+        while len(_cache) > ANALYTICS_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return result
+
+
+def _is_repair(log):
+    """Everything but planned service counts as a repair (a failure of the asset)."""
+    return func.coalesce(log.maintenance_type, "").notin_(SERVICE_TYPES)
+
+
+def _turnaround_days(db: Session, log):
+    if db.get_bind().dialect.name == "postgresql":
+        return log.completion_date - log.start_date
+    return func.julianday(log.completion_date) - func.julianday(log.start_date)
+
+
+def _percentile(values: list, fraction: float) -> Optional[float]:
+    """Linear interpolation between the closest ranks of sorted values, like percentile_cont."""
+    if not values:
+        return None
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return float(values[lower] + (values[upper] - values[lower]) * (position - lower))
+
+
+def _percentiles(db: Session, log, days, conditions) -> dict:
+    """vendor_id -> (median days, p90 days, median cost) over the repairs matching the conditions."""
+    if db.get_bind().dialect.name == "postgresql":
+        rows = db.execute(
+            select(
+                log.vendor_id,
+                func.percentile_cont(0.5).within_group(days),
+                func.percentile_cont(0.9).within_group(days),
+                func.percentile_cont(0.5).within_group(log.cost),
+            ).where(*conditions).group_by(log.vendor_id)
+        )
+        return {row[0]: tuple(None if value is None else float(value) for value in row[1:]) for row in rows}
+
+    durations = defaultdict(list)
+    costs = defaultdict(list)
+    for vendor_id, duration, cost in db.execute(
+        select(log.vendor_id, days, log.cost).where(*conditions).order_by(log.vendor_id)
+    ):
+        if duration is not None:
+            durations[vendor_id].append(float(duration))
+        if cost is not None:
+            costs[vendor_id].append(float(cost))
+    return {
+        vendor_id: (
+            _percentile(sorted(durations[vendor_id]), 0.5),
+            _percentile(sorted(durations[vendor_id]), 0.9),
+            _percentile(sorted(costs[vendor_id]), 0.5),
+        )
+        for vendor_id in set(durations) | set(costs)
+    }
+
+
+def vendor_performance(db: Session, date_from: date = None, date_to: date = None, vendor_id: int = None) -> list:
+    """Repair statistics per maintaining vendor, for repairs started between two dates (inclusive)."""
+    def compute():
+        log = models.MaintenanceLog
+        conditions = [_is_repair(log), log.vendor_id.isnot(None)]
+        if date_from:
+            conditions.append(log.start_date >= date_from)
+        if date_to:
+            conditions.append(log.start_date <= date_to)
+        if vendor_id is not None:
+            conditions.append(log.vendor_id == vendor_id)
+        days = _turnaround_days(db, log)
+
+        totals = db.execute(
+            select(
+                log.vendor_id,
+                models.Vendor.vendor_name,
+                func.count(log.id),
+                func.count(log.completion_date),
+                func.avg(log.cost),
+                func.coalesce(func.sum(log.cost), 0),
+            )
+            .outerjoin(models.Vendor, models.Vendor.id == log.vendor_id)
+            .where(*conditions)
+            .group_by(log.vendor_id, models.Vendor.vendor_name)
+            .order_by(log.vendor_id)
+        ).all()
+        # Percentile costs cover every repair; turnaround only completed ones (NULL days are skipped)
+        percentiles = _percentiles(db, log, days, conditions)
+        report = []
+        for vendor, name, repairs, finished, average_cost, total_cost in totals:
+            median_days, p90_days, median_cost = percentiles.get(vendor, (None, None, None))
+            report.append({
+                "vendor_id": vendor,
+                "vendor_name": name,
+                "repairs": repairs,
+                "completed": finished,
+                "median_turnaround_days": median_days,
+                "p90_turnaround_days": p90_days,
+                "average_cost": None if average_cost is None else float(average_cost),
+                "median_cost": median_cost,
+                "total_cost": float(total_cost),
+            })
+        return report
+
+    return _cached("vendor_performance", (date_from, date_to, vendor_id), compute)
+
+
+def model_failure_rates(db: Session, vendor_id: int = None, min_assets: int = 1) -> list:
+    """
+    Per asset model (optionally only assets bought from one vendor): number of assets,
+    how many needed at least one repair, and repairs per asset. Highest failure rate first.
+    """
+    def compute():
+        asset = models.Asset
+        log = models.MaintenanceLog
+        repairs = (
+            select(log.asset_id, func.count(log.id).label("repairs"))
+            .where(_is_repair(log))
+            .group_by(log.asset_id)
+            .subquery("repairs")
+        )
+        conditions = [asset.model_number.isnot(None)]
+        if vendor_id is not None:
+            conditions.append(asset.vendor_id == vendor_id)
+        rows = db.execute(
+            select(
+                asset.model_number,
+                func.count(asset.id),
+                func.count(repairs.c.asset_id),
+                func.coalesce(func.sum(repairs.c.repairs), 0),
+            )
+            .outerjoin(repairs, repairs.c.asset_id == asset.id)
+            .where(*conditions)
+            .group_by(asset.model_number)
+            .having(func.count(asset.id) >= min_assets)
+        ).all()
+        report = [
+            {
+                "model_number": model,
+                "assets": assets,
+                "failed_assets": failed,
+                "repairs": int(total),
+                "failure_rate": failed / assets,
+                "repairs_per_asset": int(total) / assets,
+            }
+            for model, assets, failed, total in rows
+        ]
+        report.sort(key=lambda row: (-row["failure_rate"], row["model_number"]))
+        return report
+
+    return _cached("model_failure_rates", (vendor_id, min_assets), compute)
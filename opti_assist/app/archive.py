@@ -0,0 +1,199 @@
+"""
+Archival of closed assignment history and maintenance records to cold storage.
+
+    python -m app.archive [--years 3] [--tenant 1]
+
+Records closed more than N years ago are written to compressed files under
+ARCHIVE_DIR (Parquet when `pyarrow` is installed, gzip-compressed JSON Lines
+otherwise) and then deleted from the hot tables. Files are laid out by tenant and
+asset id range (ARCHIVE_DIR/<table>/tenant-<id>/assets-<first id>/), so
+`read_archived` only opens the files that can hold the asset it is asked for.
+Costs keep their exact decimal value (a decimal column in Parquet, a string in JSON Lines).
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import Date, DateTime, Numeric, text
+from sqlalchemy.orm import Session
+
+from . import models, database, tenancy
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:  # Parquet is optional; JSON Lines archives are always readable
+    pyarrow = None
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+# Closed records older than this many years move to cold storage
+ARCHIVE_AFTER_YEARS = int(os.getenv("ARCHIVE_AFTER_YEARS", "3"))
+BATCH_SIZE = 5000
+# Width of the asset id ranges archive files are grouped by
+ARCHIVE_ASSETS_PER_DIR = int(os.getenv("ARCHIVE_ASSETS_PER_DIR", "1000"))
+
+# Partitioned tables: name -> (model, partition key column)
+PARTITIONED_TABLES = {
+    "asset_assignment_history": (models.AssetAssignmentHistory, "assigned_date"),
+    "maintenance_logs": (models.MaintenanceLog, "start_date"),
+}
+
+
+def _closed_before(model, cutoff: date):
+    """Filter for records that are closed and were closed before the cutoff."""
+    if model is models.AssetAssignmentHistory:
+        return model.returned_date < datetime.combine(cutoff, datetime.min.time())
+    return (model.status == "Completed") & (model.completion_date < cutoff)
+
+
+def _years_ago(today: date, years: int) -> date:
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:  # 29 February
+        return today.replace(year=today.year - years, day=28)
+
+
+def _column_names(model):
+    return [column.name for column in model.__table__.columns]
+
+
+def _asset_directory(table: str, tenant_id: int, asset_id: int) -> str:
+    """Directory holding the archived rows of the asset id range that contains `asset_id`."""
+    first = asset_id - asset_id % ARCHIVE_ASSETS_PER_DIR
+    return os.path.join(ARCHIVE_DIR, table, f"tenant-{tenant_id}", f"assets-{first}")
+
+
+def _write_part(table: str, rows: list, directory: str) -> str:
+    """Write one batch of archived rows to a new file in the directory and return its path."""
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.join(directory, f"{table}-{datetime.utcnow():%Y%m%dT%H%M%S%f}")
+    if pyarrow is not None:
+        path = stem + ".parquet"
+        parquet.write_table(pyarrow.Table.from_pylist(rows), path, compression="zstd")
+    else:
+        path = stem + ".jsonl.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as handle:
+            for row in rows:
+                handle.write(json.dumps(row, default=str) + "\n")
+    return path
+
+
+def archive_table(db: Session, table: str, cutoff: date) -> int:
+    """Move closed records older than the cutoff from one table to cold storage, in batches."""
+    model, _ = PARTITIONED_TABLES[table]
+    columns = _column_names(model)
+    archived = 0
+    while True:
+        records = (
+            db.query(model)
+            .filter(_closed_before(model, cutoff))
+            .order_by(model.id)
+            .limit(BATCH_SIZE)
+            .all()
+        )
+        if not records:
+            return archived
+        rows = [{name: getattr(record, name) for name in columns} for record in records]
+        groups = {}
+        for row in rows:
+            groups.setdefault(_asset_directory(table, row["tenant_id"], row["asset_id"]), []).append(row)
+        # Files first, then delete: a crash in between leaves duplicates that readers drop by id
+        for directory, group in groups.items():
+            _write_part(table, group, directory)
+        db.query(model).filter(model.id.in_([row["id"] for row in rows])).delete(synchronize_session=False)
+        db.commit()
+        archived += len(rows)
+
+
+def archive_closed_records(db: Session, years: int = ARCHIVE_AFTER_YEARS, today: date = None) -> dict:
+    """Archive every partitioned table; returns the number of records moved per table."""
+    cutoff = _years_ago(today or date.today(), years)
+    return {table: archive_table(db, table, cutoff) for table in PARTITIONED_TABLES}
+
+
+def _parse(model, row: dict) -> dict:
+    """Restore date/datetime and decimal values from JSON Lines archives."""
+    for column in model.__table__.columns:
+        value = row.get(column.name)
+        if isinstance(value, str) and isinstance(column.type, DateTime):
+            row[column.name] = datetime.fromisoformat(value)
+        elif isinstance(value, str) and isinstance(column.type, Date):
+            row[column.name] = date.fromisoformat(value)
+        elif isinstance(value, str) and isinstance(column.type, Numeric):
+            row[column.name] = Decimal(value)
+    return row
+
+
+def read_archived(table: str, asset_id: int) -> list:
+    """
+    Return archived rows of one asset of the current tenant from cold storage
+    (deduplicated by id). Only the directory of the asset's tenant and id range is read.
+    """
+    model, _ = PARTITIONED_TABLES[table]
+    directory = _asset_directory(table, tenancy.current_tenant_id(), asset_id)
+    rows = {}
+    for path in sorted(glob.glob(os.path.join(directory, f"{table}-*"))):
+        if path.endswith(".parquet"):
+            if pyarrow is None:
+                continue
+            for row in parquet.read_table(path, filters=[("asset_id", "=", asset_id)]).to_pylist():
+                rows[row["id"]] = row
+        elif path.endswith(".jsonl.gz"):
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                for line in handle:
+                    row = json.loads(line)
+                    if row["asset_id"] == asset_id:
+                        rows[row["id"]] = _parse(model, row)
+    return list(rows.values())
+
+
+def ensure_partitions(db: Session, years_ahead: int = 1) -> int:
+    """
+    Create yearly partitions up to `years_ahead` years from now for the partitioned
+    tables (Postgres only; a no-op elsewhere or when a table is not partitioned).
+    Returns the number of partitions checked.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return 0
+    checked = 0
+    for table in PARTITIONED_TABLES:
+        partitioned = db.execute(
+            text("SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :name"),
+            {"name": table},
+        ).first()
+        if not partitioned:
+            continue
+        for year in range(date.today().year, date.today().year + years_ahead + 1):
+            db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {table}_{year} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+            ))
+            checked += 1
+    db.commit()
+    return checked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive closed history and maintenance records")
+    parser.add_argument("--years", type=int, default=ARCHIVE_AFTER_YEARS, help="Archive records closed more than this many years ago")
+    parser.add_argument("--tenant", type=int, help="Only archive this tenant's records (default: every tenant)")
+    args = parser.parse_args()
+
+    database.init_engine()
+    db = database.SessionLocal()
+    try:
+        ensure_partitions(db)
+        for tenant_id in [args.tenant] if args.tenant is not None else tenancy.tenant_ids(db):
+            with tenancy.tenant_context(tenant_id):
+                for table, count in archive_closed_records(db, years=args.years).items():
+                    print(f"tenant {tenant_id} {table}: archived {count} records to {ARCHIVE_DIR}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Physical stock audits.
+
+- `build_snapshot` packs what an auditor needs offline for one location (its
+  assets, their holders, and the categories) into a gzip-compressed SQLite file,
+  with the asset tag and serial number indexed for instant lookups while scanning.
+- `reconcile` compares a batch of scanned tags with the location's expected stock
+  in one statement and sorts them into found, missing, misplaced and unknown.
+
+Retired assets are not expected anywhere; every other status (Lost included) is,
+so scanning a lost asset shows it as found with its 'Lost' status.
+"""
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import String, column, exists, literal, select, union_all, values
+from sqlalchemy.orm import Session
+
+from . import models, tenancy
+from .lifecycle import RETIRED
+
+# Tags accepted by one reconcile call (each becomes a bound parameter)
+MAX_RECONCILE_TAGS = int(os.getenv("MAX_RECONCILE_TAGS", "10000"))
+# Rows read from the database (a read replica when configured) per round trip while writing a snapshot
+SNAPSHOT_BATCH_SIZE = 1000
+
+_SNAPSHOT_SCHEMA = """
+CREATE TABLE snapshot_info (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE categories (id INTEGER PRIMARY KEY, category_name TEXT, parent_category_id INTEGER);
+CREATE TABLE employees (id INTEGER PRIMARY KEY, employee_code TEXT, first_name TEXT, last_name TEXT, email TEXT);
+CREATE TABLE assets (
+    id INTEGER PRIMARY KEY,
+    asset_tag TEXT NOT NULL,
+    serial_number TEXT,
+    asset_name TEXT,
+    model_number TEXT,
+    category_id INTEGER,
+    status TEXT,
+    condition_grade TEXT,
+    current_employee_id INTEGER
+);
+"""
+# Created after the rows are loaded (cheaper than maintaining them row by row)
+_SNAPSHOT_INDEXES = """
+CREATE UNIQUE INDEX ux_assets_tag ON assets (asset_tag);
+CREATE INDEX ix_assets_serial ON assets (serial_number);
+"""
+
+_ASSET_COLUMNS = (
+    "id", "asset_tag", "serial_number", "asset_name", "model_number",
+    "category_id", "status", "condition_grade", "current_employee_id",
+)
+
+
+def _expected(location_id: int):
+    """Conditions selecting the assets an audit of the location expects to find."""
+    asset = models.Asset
+    return asset.current_location_id == location_id, asset.status != RETIRED
+
+
+def build_snapshot(db: Session, location_id: int) -> str:
+    """
+    Write the audit snapshot of one location and return the path of the
+    gzip-compressed SQLite file (a temporary file the caller must remove).
+    Nothing is left behind if writing it fails.
+    """
+    directory = tempfile.mkdtemp(prefix="opti_audit_")
+    path = os.path.join(directory, "snapshot.sqlite")
+    try:
+        _write_snapshot(db, location_id, path)
+        with open(path, "rb") as source, gzip.open(path + ".gz", "wb", compresslevel=6) as packed:
+            shutil.copyfileobj(source, packed)
+        os.remove(path)
+    except BaseException:
+        remove_snapshot(path)
+        raise
+    return path + ".gz"
+
+
+def _write_snapshot(db: Session, location_id: int, path: str):
+    """Create the uncompressed snapshot database of one location at `path`."""
+    asset = models.Asset
+    target = sqlite3.connect(path)
+    try:
+        target.executescript(_SNAPSHOT_SCHEMA)
+        holder_ids = set()
+        count = 0
+        last_id = 0
+        while True:
+            rows = db.execute(
+                select(*(getattr(asset, name) for name in _ASSET_COLUMNS))
+                .where(*_expected(location_id), asset.id > last_id)
+                .order_by(asset.id)
+                .limit(SNAPSHOT_BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            target.executemany(f"INSERT INTO assets VALUES ({', '.join('?' * len(_ASSET_COLUMNS))})", rows)
+            holder_ids.update(row.current_employee_id for row in rows if row.current_employee_id is not None)
+            count += len(rows)
+            last_id = rows[-1].id
+
+        employee = models.Employee
+        holders = sorted(holder_ids)
+        for start in range(0, len(holders), SNAPSHOT_BATCH_SIZE):
+            target.executemany(
+                "INSERT INTO employees VALUES (?, ?, ?, ?, ?)",
+                db.execute(
+                    select(employee.id, employee.employee_code, employee.first_name, employee.last_name, employee.email)
+                    .where(employee.id.in_(holders[start:start + SNAPSHOT_BATCH_SIZE]))
+                ).all(),
+            )
+        category = models.AssetCategory
+        target.executemany(
+            "INSERT INTO categories VALUES (?, ?, ?)",
+            db.execute(select(category.id, category.category_name, category.parent_category_id)).all(),
+        )
+        target.executemany("INSERT INTO snapshot_info VALUES (?, ?)", [
+            ("tenant_id", str(tenancy.current_tenant_id())),
+            ("location_id", str(location_id)),
+            ("generated_at", datetime.utcnow().isoformat()),
+            ("assets", str(count)),
+        ])
+        target.executescript(_SNAPSHOT_INDEXES)
+        target.commit()
+        target.execute("VACUUM")
+    finally:
+        target.close()
+
+
+def remove_snapshot(path: str):
+    """Remove a snapshot file and its temporary directory."""
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+def reconcile(db: Session, location_id: int, tags: List[str]) -> dict:
+    """
+    Compare scanned tags with the assets expected at a location, in one statement:
+    scanned tags left-joined to the assets (found, misplaced or unknown) plus the
+    expected assets whose tag was not scanned (missing). Misplaced assets were
+    scanned here but are recorded at another location (or retired).
+    """
+    asset = models.Asset
+    tags = list(dict.fromkeys(tag.strip() for tag in tags if tag and tag.strip()))
+    result = {"location_id": location_id, "scanned": len(tags), "found": [], "missing": [], "misplaced": [], "unknown": []}
+    columns = (asset.id, asset.asset_name, asset.status, asset.current_location_id)
+
+    expected = select(literal(False).label("was_scanned"), asset.asset_tag, *columns).where(*_expected(location_id))
+    if tags:
+        scanned = values(column("asset_tag", String), name="scanned").data([(tag,) for tag in tags]).cte("scanned")
+        found = (
+            select(literal(True).label("was_scanned"), scanned.c.asset_tag, *columns)
+            .select_from(scanned)
+            .outerjoin(asset, asset.asset_tag == scanned.c.asset_tag)
+        )
+        expected = expected.where(~exists().where(scanned.c.asset_tag == asset.asset_tag))
+        statement = union_all(found, expected)
+    else:
+        statement = expected
+
+    for was_scanned, tag, asset_id, name, status, current_location_id in db.execute(statement):
+        if asset_id is None:
+            result["unknown"].append(tag)
+            continue
+        item = {
+            "asset_id": asset_id,
+            "asset_tag": tag,
+            "asset_name": name,
+            "status": status,
+            "current_location_id": current_location_id,
+        }
+        if not was_scanned:
+            result["missing"].append(item)
+        elif current_location_id == location_id and status != RETIRED:
+            result["found"].append(item)
+        else:
+            result["misplaced"].append(item)
+    for key in ("found", "missing", "misplaced"):
+        result[key].sort(key=lambda item: item["asset_tag"])
+    result["unknown"].sort()
+    return result
@@ -0,0 +1,323 @@
+"""
+Micro-benchmarks for the API, run in-process against a throwaway SQLite database.
+
+    python -m app.bench compression [--rows 5000] [--repeat 20]
+    python -m app.bench startup [--repeat 20]
+    python -m app.bench plans [--rows 5000] [--repeat 20]
+    python -m app.bench tenants [--rows 5000] [--repeat 20]
+    python -m app.bench msgpack [--rows 5000] [--repeat 20]
+    python -m app.bench profiling [--rows 5000] [--repeat 20]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def _seed_assets(db, rows: int, tenant_id: int = None):
+    """Insert `rows` synthetic assets for a tenant (the default tenant if none is given)."""
+    from sqlalchemy import insert
+    from . import models, tenancy
+
+    tenant_id = tenancy.DEFAULT_TENANT_ID if tenant_id is None else tenant_id
+    if not rows:
+        return
+    db.execute(insert(models.Asset), [
+        {
+            "tenant_id": tenant_id,
+            "asset_tag": f"AST-{i:07d}",
+            "serial_number": f"SN-{i:09d}",
+            "asset_name": f"Dell Latitude 74{i % 10}0",
+            "model_number": f"LAT-74{i % 10}0",
+            "category_id": i % 12 + 1,
+            "status": ("In Stock", "Assigned", "In Repair")[i % 3],
+            "condition_grade": ("New", "Good", "Fair")[i % 3],
+            "vendor_id": i % 7 + 1,
+            "purchase_date": date(2020, 1, 1) + timedelta(days=i % 1500),
+            "purchase_cost": 400 + (i * 37) % 3000,
+            "warranty_expiry_date": date(2023, 1, 1) + timedelta(days=i % 1500),
+            "order_number": f"PO-{i // 50:06d}",
+            "current_location_id": i % 9 + 1,
+            "notes": f"Imaged with corporate build {i % 40}; docking station and charger issued. " * 2,
+        }
+        for i in range(rows)
+    ])
+    db.commit()
+
+
+def _client(rows: int):
+    """Point the app at a fresh SQLite file, seed `rows` assets and return a TestClient."""
+    path = os.path.join(tempfile.mkdtemp(prefix="opti_bench_"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["SCHEDULER_IN_PROCESS"] = "0"
+    # One client sends every request; do not rate-limit it
+    os.environ["RATE_LIMIT_PER_SECOND"] = "0"
+
+    from fastapi.testclient import TestClient
+    from .main import app
+    from . import database
+    from .migrate import migrate
+
+    migrate()
+    db = database.SessionLocal()
+    _seed_assets(db, rows)
+    db.close()
+    return TestClient(app)
+
+
+def _measure(client, url: str, repeat: int, headers: dict) -> tuple:
+    """Return (bytes on the wire, median latency in ms) for a GET request."""
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+        size = int(response.headers.get("content-length", len(response.content)))
+    return size, statistics.median(timings)
+
+
+def bench_compression(args):
+    """Payload size and latency of the asset list: full vs. `fields=` projection, per encoding."""
+    from .compression import brotli
+
+    client = _client(args.rows)
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    urls = {
+        "full": "/api/assets/?limit=1000",
+        "fields": "/api/assets/?limit=1000&fields=asset_tag,asset_name,status",
+    }
+    print(f"{'variant':<8} {'encoding':<9} {'bytes':>9} {'median ms':>10}")
+    for variant, url in urls.items():
+        for encoding in encodings:
+            size, latency = _measure(client, url, args.repeat, {"Accept-Encoding": encoding})
+            print(f"{variant:<8} {encoding:<9} {size:>9} {latency:>10.1f}")
+    if brotli is None:
+        print("(install the 'brotli' package to include Brotli)")
+
+
+# Child process for the startup benchmark: import the app, run its lifespan, serve one request
+_STARTUP_PROBE = """
+import time
+start = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+connects = []
+event.listen(Pool, "connect", lambda *args: connects.append(1))
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    ready = time.perf_counter()
+    client.get("/")
+print((imported - start) * 1000, (ready - imported) * 1000, len(connects))
+"""
+
+
+def bench_startup(args):
+    """Cold-start time of the `app.main:app` entry point, measured in fresh interpreters."""
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # A database that cannot be reached: startup must not depend on it
+    env = dict(os.environ, DATABASE_URL="sqlite:////nonexistent/opti_assist.db", SCHEDULER_IN_PROCESS="0", JOB_WORKER_IN_PROCESS="0")
+    imports, lifespans, connects = [], [], 0
+    for _ in range(args.repeat):
+        output = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", _STARTUP_PROBE],
+            cwd=package_root, env=env, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        imports.append(float(output[0]))
+        lifespans.append(float(output[1]))
+        connects += int(output[2])
+    print(f"import app.main     median {statistics.median(imports):7.1f} ms")
+    print(f"lifespan to ready   median {statistics.median(lifespans):7.1f} ms")
+    print(f"database connections opened during startup: {connects}")
+
+
+# Representative asset list filters: (label, filter_assets keyword arguments, sort)
+_PLAN_CASES = [
+    ("status", {"status": ["Assigned"]}, None),
+    ("status+category", {"status": ["Assigned"], "category_id": [3]}, "-purchase_cost"),
+    ("vendor+purchased", {"vendor_id": [2], "purchased_to": date(2023, 1, 1)}, "purchase_date"),
+    ("location", {"location_id": [4], "condition_grade": ["Good"]}, None),
+    ("holder", {"employee_id": 12}, None),
+    ("cost range", {"cost_min": 1000, "cost_max": 1500}, "-purchase_cost"),
+    ("warranty window", {"warranty_from": date(2024, 1, 1), "warranty_to": date(2024, 3, 31)}, "warranty_expiry_date"),
+]
+
+
+def _query_string(filters: dict, sort) -> str:
+    params = []
+    for name, value in filters.items():
+        for item in value if isinstance(value, list) else [value]:
+            params.append(f"{name}={item}")
+    if sort:
+        params.append(f"sort={sort}")
+    return "&".join(params)
+
+
+def bench_plans(args):
+    """Query plan and latency of the asset list for representative filter combinations."""
+    client = _client(args.rows)
+    from . import database, filtering, models, tenancy
+
+    db = database.SessionLocal()
+    dialect = db.get_bind().dialect
+    explain = "EXPLAIN QUERY PLAN" if dialect.name == "sqlite" else "EXPLAIN"
+    try:
+        for label, filters, sort in _PLAN_CASES:
+            # Tenant scoping is added at execution time; spell it out so EXPLAIN sees the same query
+            query = db.query(models.Asset).filter(models.Asset.tenant_id == tenancy.current_tenant_id())
+            query = filtering.sort_assets(filtering.filter_assets(query, **filters), sort).limit(100)
+            sql = str(query.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+            plan = [row[-1] for row in db.connection().exec_driver_sql(f"{explain} {sql}")]
+            _, latency = _measure(client, f"/api/assets/?{_query_string(filters, sort)}", args.repeat, {})
+            print(f"{label:<18} median {latency:6.1f} ms")
+            for line in plan:
+                print(f"    {line}")
+    finally:
+        db.close()
+
+
+# Hot queries of a small tenant: (label, URL)
+_TENANT_CASES = [
+    ("list", "/api/assets/?limit=100"),
+    ("status+category", "/api/assets/?status=Assigned&category_id=3&limit=100"),
+    ("by tag", "/api/assets/tag/AST-0000042"),
+    ("count", "/api/assets/?limit=1&count=exact"),
+]
+
+
+def bench_tenants(args):
+    """
+    Latency of a small tenant's hot queries (`--rows` / 10 assets) before and after
+    a tenant 200 times its size (`--rows` x 20 assets) moves into the same tables.
+    """
+    client = _client(0)
+    from sqlalchemy import text
+    from . import database, models, tenancy
+
+    small_rows = max(args.rows // 10, 100)
+    db = database.SessionLocal()
+    try:
+        small = models.Tenant(code="SMALL", name="Small company")
+        large = models.Tenant(code="LARGE", name="Large company")
+        db.add_all([small, large])
+        db.commit()
+        _seed_assets(db, small_rows, small.id)
+        _seed_assets(db, small_rows, tenancy.DEFAULT_TENANT_ID)
+        db.execute(text("ANALYZE"))
+        db.commit()
+        headers = {"X-Tenant-ID": str(small.id)}
+
+        before = {label: _measure(client, url, args.repeat, headers)[1] for label, url in _TENANT_CASES}
+        _seed_assets(db, args.rows * 20, large.id)
+        db.execute(text("ANALYZE"))
+        db.commit()
+        after = {label: _measure(client, url, args.repeat, headers)[1] for label, url in _TENANT_CASES}
+
+        print(f"small tenant: {small_rows} assets; large tenant: {args.rows * 20} assets")
+        print(f"{'query':<18} {'alone ms':>9} {'+large ms':>10} {'ratio':>6}")
+        for label, _ in _TENANT_CASES:
+            print(f"{label:<18} {before[label]:>9.2f} {after[label]:>10.2f} {after[label] / before[label]:>6.2f}")
+
+        # Plan of the filtered list, with the tenant predicate the session adds at execution time
+        query = (
+            db.query(models.Asset.id)
+            .filter(models.Asset.tenant_id == small.id, models.Asset.status == "Assigned", models.Asset.category_id == 3)
+        )
+        sql = str(query.statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+        for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"):
+            print(f"    {row[-1]}")
+    finally:
+        db.close()
+
+
+def bench_msgpack(args):
+    """Payload size and latency of list endpoints as JSON vs. MessagePack, plus encode time alone."""
+    from .projection import msgpack
+
+    if msgpack is None:
+        print("install the 'msgpack' package to run this benchmark")
+        return
+    client = _client(args.rows)
+    from fastapi.encoders import jsonable_encoder
+    from . import database, models, projection, schemas
+
+    urls = {
+        "assets": "/api/assets/?limit=1000",
+        "assets fields": "/api/assets/?limit=1000&fields=asset_tag,asset_name,status",
+    }
+    formats = {"json": "application/json", "msgpack": "application/msgpack"}
+    print(f"{'list':<14} {'format':<8} {'bytes':>9} {'median ms':>10}")
+    for label, url in urls.items():
+        for name, accept in formats.items():
+            size, latency = _measure(client, url, args.repeat, {"Accept": accept, "Accept-Encoding": "identity"})
+            print(f"{label:<14} {name:<8} {size:>9} {latency:>10.1f}")
+
+    # Encoding only, on the same 1000 column rows
+    db = database.SessionLocal()
+    try:
+        columns = projection.select_columns(models.Asset, schemas.Asset, None, all_columns=True)
+        rows = [dict(row._mapping) for row in db.query(*columns).order_by(models.Asset.id).limit(1000)]
+    finally:
+        db.close()
+    encoders = {
+        "json": lambda: projection.JSONResponse(content=jsonable_encoder(rows)).body,
+        "msgpack": lambda: msgpack.packb(rows, default=projection.msgpack_default),
+    }
+    for name, encode in encoders.items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            encode()
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"encode 1000 rows as {name:<8} median {statistics.median(timings):6.2f} ms")
+
+
+def bench_profiling(args):
+    """Latency of the asset list with request profiling off, sampled at 1%, and on every request."""
+    client = _client(args.rows)
+    from . import profiling
+
+    url = "/api/assets/?limit=100"
+    repeat = max(args.repeat, 100)  # enough requests for 1% sampling to trigger
+    print(f"{'sample rate':<12} {'median ms':>10} {'mean ms':>9} {'profiled':>9}")
+    for rate in (0.0, 0.01, 1.0):
+        profiling.PROFILE_SAMPLE_RATE = rate
+        latest = lambda: max((profile["id"] for profile in profiling.list_profiles()), default=0)
+        before = latest()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        profiled = latest() - before
+        print(f"{rate:<12} {statistics.median(timings):>10.2f} {statistics.mean(timings):>9.2f} {profiled:>9}")
+    profiling.PROFILE_SAMPLE_RATE = 0.0
+
+
+BENCHMARKS = {
+    "compression": bench_compression,
+    "msgpack": bench_msgpack,
+    "plans": bench_plans,
+    "profiling": bench_profiling,
+    "startup": bench_startup,
+    "tenants": bench_tenants,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Opti Assist micro-benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--rows", type=int, default=5000, help="Number of assets to seed")
+    parser.add_argument("--repeat", type=int, default=20, help="Requests per measurement")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import os
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Brotli quality 4 compresses better than gzip at a comparable CPU cost
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+# zlib level 6 is the usual size/CPU trade-off (Starlette defaults to 9)
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+
+# Streaming responses that must reach the client unbuffered, and files that are compressed already
+UNCOMPRESSED_MEDIA_TYPES = ("text/event-stream", "application/gzip")
+
+
+def _quality(accept_encoding: str, coding: str) -> float:
+    """
+    The q-value the Accept-Encoding header gives a coding: its own entry, else the
+    `*` entry, else 0 (not acceptable). An entry without q counts as q=1.
+    """
+    wildcard = 0.0
+    for part in accept_encoding.split(","):
+        name, *params = part.strip().split(";")
+        name = name.strip().lower()
+        if name not in (coding, "*"):
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name == coding:
+            return quality
+        wildcard = quality
+    return wildcard
+
+
+def prefers_brotli(accept_encoding: str) -> bool:
+    """True if the client accepts Brotli at least as much as gzip (ties go to Brotli, which is smaller)."""
+    br = _quality(accept_encoding, "br")
+    return br > 0 and br >= _quality(accept_encoding, "gzip")
+
+
+class CompressionMiddleware:
+    """
+    Negotiate response compression by q-value: Brotli when the client accepts it at
+    least as much as gzip and the `brotli` package is installed, otherwise gzip
+    unless it is refused. Bodies under the size threshold are left alone.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, brotli_quality: int = BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.brotli_quality = brotli_quality
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=GZIP_LEVEL)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+            if brotli is not None and prefers_brotli(accept_encoding):
+                responder = _BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+                await responder(scope, receive, send)
+                return
+            if _quality(accept_encoding, "gzip") <= 0:
+                # Starlette's gzip only looks for the word, so `gzip;q=0` would still get gzip
+                await self.app(scope, receive, send)
+                return
+        await self.gzip(scope, receive, send)
+
+
+class _BrotliResponder:
+    """Per-request ASGI wrapper that Brotli-encodes the response body."""
+
+    def __init__(self, app, minimum_size: int, quality: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.quality = quality
+        self.send = None
+        self.initial_message = None
+        self.started = False
+        self.passthrough = False
+        self.compressor = None
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_with_brotli)
+
+    async def send_with_brotli(self, message):
+        if message["type"] == "http.response.start":
+            # Hold the headers until the first body chunk shows whether to compress
+            self.initial_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            media_type = headers.get("content-type", "").split(";")[0].strip()
+            if (
+                "content-encoding" in headers
+                or media_type in UNCOMPRESSED_MEDIA_TYPES
+                or (not more_body and len(body) < self.minimum_size)
+            ):
+                self.passthrough = True
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            self.compressor = brotli.Compressor(quality=self.quality)
+            headers["Content-Encoding"] = "br"
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body:
+                body = self.compressor.process(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.initial_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            del headers["Content-Length"]
+            await self.send(self.initial_message)
+            await self.send({
+                "type": "http.response.body",
+                "body": self.compressor.process(body) + self.compressor.flush(),
+                "more_body": True,
+            })
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+        chunk = self.compressor.process(body)
+        chunk += self.compressor.flush() if more_body else self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -0,0 +1,155 @@
+"""
+Total counts for paginated list endpoints.
+
+Modes selected with `count=`:
+- none: no total (default, no extra query)
+- exact: COUNT(*) over the filtered query
+- cached: exact count, reused until a committed write touches the table or the TTL expires;
+  at most COUNT_CACHE_MAX_ENTRIES counts are kept, least recently used first out
+- estimated: the Postgres planner's row estimate (EXPLAIN of the tenant's query); falls back
+  to `cached` when no estimate exists (always on SQLite)
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import Response
+from sqlalchemy import event, func, text
+from sqlalchemy.orm import Session
+
+from . import tenancy
+
+COUNT_MODES = ("none", "exact", "cached", "estimated")
+COUNT_MODE_PATTERN = "^(" + "|".join(COUNT_MODES) + ")$"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+# Mode that actually produced the total ("estimated" may fall back to "cached")
+COUNT_MODE_HEADER = "X-Total-Count-Mode"
+# Cached counts are reused at most this long, even without writes (writes from other processes)
+COUNT_CACHE_TTL_SECONDS = float(os.getenv("COUNT_CACHE_TTL_SECONDS", "60"))
+# Cached counts kept per process (one per tenant and filter combination)
+COUNT_CACHE_MAX_ENTRIES = int(os.getenv("COUNT_CACHE_MAX_ENTRIES", "1024"))
+
+# (table, tenant, statement, params) -> (expires_at, count), least recently used first
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+# table -> number of committed writes seen by this process, for other caches keyed on table contents
+_table_versions = {}
+
+
+def invalidate(*tables: str):
+    """Drop cached counts of the given tables."""
+    with _cache_lock:
+        for key in [key for key in _cache if key[0] in tables]:
+            del _cache[key]
+        for table in tables:
+            _table_versions[table] = _table_versions.get(table, 0) + 1
+
+
+def table_version(*tables: str) -> tuple:
+    """Changes whenever this process commits a write to one of the tables."""
+    with _cache_lock:
+        return tuple(_table_versions.get(table, 0) for table in tables)
+
+
+def _touched(session: Session) -> set:
+    return session.info.setdefault("count_tables_touched", set())
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(instance, "__tablename__", None)
+        if table:
+            _touched(session).add(table)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            _touched(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    tables = session.info.pop("count_tables_touched", None)
+    if tables:
+        invalidate(*tables)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_on_rollback(session, previous_transaction):
+    session.info.pop("count_tables_touched", None)
+
+
+def _exact(db: Session, query) -> int:
+    return db.query(func.count()).select_from(query.order_by(None).subquery()).scalar()
+
+
+def _cached(db: Session, query, table: str) -> int:
+    compiled = query.order_by(None).statement.compile(dialect=db.get_bind().dialect)
+    key = (table, tenancy.current_tenant_id(), str(compiled), repr(sorted(compiled.params.items())))
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and hit[0] > now:
+            _cache.move_to_end(key)
+            return hit[1]
+    count = _exact(db, query)
+    with _cache_lock:
+        for expired in [expired for expired, entry in _cache.items() if entry[0] <= now]:
+            del _cache[expired]
+        _cache[key] = (now + COUNT_CACHE_TTL_SECONDS, count)
+        _cache.move_to_end(key)
+        while len(_cache) > COUNT_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return count
+
+
+def _estimated(db: Session, query, table: str) -> Optional[int]:
+    """
+    Row estimate for the current tenant from the Postgres planner, or None elsewhere.
+    SQLite's statistics only give the average rows per tenant, which is no estimate of one tenant's count.
+    """
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql":
+        # Tenant scoping is added at execution time, so spell it out for EXPLAIN
+        entity = query.column_descriptions[0]["entity"]
+        scoped = query.order_by(None).filter(entity.tenant_id == tenancy.current_tenant_id())
+        sql = scoped.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+        plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    return None
+
+
+def total_count(db: Session, query, table: str, mode: str) -> Optional[Tuple[int, str]]:
+    """Return (total, mode used) for a filtered, un-paginated query, or None for mode 'none'."""
+    if mode == "exact":
+        return _exact(db, query), "exact"
+    if mode == "estimated":
+        estimate = _estimated(db, query, table)
+        if estimate is not None:
+            return estimate, "estimated"
+        mode = "cached"
+    if mode == "cached":
+        return _cached(db, query, table), "cached"
+    return None
+
+
+def set_total_count(response: Response, db: Session, query, table: str, mode: str) -> dict:
+    """
+    Add the total count headers to a list response when a count was requested.
+    Returns the headers too, for handlers that build their own response object.
+    """
+    result = total_count(db, query, table, mode)
+    if result is None:
+        return {}
+    headers = {TOTAL_COUNT_HEADER: str(result[0]), COUNT_MODE_HEADER: result[1]}
+    response.headers.update(headers)
+    return headers
@@ -1,18 +1,151 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import asyncio
+import itertools
 import os
+import time
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Comma-separated read replica URLs; read-only endpoints are spread across them
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# Replicas further behind the primary than this are skipped
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+# How often a replica's lag is re-measured (in the background, never on a request)
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "10"))
+# After a client writes, its reads stay on the primary this long (read-your-writes)
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Cookie set on successful writes, and header to force primary reads
+LAST_WRITE_COOKIE = "oa_last_write"
+CONSISTENCY_HEADER = "X-Read-Consistency"
+
+# Created on first use (app lifespan or a CLI entry point), never at import time
+engine = None
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+# One session factory per replica, plus the last (checked_at, lag_seconds) per replica, measured by monitor_replicas
+replica_sessions = []
+_replica_lag = {}
+_replica_cycle = None
 
 Base = declarative_base()
 
+def init_engine(url: str = None):
+    """
+    Create the database engines and bind the session factories to them.
+    Safe to call repeatedly; only the first call creates engines.
+    Creating an engine does not open a connection.
+    """
+    global engine, _replica_cycle
+    if engine is None:
+        engine = create_engine(url or DATABASE_URL, pool_pre_ping=True)
+        SessionLocal.configure(bind=engine)
+        for replica_url in DATABASE_REPLICA_URLS:
+            replica_engine = create_engine(replica_url, pool_pre_ping=True)
+            replica_sessions.append(sessionmaker(autocommit=False, autoflush=False, bind=replica_engine))
+        _replica_cycle = itertools.cycle(range(len(replica_sessions)))
+    return engine
+
+def dispose_engine():
+    """Close all pooled connections (called on application shutdown)."""
+    global engine
+    if engine is not None:
+        engine.dispose()
+        engine = None
+    for factory in replica_sessions:
+        factory.kw["bind"].dispose()
+    replica_sessions.clear()
+    _replica_lag.clear()
+
+def _measure_replica_lag(index: int) -> float:
+    """
+    Replication lag of one replica in seconds. A replica that has replayed all the
+    WAL it received is caught up, however long ago the primary's last write was
+    (the replay timestamp alone would make every replica of an idle primary look late).
+    """
+    replica_engine = replica_sessions[index].kw["bind"]
+    try:
+        with replica_engine.connect() as connection:
+            if replica_engine.dialect.name == "postgresql":
+                return float(connection.execute(text(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+                    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                )).scalar() or 0.0)
+            # Stand-ins without replication report no lag
+            connection.execute(text("SELECT 1"))
+            return 0.0
+    except Exception:
+        return float("inf")  # Unreachable replicas are skipped until the next check
+
+def measure_replicas():
+    """Re-measure every replica's lag (blocking; run off the request path)."""
+    for index in range(len(replica_sessions)):
+        _replica_lag[index] = (time.monotonic(), _measure_replica_lag(index))
+
+async def monitor_replicas(stop: asyncio.Event):
+    """Re-measure replica lag every REPLICA_LAG_CHECK_SECONDS in a worker thread, until `stop` is set."""
+    while not stop.is_set():
+        await asyncio.to_thread(measure_replicas)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=REPLICA_LAG_CHECK_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+def _replica_usable(index: int) -> bool:
+    """True if the replica's last measured lag is recent and within REPLICA_MAX_LAG_SECONDS."""
+    checked_at, lag = _replica_lag.get(index, (None, None))
+    if checked_at is None or time.monotonic() - checked_at > 3 * REPLICA_LAG_CHECK_SECONDS:
+        return False  # Not measured yet, or the monitor stopped: stay on the primary
+    return lag <= REPLICA_MAX_LAG_SECONDS
+
+def _read_session_factory(request: Request):
+    """Pick the session factory for a read-only request."""
+    if not replica_sessions:
+        return SessionLocal
+    if request.headers.get(CONSISTENCY_HEADER, "").lower() == "primary":
+        return SessionLocal
+    last_write = request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        if last_write and time.time() - float(last_write) < REPLICA_STICKY_SECONDS:
+            return SessionLocal
+    except ValueError:
+        pass
+    for _ in range(len(replica_sessions)):
+        index = next(_replica_cycle)
+        if _replica_usable(index):
+            return replica_sessions[index]
+    return SessionLocal
+
+def dialect_insert(db):
+    """
+    The `insert` construct of the session's database when it supports ON CONFLICT
+    (Postgres, SQLite), otherwise None.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+def get_read_db(request: Request):
+    """
+    Session for read-only endpoints: a healthy replica when one is configured,
+    otherwise (or right after this client wrote) the primary.
+    """
+    db = _read_session_factory(request)()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,87 @@
+from datetime import date, datetime, timedelta
+import os
+
+from sqlalchemy import select, insert, delete, literal, or_, and_
+from sqlalchemy.orm import Session
+
+from . import models, watermarks
+
+# How far ahead the precomputed expiry list reaches (covers the 30/60/90 day reports)
+EXPIRY_HORIZON_DAYS = int(os.getenv("EXPIRY_HORIZON_DAYS", "90"))
+
+WATERMARK_NAME = "expiry_due"
+
+
+def _asset_rows(condition, now: datetime):
+    """SELECT feeding expiry_due rows for assets matching the given condition."""
+    return select(
+        literal("Asset"),
+        models.Asset.id,
+        models.Asset.asset_name,
+        models.Asset.warranty_expiry_date,
+        literal(now),
+    ).where(condition, models.Asset.status != "Retired")
+
+
+def _vendor_rows(condition, now: datetime):
+    """SELECT feeding expiry_due rows for vendors matching the given condition."""
+    return select(
+        literal("Vendor"),
+        models.Vendor.id,
+        models.Vendor.vendor_name,
+        models.Vendor.contract_expiry_date,
+        literal(now),
+    ).where(condition)
+
+
+def refresh_expiry_due(db: Session, today: date = None) -> dict:
+    """
+    Bring the precomputed expiry list up to date.
+
+    Only indexed date ranges are read: rows that fell out of the window are pruned,
+    warranties that entered the window since the last run are added, and assets
+    modified since the last run are re-evaluated. Vendors carry no update timestamp,
+    so their (small) window is simply re-read.
+    """
+    now = datetime.utcnow()
+    # One clock (UTC) for the run timestamps and the window, so they never disagree around midnight
+    today = today or now.date()
+    horizon_end = today + timedelta(days=EXPIRY_HORIZON_DAYS)
+    columns = ["entity_type", "entity_id", "label", "expiry_date", "computed_at"]
+    warranty = models.Asset.warranty_expiry_date
+
+    mark = watermarks.claim(db, WATERMARK_NAME)
+
+    db.execute(delete(models.ExpiryDue).where(models.ExpiryDue.expiry_date < today))
+
+    if mark.last_run_at is None or mark.last_date is None:
+        # First run: build the whole window from the warranty index
+        db.execute(delete(models.ExpiryDue).where(models.ExpiryDue.entity_type == "Asset"))
+        asset_condition = warranty.between(today, horizon_end)
+    else:
+        changed_ids = select(models.Asset.id).where(models.Asset.last_updated_at > mark.last_run_at)
+        db.execute(
+            delete(models.ExpiryDue).where(
+                models.ExpiryDue.entity_type == "Asset",
+                models.ExpiryDue.entity_id.in_(changed_ids),
+            )
+        )
+        asset_condition = or_(
+            and_(warranty > max(mark.last_date, today - timedelta(days=1)), warranty <= horizon_end),
+            and_(models.Asset.id.in_(changed_ids), warranty.between(today, horizon_end)),
+        )
+    assets_added = db.execute(
+        insert(models.ExpiryDue).from_select(columns, _asset_rows(asset_condition, now))
+    ).rowcount
+
+    db.execute(delete(models.ExpiryDue).where(models.ExpiryDue.entity_type == "Vendor"))
+    vendors_added = db.execute(
+        insert(models.ExpiryDue).from_select(
+            columns, _vendor_rows(models.Vendor.contract_expiry_date.between(today, horizon_end), now)
+        )
+    ).rowcount
+
+    mark.last_run_at = now
+    mark.last_date = horizon_end
+    db.commit()
+    return {"assets_added": assets_added, "vendors_in_window": vendors_added, "horizon_end": horizon_end}
@@ -0,0 +1,81 @@
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
+
+from fastapi import HTTPException
+
+from . import models
+
+# Columns `sort=` may name on the asset list; each is backed by an index
+SORTABLE_ASSET_COLUMNS = {
+    "id": models.Asset.id,
+    "asset_tag": models.Asset.asset_tag,
+    "purchase_date": models.Asset.purchase_date,
+    "purchase_cost": models.Asset.purchase_cost,
+    "warranty_expiry_date": models.Asset.warranty_expiry_date,
+    "last_updated_at": models.Asset.last_updated_at,
+}
+
+
+def filter_assets(
+    query,
+    status: Optional[List[str]] = None,
+    category_id: Optional[List[int]] = None,
+    vendor_id: Optional[List[int]] = None,
+    location_id: Optional[List[int]] = None,
+    employee_id: Optional[int] = None,
+    condition_grade: Optional[List[str]] = None,
+    purchased_from: Optional[date] = None,
+    purchased_to: Optional[date] = None,
+    warranty_from: Optional[date] = None,
+    warranty_to: Optional[date] = None,
+    cost_min: Optional[Decimal] = None,
+    cost_max: Optional[Decimal] = None,
+):
+    """
+    Add the asset list filters to a query. List values match any of the given
+    values; date and cost ranges are inclusive. Unset filters are skipped.
+    """
+    asset = models.Asset
+    for column, values in (
+        (asset.status, status),
+        (asset.category_id, category_id),
+        (asset.vendor_id, vendor_id),
+        (asset.current_location_id, location_id),
+        (asset.condition_grade, condition_grade),
+    ):
+        if values:
+            query = query.filter(column == values[0] if len(values) == 1 else column.in_(values))
+    if employee_id is not None:
+        query = query.filter(asset.current_employee_id == employee_id)
+    for column, lower, upper in (
+        (asset.purchase_date, purchased_from, purchased_to),
+        (asset.warranty_expiry_date, warranty_from, warranty_to),
+        (asset.purchase_cost, cost_min, cost_max),
+    ):
+        if lower is not None:
+            query = query.filter(column >= lower)
+        if upper is not None:
+            query = query.filter(column <= upper)
+    return query
+
+
+def sort_assets(query, sort: Optional[str]):
+    """
+    Order a query by a `sort=` value such as `-purchase_cost,asset_tag`
+    (a leading `-` sorts descending). `id` is always the final tie-breaker so
+    offset pages do not overlap.
+    """
+    order_by = []
+    names = [name.strip() for name in (sort or "").split(",") if name.strip()]
+    for name in names:
+        column = SORTABLE_ASSET_COLUMNS.get(name.lstrip("-"))
+        if column is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot sort by '{name.lstrip('-')}'. Allowed: {', '.join(sorted(SORTABLE_ASSET_COLUMNS))}.",
+            )
+        order_by.append(column.desc() if name.startswith("-") else column.asc())
+    if not any(name.lstrip("-") == "id" for name in names):
+        order_by.append(models.Asset.id.asc())
+    return query.order_by(*order_by)
@@ -0,0 +1,184 @@
+"""
+Fleet refresh forecast: how many assets (and how much purchase value) reach end
+of life in each quarter, per category and holder's department.
+
+    python -m app.forecast [--tenant 1]
+
+End of life is the purchase date plus the category's depreciation years
+(DEFAULT_DEPRECIATION_YEARS without a category); assets without a purchase date
+and retired assets are left out. The counts live in the small `refresh_forecast`
+table. Writes that move assets between buckets (create, assign, return, retire,
+recategorize or re-date an asset, change a category's depreciation years or an
+employee's department, offboarding) adjust it in their own transaction: the
+affected assets' buckets are read with one grouped query before and after the
+change and the difference is applied. `python -m app.migrate` builds it for
+tenants that have none yet; the command above rebuilds it from scratch.
+"""
+import argparse
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from sqlalchemy import Integer, cast, delete, extract, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from . import models, database, tenancy
+from .holdings import apply_counter_deltas, merge_deltas, negate
+
+# Lifespan of assets whose category sets none (matches the category default)
+DEFAULT_DEPRECIATION_YEARS = 3
+# Longest forecast the report accepts
+MAX_FORECAST_YEARS = 10
+
+# Grouping dimensions accepted by the report: name -> forecast column
+DIMENSIONS = {
+    "category": models.RefreshForecast.category_id,
+    "department": models.RefreshForecast.department_id,
+}
+
+
+def _bucket_query(*conditions):
+    """
+    Grouped (category, department, end-of-life year, quarter, count, cost) of the
+    forecastable assets matching the conditions.
+    """
+    asset = models.Asset
+    category = func.coalesce(asset.category_id, 0)
+    department = func.coalesce(models.Employee.department_id, 0)
+    year = cast(extract("year", asset.purchase_date), Integer) + func.coalesce(
+        models.AssetCategory.depreciation_years, DEFAULT_DEPRECIATION_YEARS
+    )
+    quarter = (cast(extract("month", asset.purchase_date), Integer) - 1) // 3 + 1
+    return (
+        select(
+            category,
+            department,
+            year,
+            quarter,
+            func.count(asset.id),
+            func.coalesce(func.sum(asset.purchase_cost), 0),
+        )
+        .select_from(asset)
+        .outerjoin(models.AssetCategory, models.AssetCategory.id == asset.category_id)
+        .outerjoin(models.Employee, models.Employee.id == asset.current_employee_id)
+        .where(asset.purchase_date.isnot(None), asset.status != "Retired", *conditions)
+        .group_by(category, department, year, quarter)
+    )
+
+
+def forecast_buckets(db: Session, *conditions) -> dict:
+    """(category, department, year, quarter) -> (count, cost) of the assets matching the conditions."""
+    return {
+        (category, department, year, quarter): (count, float(cost))
+        for category, department, year, quarter, count, cost in db.execute(_bucket_query(*conditions))
+    }
+
+
+def apply_forecast_deltas(db: Session, deltas: dict):
+    """
+    Add (count, cost) deltas to the forecast buckets, creating missing rows for increments only.
+    Runs inside the caller's transaction so the forecast commits together with the change it describes.
+    """
+    apply_counter_deltas(
+        db, models.RefreshForecast, ("category_id", "department_id", "eol_year", "eol_quarter"), deltas
+    )
+
+
+@contextmanager
+def tracking(db: Session, *conditions):
+    """
+    Keep the forecast in step with changes made inside the block to the assets
+    matching the conditions (which the block must not change, e.g. the asset id).
+    """
+    before = forecast_buckets(db, *conditions)
+    yield
+    db.flush()
+    apply_forecast_deltas(db, merge_deltas(negate(before), forecast_buckets(db, *conditions)))
+
+
+def rebuild_forecast(db: Session) -> int:
+    """
+    Recompute every forecast bucket from the assets table with one grouped INSERT ... SELECT.
+    Use this to repair drift (e.g., after direct database edits).
+    """
+    query = _bucket_query().add_columns(literal(datetime.utcnow()))
+    db.execute(delete(models.RefreshForecast))
+    inserted = db.execute(
+        insert(models.RefreshForecast).from_select(
+            ["category_id", "department_id", "eol_year", "eol_quarter", "asset_count", "total_cost", "updated_at"],
+            query,
+        )
+    ).rowcount
+    db.commit()
+    return inserted
+
+
+def _quarter_index(year: int, quarter: int) -> int:
+    return year * 4 + quarter - 1
+
+
+def refresh_forecast(
+    db: Session,
+    years: int,
+    group_by: list,
+    category_id: int = None,
+    department_id: int = None,
+    today: date = None,
+) -> list:
+    """
+    Assets reaching end of life in each quarter from the current one, for `years`
+    years, grouped by the given dimensions. Assets already past end of life
+    before the current quarter are summed into leading `overdue` rows.
+    """
+    today = today or date.today()
+    forecast = models.RefreshForecast
+    first = _quarter_index(today.year, (today.month - 1) // 3 + 1)
+    last = first + years * 4 - 1
+    columns = [DIMENSIONS[name] for name in group_by]
+    query = (
+        db.query(
+            forecast.eol_year,
+            forecast.eol_quarter,
+            *columns,
+            func.sum(forecast.asset_count),
+            func.sum(forecast.total_cost),
+        )
+        .filter(forecast.eol_year * 4 + forecast.eol_quarter - 1 <= last, forecast.asset_count != 0)
+    )
+    if category_id is not None:
+        query = query.filter(forecast.category_id == category_id)
+    if department_id is not None:
+        query = query.filter(forecast.department_id == department_id)
+    keys = [forecast.eol_year, forecast.eol_quarter, *columns]
+
+    overdue = {}
+    schedule = []
+    for year, quarter, *values in query.group_by(*keys).order_by(*keys).all():
+        dimensions = dict(zip((column.key for column in columns), values[:-2]))
+        count, cost = int(values[-2]), float(values[-1])
+        if _quarter_index(year, quarter) >= first:
+            schedule.append({"year": year, "quarter": quarter, "overdue": False, **dimensions, "asset_count": count, "total_cost": cost})
+            continue
+        key = tuple(dimensions.values())
+        row = overdue.setdefault(key, {"year": None, "quarter": None, "overdue": True, **dimensions, "asset_count": 0, "total_cost": 0.0})
+        row["asset_count"] += count
+        row["total_cost"] += cost
+    return [overdue[key] for key in sorted(overdue)] + schedule
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the fleet refresh forecast from the assets table")
+    parser.add_argument("--tenant", type=int, help="Only rebuild this tenant's forecast (default: every tenant)")
+    args = parser.parse_args()
+
+    database.init_engine()
+    db = database.SessionLocal()
+    try:
+        for tenant_id in [args.tenant] if args.tenant is not None else tenancy.tenant_ids(db):
+            with tenancy.tenant_context(tenant_id):
+                print(f"Tenant {tenant_id}: rebuilt {rebuild_forecast(db)} forecast buckets.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import argparse
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import select, insert, delete, literal, func
+from sqlalchemy.orm import Session
+
+from . import models, database, tenancy
+
+SCOPES = ("employee", "department", "location")
+
+
+def holding_buckets(db: Session, *conditions) -> dict:
+    """
+    (scope, scope_id) -> (count, cost) of the held assets matching the conditions, from one grouped query.
+    The department comes from the holder, the location from the asset itself.
+    """
+    asset = models.Asset
+    rows = db.execute(
+        select(
+            asset.current_employee_id,
+            models.Employee.department_id,
+            asset.current_location_id,
+            func.count(asset.id),
+            func.coalesce(func.sum(asset.purchase_cost), 0),
+        )
+        .outerjoin(models.Employee, models.Employee.id == asset.current_employee_id)
+        .where(asset.current_employee_id.isnot(None), asset.status != "Retired", *conditions)
+        .group_by(asset.current_employee_id, models.Employee.department_id, asset.current_location_id)
+    )
+    deltas = []
+    for employee_id, department_id, location_id, count, cost in rows:
+        for key in (("employee", employee_id), ("department", department_id), ("location", location_id)):
+            if key[1] is not None:
+                deltas.append({key: (count, float(cost))})
+    return merge_deltas(*deltas)
+
+
+def apply_counter_deltas(db: Session, model, key_names: tuple, deltas: dict):
+    """
+    Add (count, cost) deltas to a table of asset_count/total_cost counters keyed by `key_names`.
+    Runs inside the caller's transaction so counters commit together with the change they describe.
+
+    Increments go through INSERT ... ON CONFLICT DO UPDATE, so concurrent first writes
+    to the same key add up instead of colliding on the primary key. Decrements only
+    update existing rows: a missing row means the table was not built yet (see
+    `python -m app.migrate`), and inventing a negative counter would only hide that.
+    """
+    dialect_insert = database.dialect_insert(db)
+    now = datetime.utcnow()
+    for key, (count, cost) in deltas.items():
+        if not count and not cost:
+            continue
+        keys = dict(zip(key_names, key))
+        decrement = count < 0 or (not count and cost < 0)
+        if decrement or dialect_insert is None:
+            updated = (
+                db.query(model)
+                .filter_by(**keys)
+                .update(
+                    {model.asset_count: model.asset_count + count, model.total_cost: model.total_cost + cost, model.updated_at: now},
+                    synchronize_session=False,
+                )
+            )
+            if not updated and not decrement:
+                db.add(model(**keys, asset_count=count, total_cost=cost, updated_at=now))
+            continue
+        statement = dialect_insert(model).values(**keys, asset_count=count, total_cost=cost, updated_at=now)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[column.name for column in model.__table__.primary_key.columns],
+            set_={"asset_count": model.asset_count + count, "total_cost": model.total_cost + cost, "updated_at": now},
+        ))
+
+
+def apply_holding_deltas(db: Session, deltas: dict):
+    """Add (count, cost) deltas to the holdings counters, creating missing rows."""
+    apply_counter_deltas(db, models.AssetHolding, ("scope", "scope_id"), deltas)
+
+
+def merge_deltas(*delta_sets: dict) -> dict:
+    """Combine several delta dictionaries into one, summing per key."""
+    merged = defaultdict(lambda: (0, 0.0))
+    for deltas in delta_sets:
+        for key, (count, cost) in deltas.items():
+            total_count, total_cost = merged[key]
+            merged[key] = (total_count + count, total_cost + cost)
+    return dict(merged)
+
+
+def negate(deltas: dict) -> dict:
+    return {key: (-count, -cost) for key, (count, cost) in deltas.items()}
+
+
+@contextmanager
+def tracking(db: Session, *conditions):
+    """
+    Keep the holdings counters in step with changes made inside the block to the
+    assets matching the conditions (which the block must not change, e.g. the asset
+    id): their counters are read before and after the block and the difference applied.
+    """
+    before = holding_buckets(db, *conditions)
+    yield
+    db.flush()
+    apply_holding_deltas(db, merge_deltas(negate(before), holding_buckets(db, *conditions)))
+
+
+def rebuild_holdings(db: Session) -> int:
+    """
+    Recompute every holdings counter from the assets table with three grouped INSERT ... SELECTs.
+    Use this to repair drift (e.g., after direct database edits).
+    """
+    asset = models.Asset
+    held = (asset.current_employee_id.isnot(None), asset.status != "Retired")
+    now = datetime.utcnow()
+    columns = ["scope", "scope_id", "asset_count", "total_cost", "updated_at"]
+
+    def aggregate(scope, key, *joins):
+        query = select(literal(scope), key, func.count(asset.id), func.coalesce(func.sum(asset.purchase_cost), 0), literal(now))
+        for target, on in joins:
+            query = query.join(target, on)
+        return query.where(*held, key.isnot(None)).group_by(key)
+
+    db.execute(delete(models.AssetHolding))
+    inserted = 0
+    for query in (
+        aggregate("employee", asset.current_employee_id),
+        aggregate("department", models.Employee.department_id, (models.Employee, models.Employee.id == asset.current_employee_id)),
+        aggregate("location", asset.current_location_id),
+    ):
+        inserted += db.execute(insert(models.AssetHolding).from_select(columns, query)).rowcount
+    db.commit()
+    return inserted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the holdings counters from the assets table")
+    parser.add_argument("--tenant", type=int, help="Only rebuild this tenant's counters (default: every tenant)")
+    args = parser.parse_args()
+
+    database.init_engine()
+    db = database.SessionLocal()
+    try:
+        for tenant_id in [args.tenant] if args.tenant is not None else tenancy.tenant_ids(db):
+            with tenancy.tenant_context(tenant_id):
+                print(f"Tenant {tenant_id}: rebuilt {rebuild_holdings(db)} holdings counters.")
+    finally:
+        db.close()
@@ -0,0 +1,207 @@
+"""
+HR roster synchronisation.
+
+    python -m app.hr_sync roster.csv [--dry-run] [--keep-assets] [--tenant 1]
+
+The roster is a full export of current staff (CSV, JSON Lines or a JSON array)
+keyed by `employee_code` and belongs to one tenant. It is diffed against the `employees` table in one pass;
+new and changed people are written in batches, and anyone missing from the roster
+is offboarded. Only the fields a record carries are compared and written, so a
+roster without, say, a `phone_number` column leaves phone numbers alone.
+"""
+import argparse
+import csv
+import json
+from contextlib import ExitStack
+from datetime import date, datetime
+from typing import Iterator
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from . import models, database, forecast, holdings, tenancy
+from .offboarding import offboard_employees
+
+# Columns owned by HR; anything else on the employee row is left untouched
+SYNC_FIELDS = (
+    "first_name", "last_name", "email", "phone_number", "job_title",
+    "department_id", "location_id", "employment_status", "hire_date",
+)
+INT_FIELDS = ("department_id", "location_id")
+DATE_FIELDS = ("hire_date",)
+
+BATCH_SIZE = 1000
+
+
+def read_roster(path: str) -> Iterator[dict]:
+    """Stream raw roster records from a CSV, JSON Lines or JSON array file."""
+    with open(path, newline="", encoding="utf-8") as handle:
+        if path.lower().endswith(".csv"):
+            yield from csv.DictReader(handle)
+            return
+        first = handle.read(1)
+        while first and first.isspace():
+            first = handle.read(1)
+        if first == "[":
+            # A JSON array has to be parsed whole; prefer JSON Lines for large rosters
+            yield from json.loads(first + handle.read())
+            return
+        if first:
+            yield json.loads(first + handle.readline())
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def normalize(record: dict) -> dict:
+    """
+    Clean one roster record into the column values stored on `employees`.
+    Only fields the record carries are returned (a CSV without a `phone_number`
+    column leaves stored phone numbers alone); a blank value clears the field.
+    """
+    row = {"employee_code": str(record["employee_code"]).strip()}
+    for field in SYNC_FIELDS:
+        if field not in record:
+            continue
+        value = record[field]
+        if isinstance(value, str):
+            value = value.strip() or None
+        if value is not None and field in INT_FIELDS:
+            value = int(value)
+        if value is not None and field in DATE_FIELDS and not isinstance(value, date):
+            value = date.fromisoformat(value)
+        row[field] = value
+    if "employment_status" in row:
+        row["employment_status"] = row["employment_status"] or "Active"
+    return row
+
+
+def diff_roster(db: Session, records) -> dict:
+    """
+    Compare roster records with the employees table in a single pass.
+    Returns the rows to insert and update, the IDs of employees to deactivate,
+    and the IDs of updated employees whose department changes.
+    """
+    columns = [models.Employee.id, models.Employee.employee_code]
+    columns += [getattr(models.Employee, field) for field in SYNC_FIELDS]
+    existing = {row.employee_code: row for row in db.query(*columns)}
+
+    inserts, updates, moved, seen = [], [], [], set()
+    for record in records:
+        row = normalize(record)
+        code = row["employee_code"]
+        if code in seen:
+            continue
+        seen.add(code)
+        current = existing.get(code)
+        fields = [field for field in SYNC_FIELDS if field in row]
+        if current is None:
+            inserts.append({"employment_status": "Active", **row})
+        elif any(getattr(current, field) != row[field] for field in fields):
+            updates.append({"id": current.id, **row})
+            if "department_id" in row and current.department_id != row["department_id"]:
+                moved.append(current.id)
+
+    deactivate = [
+        row.id for code, row in existing.items()
+        if code not in seen and row.employment_status != "Inactive"
+    ]
+    return {
+        "inserts": inserts,
+        "updates": updates,
+        "deactivate": deactivate,
+        "moved": moved,
+        "unchanged": len(seen) - len(inserts) - len(updates),
+    }
+
+
+def _upsert(db: Session, rows: list):
+    """
+    Write new rows with INSERT ... ON CONFLICT (tenant, employee_code) DO UPDATE and
+    changed ones with a bulk UPDATE by primary key. Rows are batched by the fields
+    they carry, and only those fields are written.
+    """
+    dialect_insert = database.dialect_insert(db)
+    shapes = {}
+    for row in rows:
+        shapes.setdefault(frozenset(row) - {"id"}, []).append(row)
+
+    for shape, shaped in shapes.items():
+        fields = [field for field in SYNC_FIELDS if field in shape]
+        for start in range(0, len(shaped), BATCH_SIZE):
+            batch = shaped[start:start + BATCH_SIZE]
+            changed = [row for row in batch if "id" in row]
+            if changed:
+                db.execute(update(models.Employee), changed)
+            new = [row for row in batch if "id" not in row]
+            if not new:
+                continue
+            if dialect_insert is None:
+                db.execute(insert(models.Employee), new)
+                continue
+            # A code inserted concurrently since the diff is updated instead
+            statement = dialect_insert(models.Employee)
+            statement = statement.on_conflict_do_update(
+                index_elements=[models.Employee.tenant_id, models.Employee.employee_code],
+                set_={**{field: statement.excluded[field] for field in fields}, "updated_at": datetime.utcnow()},
+            )
+            db.execute(statement, new)
+
+
+def sync_roster(db: Session, records, dry_run: bool = False, reclaim_assets: bool = True) -> dict:
+    """
+    Apply a full HR roster: insert new employees, update changed ones, and
+    offboard (or just deactivate) employees who are no longer listed.
+    """
+    diff = diff_roster(db, records)
+    summary = {
+        "inserted": len(diff["inserts"]),
+        "updated": len(diff["updates"]),
+        "deactivated": len(diff["deactivate"]),
+        "unchanged": diff["unchanged"],
+    }
+    if dry_run:
+        return summary
+
+    with ExitStack() as tracked:
+        # Holders who change department take their assets' holdings counters and forecast buckets along
+        for start in range(0, len(diff["moved"]), BATCH_SIZE):
+            held = models.Asset.current_employee_id.in_(diff["moved"][start:start + BATCH_SIZE])
+            tracked.enter_context(holdings.tracking(db, held))
+            tracked.enter_context(forecast.tracking(db, held))
+        _upsert(db, diff["inserts"] + diff["updates"])
+    db.commit()
+    if diff["deactivate"]:
+        if reclaim_assets:
+            summary["assets_reclaimed"] = offboard_employees(db, diff["deactivate"])["assets_reclaimed"]
+        else:
+            for start in range(0, len(diff["deactivate"]), BATCH_SIZE):
+                db.execute(
+                    update(models.Employee)
+                    .where(models.Employee.id.in_(diff["deactivate"][start:start + BATCH_SIZE]))
+                    .values(employment_status="Inactive")
+                )
+            db.commit()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synchronise employees with an HR roster file")
+    parser.add_argument("path", help="Roster file (.csv, .jsonl or .json)")
+    parser.add_argument("--dry-run", action="store_true", help="Report the diff without writing")
+    parser.add_argument("--keep-assets", action="store_true", help="Deactivate leavers without reclaiming their assets")
+    parser.add_argument("--tenant", type=int, default=tenancy.DEFAULT_TENANT_ID, help="Tenant the roster belongs to")
+    args = parser.parse_args()
+
+    database.init_engine()
+    db = database.SessionLocal()
+    try:
+        with tenancy.tenant_context(args.tenant):
+            summary = sync_roster(db, read_roster(args.path), dry_run=args.dry_run, reclaim_assets=not args.keep_assets)
+        print(", ".join(f"{key}: {value}" for key, value in summary.items()))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
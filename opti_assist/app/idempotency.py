@@ -0,0 +1,200 @@
+"""
+Idempotency keys for POST requests.
+
+A client that sends `Idempotency-Key: <unique value>` with a POST can safely
+retry it: the first response (2xx or 4xx) is stored, body zlib-compressed and
+headers included, and replayed for every retry with the same key until it
+expires. The handler and its database work run only once. Keys are scoped to
+the request's tenant and bound to the method, path, query string and body.
+
+A key is held while its first request runs. It is released when that request
+fails, and a hold left behind by a process that died lapses after
+IDEMPOTENCY_LOCK_SECONDS, so retries are never locked out for the whole TTL.
+"""
+import hashlib
+import json
+import logging
+import os
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from . import models, database
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+# Set on responses that were replayed from the store
+REPLAYED_HEADER = "Idempotent-Replayed"
+# How long a stored response is replayed for
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# How long a key stays held by a request that has not finished (e.g. its process died)
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "300"))
+MAX_KEY_LENGTH = 255
+# Response headers not stored for replay (recomputed, or describing the original response only)
+UNSTORED_HEADERS = ("content-length", "date", "server")
+
+
+def _request_hash(method: str, path: str, query: bytes, body: bytes) -> str:
+    return hashlib.sha256(method.encode() + b" " + path.encode() + b"?" + query + b"\n" + body).hexdigest()
+
+
+def claim_key(db: Session, key: str, request_hash: str, now: datetime = None):
+    """
+    Reserve a key for a new request. Returns None when the caller should run the
+    request, otherwise the stored record (finished, or still in progress).
+    """
+    now = now or datetime.utcnow()
+    for _ in range(2):
+        record = db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).first()
+        if record is not None and record.expires_at > now:
+            return record
+        if record is not None:
+            db.delete(record)
+            db.flush()
+        db.add(models.IdempotencyKey(
+            key=key,
+            request_hash=request_hash,
+            created_at=now,
+            expires_at=now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+        ))
+        try:
+            db.commit()
+            return None
+        except IntegrityError:  # Another request claimed the key first
+            db.rollback()
+    return db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).first()
+
+
+def store_response(db: Session, key: str, status_code: int, headers: list, body: bytes):
+    """Save the response of a claimed key, or release the key when the request failed on our side."""
+    record = db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key == key).first()
+    if record is None:
+        return
+    if status_code >= 500:
+        db.delete(record)  # Server errors are not final; let the client retry for real
+    else:
+        record.status_code = status_code
+        record.headers = headers
+        record.body = zlib.compress(body)
+        record.expires_at = datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+    db.commit()
+
+
+def release_key(db: Session, key: str):
+    """Give up a claimed key whose request failed, so a retry runs it again."""
+    store_response(db, key, 500, [], b"")
+
+
+def purge_expired_keys(db: Session, now: datetime = None) -> int:
+    """Delete stored responses past their TTL, for every tenant (scheduled task). Returns the number removed."""
+    removed = (
+        db.query(models.IdempotencyKey)
+        .filter(models.IdempotencyKey.expires_at <= (now or datetime.utcnow()))
+        .execution_options(all_tenants=True)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return removed
+
+
+def _with_session(function, *args):
+    db = database.SessionLocal()
+    try:
+        return function(db, *args)
+    finally:
+        db.close()
+
+
+class IdempotencyMiddleware:
+    """
+    Replay stored responses for POST requests carrying an `Idempotency-Key`.
+    Must sit inside the compression middleware so stored bodies are uncompressed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        key = Headers(scope=scope).get(IDEMPOTENCY_HEADER)
+        if not key:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, {"detail": f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters."})
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        request_hash = _request_hash(scope["method"], scope["path"], scope.get("query_string", b""), body)
+
+        record = await run_in_threadpool(_with_session, claim_key, key, request_hash)
+        if record is not None:
+            if record.request_hash != request_hash:
+                await _send_json(send, 422, {"detail": "Idempotency-Key was already used for a different request."})
+            elif record.status_code is None:
+                await _send_json(send, 409, {"detail": "A request with this Idempotency-Key is still in progress."})
+            else:
+                await _send_stored(send, record)
+            return
+
+        async def replay_body():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        response = {"status": 500, "headers": [], "body": b""}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in message.get("headers", [])
+                    if name.decode("latin-1").lower() not in UNSTORED_HEADERS
+                ]
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, capture)
+        except BaseException:
+            await _run_quietly(key, release_key, key)
+            raise
+        await _run_quietly(key, store_response, key, response["status"], response["headers"], response["body"])
+
+
+async def _run_quietly(key: str, function, *args):
+    """Record the outcome of a key; a failure here must not replace the response already sent."""
+    try:
+        await run_in_threadpool(_with_session, function, *args)
+    except Exception:
+        logger.exception("Could not record the outcome of Idempotency-Key %r", key)
+
+
+async def _send_stored(send, record):
+    body = zlib.decompress(record.body) if record.body else b""
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in record.headers or []]
+    headers += [(b"content-length", str(len(body)).encode()), (REPLAYED_HEADER.lower().encode(), b"true")]
+    await send({"type": "http.response.start", "status": record.status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_json(send, status: int, content: dict):
+    body = json.dumps(content).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
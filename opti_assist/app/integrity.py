@@ -0,0 +1,235 @@
+"""
+Referential integrity checks for the soft links between tables (the schema has no
+foreign keys).
+
+    python -m app.integrity [--full] [--tenant 1]
+
+The scanner finds orphans with one set-based anti-join per link and records them
+in `integrity_orphans`. Incremental runs (the default, also scheduled) only read
+rows added or changed since the previous run of each link; deleting a referenced
+row resets the watermarks of the links into its table, so they are rescanned.
+Links from a table that has no change timestamp and is not append-only are
+always scanned in full.
+"""
+import argparse
+from contextlib import ExitStack
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import delete, exists, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session, aliased
+
+from . import models, database, forecast, holdings, tenancy, watermarks
+
+# Soft links: name -> (referencing column, referenced model)
+LINKS = {
+    "departments.manager_employee_id": (models.Department.manager_employee_id, models.Employee),
+    "employees.department_id": (models.Employee.department_id, models.Department),
+    "employees.location_id": (models.Employee.location_id, models.Location),
+    "asset_categories.parent_category_id": (models.AssetCategory.parent_category_id, models.AssetCategory),
+    "assets.category_id": (models.Asset.category_id, models.AssetCategory),
+    "assets.vendor_id": (models.Asset.vendor_id, models.Vendor),
+    "assets.current_employee_id": (models.Asset.current_employee_id, models.Employee),
+    "assets.current_location_id": (models.Asset.current_location_id, models.Location),
+    "asset_assignment_history.asset_id": (models.AssetAssignmentHistory.asset_id, models.Asset),
+    "asset_assignment_history.employee_id": (models.AssetAssignmentHistory.employee_id, models.Employee),
+    "maintenance_logs.asset_id": (models.MaintenanceLog.asset_id, models.Asset),
+    "maintenance_logs.vendor_id": (models.MaintenanceLog.vendor_id, models.Vendor),
+}
+
+# Tables whose rows carry a change timestamp, so incremental runs also re-check updated rows
+CHANGED_AT = {
+    "departments": models.Department.updated_at,
+    "employees": models.Employee.updated_at,
+    "asset_categories": models.AssetCategory.updated_at,
+    "assets": models.Asset.last_updated_at,
+    "maintenance_logs": models.MaintenanceLog.updated_at,
+}
+# Tables whose link columns are never changed after insert, so new ids are all there is to check
+APPEND_ONLY = ("asset_assignment_history",)
+
+# Holdings counters keyed by a referenced table; cleared when its references are cascaded
+_HOLDING_SCOPES = {
+    "departments": "department",
+    "locations": "location",
+}
+
+# Assets per counter tracking query when a cascade clears their references
+TRACKING_BATCH_SIZE = 500
+
+ON_REFERENCES = ("ignore", "refuse", "cascade")
+ON_REFERENCES_PATTERN = "^(" + "|".join(ON_REFERENCES) + ")$"
+
+
+def _watermark_name(link: str) -> str:
+    return f"integrity:{link}"
+
+
+def _links_into(target) -> dict:
+    return {name: (column, model) for name, (column, model) in LINKS.items() if model is target}
+
+
+def scan_link(db: Session, link: str, full: bool = False, now: datetime = None) -> int:
+    """Re-check one soft link and refresh its recorded orphans; returns the number of orphans now on record."""
+    column, target_model = LINKS[link]
+    source = column.class_
+    target = aliased(target_model)
+    orphan = models.IntegrityOrphan
+    now = now or datetime.utcnow()
+
+    mark = watermarks.claim(db, _watermark_name(link))
+    changed_at = CHANGED_AT.get(source.__tablename__)
+    trackable = changed_at is not None or source.__tablename__ in APPEND_ONLY
+    incremental = not full and trackable and mark.last_id is not None
+
+    if incremental:
+        # Previously found orphans: drop the ones that have been fixed since
+        db.execute(
+            delete(orphan).where(
+                orphan.link == link,
+                ~exists().where(
+                    source.id == orphan.row_id,
+                    column == orphan.missing_id,
+                    ~exists().where(target.id == column),
+                ),
+            ).execution_options(synchronize_session=False)
+        )
+        window = [source.id > mark.last_id]
+        if changed_at is not None and mark.last_run_at is not None:
+            window.append(changed_at >= mark.last_run_at)
+        in_window = or_(*window)
+        db.execute(
+            delete(orphan).where(orphan.link == link, orphan.row_id.in_(select(source.id).where(in_window)))
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        db.execute(delete(orphan).where(orphan.link == link).execution_options(synchronize_session=False))
+        in_window = literal(True)
+
+    max_id = db.query(func.max(source.id)).scalar()
+    db.execute(
+        insert(orphan).from_select(
+            ["link", "row_id", "missing_id", "detected_at"],
+            select(literal(link), source.id, column, literal(now)).where(
+                in_window, column.isnot(None), ~exists().where(target.id == column)
+            ),
+        )
+    )
+    mark.last_id = max_id or 0
+    mark.last_run_at = now
+    db.commit()
+    return db.query(func.count()).select_from(orphan).filter(orphan.link == link).scalar()
+
+
+def scan(db: Session, full: bool = False) -> dict:
+    """Scan every soft link; returns the number of orphans on record per link."""
+    now = datetime.utcnow()
+    return {link: scan_link(db, link, full=full, now=now) for link in LINKS}
+
+
+def integrity_report(db: Session, sample_size: int = 20) -> list:
+    """Recorded orphans per link, with a sample of offending rows and when the link was last scanned."""
+    orphan = models.IntegrityOrphan
+    counts = dict(db.query(orphan.link, func.count()).group_by(orphan.link).all())
+    scanned = dict(
+        db.query(models.Watermark.name, models.Watermark.last_run_at)
+        .filter(models.Watermark.name.like("integrity:%"))
+        .all()
+    )
+    report = []
+    for link in LINKS:
+        samples = []
+        if counts.get(link):
+            samples = [
+                {"row_id": row.row_id, "missing_id": row.missing_id}
+                for row in db.query(orphan).filter(orphan.link == link).order_by(orphan.row_id).limit(sample_size)
+            ]
+        report.append({
+            "link": link,
+            "orphans": counts.get(link, 0),
+            "last_scanned_at": scanned.get(_watermark_name(link)),
+            "samples": samples,
+        })
+    return report
+
+
+def _affected_assets(db: Session, links: dict, target_id: int) -> list:
+    """Ids of the assets whose holdings or forecast buckets change when the links are cleared."""
+    conditions = []
+    for column, _ in links.values():
+        if column.class_ is models.Asset:
+            conditions.append(column == target_id)
+        elif column.class_ is models.Employee:
+            conditions.append(models.Asset.current_employee_id.in_(select(models.Employee.id).where(column == target_id)))
+    if not conditions:
+        return []
+    return [asset_id for (asset_id,) in db.query(models.Asset.id).filter(or_(*conditions))]
+
+
+def guard_delete(db: Session, target, target_id: int, on_references: str = "ignore") -> bool:
+    """
+    Prepare deleting one row that other tables may point at.
+
+    - ignore: delete anyway; the links into the table are rescanned on the next integrity run
+    - refuse: raise 409 if anything still points at the row (one indexed EXISTS per link, in one query)
+    - cascade: clear the references (set them to NULL) in the same transaction, keeping
+      the holdings counters and the refresh forecast in step
+
+    Returns True if references were found.
+    """
+    links = _links_into(target)
+    referenced = db.query(or_(*(exists().where(column == target_id) for column, _ in links.values()))).scalar()
+
+    if referenced and on_references == "refuse":
+        users = [name for name, (column, _) in links.items() if db.query(exists().where(column == target_id)).scalar()]
+        raise HTTPException(status_code=409, detail=f"Still referenced by: {', '.join(users)}.")
+    if referenced and on_references == "cascade":
+        affected = _affected_assets(db, links, target_id)
+        with ExitStack() as tracked:
+            # Assets whose category, location or holder's department is cleared change counter buckets
+            for start in range(0, len(affected), TRACKING_BATCH_SIZE):
+                chunk = models.Asset.id.in_(affected[start:start + TRACKING_BATCH_SIZE])
+                tracked.enter_context(holdings.tracking(db, chunk))
+                tracked.enter_context(forecast.tracking(db, chunk))
+            for column, _ in links.values():
+                db.execute(
+                    update(column.class_).where(column == target_id).values({column.key: None})
+                    .execution_options(synchronize_session=False)
+                )
+        scope = _HOLDING_SCOPES.get(target.__tablename__)
+        if scope:
+            # Assets no longer count towards a department or location that is gone
+            db.execute(
+                delete(models.AssetHolding)
+                .where(models.AssetHolding.scope == scope, models.AssetHolding.scope_id == target_id)
+                .execution_options(synchronize_session=False)
+            )
+    if referenced and on_references == "ignore":
+        db.execute(
+            update(models.Watermark)
+            .where(models.Watermark.name.in_([_watermark_name(name) for name in links]))
+            .values(last_id=None, last_run_at=None)
+            .execution_options(synchronize_session=False)
+        )
+    return bool(referenced)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find soft links that point at missing rows")
+    parser.add_argument("--full", action="store_true", help="Rescan every row instead of only rows changed since the last run")
+    parser.add_argument("--tenant", type=int, help="Only scan this tenant (default: every tenant)")
+    args = parser.parse_args()
+
+    database.init_engine()
+    db = database.SessionLocal()
+    try:
+        for tenant_id in [args.tenant] if args.tenant is not None else tenancy.tenant_ids(db):
+            with tenancy.tenant_context(tenant_id):
+                for link, orphans in scan(db, full=args.full).items():
+                    print(f"tenant {tenant_id} {link:<40} {orphans} orphan(s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
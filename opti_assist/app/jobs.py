@@ -0,0 +1,374 @@
+"""
+Background job queue for long-running bulk operations.
+
+Jobs are rows in the `jobs` table. `POST /api/jobs` queues one; a worker
+(`python -m app.worker`, or the in-process worker started with the API) claims
+queued jobs in id order with a conditional UPDATE, runs the registered handler
+and records progress, result or error. The same table works as the queue on
+SQLite and Postgres. Workers serve every tenant; each job runs inside the
+tenant that queued it.
+"""
+import csv
+import gzip
+import itertools
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from . import models, schemas, database, forecast, holdings, lifecycle, live, tenancy
+from .archive import ARCHIVE_AFTER_YEARS, archive_closed_records
+from .expiry import refresh_expiry_due
+from .forecast import rebuild_forecast
+from .holdings import rebuild_holdings
+from .hr_sync import read_roster, sync_roster
+from .integrity import scan as scan_integrity
+from .offboarding import offboard_employees
+from .planner import plan_preventive_maintenance
+from .projection import msgpack, msgpack_default
+from .snapshots import take_snapshot
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "Queued", "Running", "Succeeded", "Failed"
+
+# Running jobs whose heartbeat is older than this are considered abandoned (worker died)
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "300"))
+# Abandoned jobs are retried until they have been started this many times
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Directory receiving files written by export jobs
+EXPORT_DIR = os.getenv("EXPORT_DIR", "exports")
+EXPORT_BATCH_SIZE = 1000
+# Directory import jobs read from; their `path` parameter is relative to it
+IMPORT_DIR = os.getenv("IMPORT_DIR", "imports")
+IMPORT_BATCH_SIZE = 1000
+# Rejected import records listed in the job result (the rest are only counted)
+MAX_REPORTED_IMPORT_ERRORS = 100
+# Progress is written at most this often, so chatty handlers do not flood the database
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _inside(directory: str, name: str) -> str:
+    """Resolve `name` relative to the directory, refusing paths that lead out of it."""
+    root = os.path.realpath(directory)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"'{name}' is outside {directory}.")
+    return path
+
+
+def import_path(name: str) -> str:
+    """Absolute path of an import file named by a job's `path` parameter; raises ValueError outside IMPORT_DIR."""
+    return _inside(IMPORT_DIR, name)
+
+
+def export_path(job: models.Job) -> Optional[str]:
+    """The file a finished export job wrote, if it is still there."""
+    if job.job_type != "export_assets" or job.status != SUCCEEDED or not (job.result or {}).get("path"):
+        return None
+    try:
+        path = _inside(EXPORT_DIR, os.path.basename(job.result["path"]))
+    except ValueError:
+        return None
+    return path if os.path.isfile(path) else None
+
+
+# --- Handlers: (db, params, progress) -> JSON-serializable result ---
+
+def _offboard(db: Session, params: dict, progress: Callable) -> dict:
+    ids = params.get("employee_ids") or []
+    progress(0, len(ids))
+    result = offboard_employees(db, ids)
+    progress(len(ids), len(ids))
+    return result
+
+
+def _hr_sync(db: Session, params: dict, progress: Callable) -> dict:
+    # Files are streamed, so their size is only known at the end
+    records = params["records"] if "records" in params else read_roster(import_path(params["path"]))
+    progress(0, len(records) if isinstance(records, list) else None)
+    summary = sync_roster(
+        db, records, dry_run=params.get("dry_run", False), reclaim_assets=params.get("reclaim_assets", True)
+    )
+    done = summary["inserted"] + summary["updated"] + summary["unchanged"]
+    progress(done, done)
+    return summary
+
+
+def _reject_record(summary: dict, number: int, error: Exception):
+    summary["rejected"] += 1
+    if len(summary["errors"]) < MAX_REPORTED_IMPORT_ERRORS:
+        summary["errors"].append({"record": number, "error": str(error)})
+
+
+def _insert_assets(db: Session, rows: list):
+    """Insert new assets 'In Stock', then assign those with a holder through the lifecycle."""
+    holders = {row["asset_tag"]: row.pop("current_employee_id") for row in rows}
+    inserted = db.execute(insert(models.Asset).returning(models.Asset), rows).scalars().all()
+    by_holder = {}
+    for asset in inserted:
+        live.record(db, asset, "create")
+        if holders[asset.asset_tag] is not None:
+            by_holder.setdefault(holders[asset.asset_tag], []).append(asset.id)
+    now = datetime.utcnow()
+    for employee_id, asset_ids in by_holder.items():
+        assigned = lifecycle.transition_all(
+            db, "assign", models.Asset.id.in_(asset_ids), current_employee_id=employee_id
+        )
+        db.execute(insert(models.AssetAssignmentHistory), [
+            {"asset_id": asset.id, "employee_id": employee_id, "assigned_date": now, "notes": "Imported"}
+            for asset in assigned
+        ])
+
+
+def _import_assets(db: Session, params: dict, progress: Callable) -> dict:
+    """
+    Register the assets listed in an IMPORT_DIR file (CSV, JSON Lines or a JSON array,
+    one asset per record with the POST /api/assets fields), in batches. Tags that
+    already exist are skipped; invalid records are counted and the first ones reported.
+    As with POST /api/assets, assets arrive 'In Stock' and those with a holder are then
+    assigned through the lifecycle, with an assignment history record each.
+    """
+    records = enumerate(read_roster(import_path(params["path"])), start=1)
+    summary = {"inserted": 0, "existing": 0, "rejected": 0, "errors": []}
+    done = 0
+    progress(done)
+    while True:
+        batch = list(itertools.islice(records, IMPORT_BATCH_SIZE))
+        if not batch:
+            progress(done, done)
+            return summary
+        assets = []
+        for number, record in batch:
+            # Blank CSV cells mean "not given", so defaults apply
+            record = {key: value for key, value in record.items() if value not in ("", None)}
+            try:
+                asset = schemas.AssetCreate(**record)
+                if asset.status != lifecycle.IN_STOCK:
+                    raise ValueError(f"New assets start '{lifecycle.IN_STOCK}', not '{asset.status}'.")
+            except ValueError as error:  # pydantic's ValidationError included
+                _reject_record(summary, number, error)
+                continue
+            assets.append((number, asset))
+        holders = {asset.current_employee_id for _, asset in assets} - {None}
+        active = {
+            employee_id for (employee_id,) in db.query(models.Employee.id).filter(
+                models.Employee.id.in_(holders), models.Employee.employment_status == "Active"
+            )
+        }
+        rows, valid = {}, 0
+        for number, asset in assets:
+            if asset.current_employee_id is not None and asset.current_employee_id not in active:
+                _reject_record(summary, number, ValueError(f"Employee {asset.current_employee_id} is unknown or not active."))
+                continue
+            valid += 1
+            rows.setdefault(asset.asset_tag, asset.model_dump())
+        existing = {tag for (tag,) in db.query(models.Asset.asset_tag).filter(models.Asset.asset_tag.in_(rows))}
+        new = [row for tag, row in rows.items() if tag not in existing]
+        # Tags already registered, or repeated in the file
+        summary["existing"] += valid - len(new)
+        if new:
+            imported = models.Asset.asset_tag.in_([row["asset_tag"] for row in new])
+            with holdings.tracking(db, imported), forecast.tracking(db, imported):
+                _insert_assets(db, new)
+            db.commit()
+            summary["inserted"] += len(new)
+        done = batch[-1][0]
+        progress(done)
+
+
+def _export_assets(db: Session, params: dict, progress: Callable) -> dict:
+    """
+    Write every asset of the tenant to a gzip-compressed file under EXPORT_DIR:
+    CSV, or with `format: msgpack` a stream of MessagePack arrays (column names, then one per row).
+    """
+    export_format = params.get("format", "csv")
+    if export_format not in ("csv", "msgpack"):
+        raise ValueError(f"Unknown export format '{export_format}'. Use csv or msgpack.")
+    if export_format == "msgpack" and msgpack is None:
+        raise ValueError("The msgpack package is not installed.")
+    columns = [column.key for column in models.Asset.__mapper__.column_attrs]
+    total = db.query(func.count(models.Asset.id)).scalar()
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    path = os.path.join(
+        EXPORT_DIR, f"assets-tenant{tenancy.current_tenant_id()}-{datetime.utcnow():%Y%m%dT%H%M%S}.{export_format}.gz"
+    )
+    written = 0
+    last_id = 0
+    progress(0, total)
+    if export_format == "msgpack":
+        handle = gzip.open(path, "wb")
+        packer = msgpack.Packer(default=msgpack_default)
+        write_rows = lambda rows: handle.write(b"".join(packer.pack(list(row)) for row in rows))
+        handle.write(packer.pack(columns))
+    else:
+        handle = gzip.open(path, "wt", encoding="utf-8", newline="")
+        writer = csv.writer(handle)
+        write_rows = writer.writerows
+        writer.writerow(columns)
+    with handle:
+        while True:
+            rows = db.execute(
+                select(*(getattr(models.Asset, name) for name in columns))
+                .where(models.Asset.id > last_id)
+                .order_by(models.Asset.id)
+                .limit(EXPORT_BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            write_rows(rows)
+            written += len(rows)
+            last_id = rows[-1].id
+            progress(written, total)
+    return {"path": path, "rows": written}
+
+
+def _plan_maintenance(db: Session, params: dict, progress: Callable) -> dict:
+    as_of = date.fromisoformat(params["as_of"]) if params.get("as_of") else None
+    return plan_preventive_maintenance(db, as_of=as_of)
+
+
+def _archive(db: Session, params: dict, progress: Callable) -> dict:
+    return archive_closed_records(db, years=params.get("years", ARCHIVE_AFTER_YEARS))
+
+
+# Registered job types: name -> handler
+JOB_TYPES = {
+    "offboard": _offboard,
+    "hr_sync": _hr_sync,
+    "export_assets": _export_assets,
+    "import_assets": _import_assets,
+    "plan_maintenance": _plan_maintenance,
+    "rebuild_holdings": lambda db, params, progress: {"rows": rebuild_holdings(db)},
+    "rebuild_forecast": lambda db, params, progress: {"rows": rebuild_forecast(db)},
+    "refresh_expiry_due": lambda db, params, progress: refresh_expiry_due(db),
+    "archive": _archive,
+    "integrity_scan": lambda db, params, progress: scan_integrity(db, full=params.get("full", False)),
+    "stock_snapshot": lambda db, params, progress: take_snapshot(db),
+}
+
+
+# --- Queue operations ---
+
+def enqueue(db: Session, job_type: str, params: Optional[dict] = None) -> models.Job:
+    """Queue a job and return it (committed, so workers can see it at once)."""
+    job = models.Job(job_type=job_type, status=QUEUED, params=jsonable_encoder(params or {}), progress_done=0, attempts=0)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def claim_next_job(db: Session, worker: str) -> Optional[int]:
+    """
+    Mark the oldest queued job as running for this worker and return its id.
+    The conditional UPDATE makes the claim atomic; on Postgres, SKIP LOCKED keeps
+    concurrent workers from queueing up behind the same row.
+    """
+    job = models.Job
+    candidate = select(job.id).where(job.status == QUEUED).order_by(job.id).limit(1)
+    if db.get_bind().dialect.name == "postgresql":
+        candidate = candidate.with_for_update(skip_locked=True)
+    now = datetime.utcnow()
+    claimed = db.execute(
+        update(job)
+        .where(job.id == candidate.scalar_subquery(), job.status == QUEUED)
+        .values(status=RUNNING, worker=worker, started_at=now, heartbeat_at=now, attempts=job.attempts + 1)
+        .returning(job.id)
+        .execution_options(synchronize_session=False, all_tenants=True)
+    ).scalar_one_or_none()
+    db.commit()
+    return claimed
+
+
+def requeue_stale_jobs(db: Session, now: datetime = None) -> int:
+    """Return abandoned running jobs to the queue, or fail them after JOB_MAX_ATTEMPTS."""
+    job = models.Job
+    cutoff = (now or datetime.utcnow()) - timedelta(seconds=JOB_STALE_SECONDS)
+    stale = (job.status == RUNNING, job.heartbeat_at < cutoff)
+    requeued = db.execute(
+        update(job).where(*stale, job.attempts < JOB_MAX_ATTEMPTS)
+        .values(status=QUEUED, worker=None)
+        .execution_options(synchronize_session=False, all_tenants=True)
+    ).rowcount
+    db.execute(
+        update(job).where(*stale, job.attempts >= JOB_MAX_ATTEMPTS)
+        .values(status=FAILED, error="Worker stopped responding.", finished_at=datetime.utcnow())
+        .execution_options(synchronize_session=False, all_tenants=True)
+    )
+    db.commit()
+    return requeued
+
+
+def _update_job(job_id: int, **values):
+    """Write job fields in a short session of their own, outside the handler's transaction."""
+    db = database.SessionLocal()
+    try:
+        db.execute(
+            update(models.Job).where(models.Job.id == job_id).values(**values)
+            .execution_options(synchronize_session=False, all_tenants=True)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+class _Heartbeat(threading.Thread):
+    """Refresh a running job's heartbeat so slow handlers are not mistaken for dead ones."""
+
+    def __init__(self, job_id: int):
+        super().__init__(daemon=True)
+        self.job_id = job_id
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(JOB_STALE_SECONDS / 3):
+            try:
+                _update_job(self.job_id, heartbeat_at=datetime.utcnow())
+            except Exception:
+                logger.exception("Heartbeat for job %s failed", self.job_id)
+
+
+def run_job(job_id: int):
+    """Run a claimed job, on behalf of the tenant that queued it, to completion and record its outcome."""
+    last_report = [0.0]
+
+    def progress(done: int, total: Optional[int] = None):
+        now = time.monotonic()
+        if now - last_report[0] >= PROGRESS_INTERVAL_SECONDS or (total is not None and done >= total):
+            last_report[0] = now
+            _update_job(job_id, progress_done=done, progress_total=total, heartbeat_at=datetime.utcnow())
+
+    heartbeat = _Heartbeat(job_id)
+    heartbeat.start()
+    db = database.SessionLocal()
+    try:
+        job = db.query(models.Job).filter(models.Job.id == job_id).execution_options(all_tenants=True).one()
+        handler = JOB_TYPES[job.job_type]
+        params = dict(job.params or {})
+        tenant_id = job.tenant_id
+        db.commit()
+        with tenancy.tenant_context(tenant_id):
+            result = handler(db, params, progress)
+            db.commit()
+        _update_job(job_id, status=SUCCEEDED, result=jsonable_encoder(result), finished_at=datetime.utcnow())
+        logger.info("Job %s (%s) succeeded", job_id, job.job_type)
+    except Exception:
+        db.rollback()
+        logger.exception("Job %s failed", job_id)
+        _update_job(job_id, status=FAILED, error=traceback.format_exc(limit=5), finished_at=datetime.utcnow())
+    finally:
+        heartbeat.stopped.set()
+        db.close()
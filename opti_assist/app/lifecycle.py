@@ -0,0 +1,167 @@
+"""
+Asset lifecycle: the allowed status transitions and how they are applied.
+
+Every transition is one conditional UPDATE (`... WHERE id = ? AND status IN (sources)
+RETURNING ...`), so the check and the write cannot be separated by a concurrent request;
+set-based callers (offboarding, imports) apply the same UPDATE to many assets at once.
+New assets start 'In Stock' and reach every other status through a transition.
+Each applied transition is published to the live feed once the session commits.
+"""
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+
+from . import live, models
+
+IN_STOCK = "In Stock"
+ASSIGNED = "Assigned"
+IN_REPAIR = "In Repair"
+RETIRED = "Retired"
+LOST = "Lost"
+
+# Target meaning "back to 'Assigned' if someone still holds the asset, else 'In Stock'"
+RESTORE = None
+# Target meaning "'In Stock', unless the asset is in repair (it stays there and goes to stock when released)"
+RELEASE = "release"
+
+# event -> (allowed source statuses, target status)
+TRANSITIONS = {
+    "assign": ((IN_STOCK,), ASSIGNED),
+    "return": ((ASSIGNED, IN_REPAIR), RELEASE),
+    "start_repair": ((IN_STOCK, ASSIGNED), IN_REPAIR),
+    "finish_repair": ((IN_REPAIR,), RESTORE),
+    "lose": ((IN_STOCK, ASSIGNED, IN_REPAIR), LOST),
+    "find": ((LOST,), RESTORE),
+    "retire": ((IN_STOCK, ASSIGNED, IN_REPAIR, LOST), RETIRED),
+}
+
+# Events that only apply to an asset someone holds
+HELD_EVENTS = ("return",)
+
+# Past participles for error messages
+_VERBS = {
+    "assign": "assigned",
+    "return": "returned",
+    "start_repair": "sent for repair",
+    "finish_repair": "released from repair",
+    "lose": "reported lost",
+    "find": "reported found",
+    "retire": "retired",
+}
+
+# Status changes allowed through PATCH /api/assets/{id}; the others have dedicated endpoints
+PATCH_EVENTS = {
+    LOST: "lose",
+    IN_STOCK: "find",
+}
+
+
+def _statement(event: str, *conditions, **values):
+    """The conditional UPDATE ... RETURNING applying an event to the assets matching the conditions."""
+    sources, target = TRANSITIONS[event]
+    asset = models.Asset
+    status = target
+    if target is RESTORE:
+        status = case((asset.current_employee_id.is_(None), IN_STOCK), else_=ASSIGNED)
+    if "current_employee_id" in values and target is RESTORE:
+        status = IN_STOCK if values["current_employee_id"] is None else ASSIGNED
+    if target == RELEASE:
+        status = case((asset.status == IN_REPAIR, IN_REPAIR), else_=IN_STOCK)
+    if event in HELD_EVENTS:
+        conditions += (asset.current_employee_id.isnot(None),)
+    return (
+        update(asset)
+        .where(asset.status.in_(sources), *conditions)
+        .values(status=status, last_updated_at=datetime.utcnow(), **values)
+        .returning(asset)
+        .execution_options(populate_existing=True)
+    )
+
+
+def transition(db: Session, asset_id: int, event: str, *conditions, **values) -> models.Asset:
+    """
+    Apply a lifecycle event to one asset and return the updated asset.
+
+    `conditions` are extra WHERE clauses (e.g., the expected holder) and `values`
+    extra columns to set in the same UPDATE. Raises 404 when the asset does not
+    exist, 400 when its current status does not allow the event and 409 when the
+    status does but the asset is not in the expected state (not held, or changed
+    by a concurrent request).
+    """
+    asset = models.Asset
+    updated = db.execute(_statement(event, asset.id == asset_id, *conditions, **values)).scalar_one_or_none()
+    if updated is None:
+        current = db.query(asset.asset_name, asset.status, asset.current_employee_id).filter(asset.id == asset_id).first()
+        if current is None:
+            raise HTTPException(status_code=404, detail="Asset not found.")
+        if current.status not in TRANSITIONS[event][0]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Asset '{current.asset_name}' is '{current.status}' and cannot be {_VERBS[event]}.",
+            )
+        if event in HELD_EVENTS and current.current_employee_id is None:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Asset '{current.asset_name}' is '{current.status}' but not held by anyone, so it cannot be {_VERBS[event]}.",
+            )
+        raise HTTPException(
+            status_code=409,
+            detail=f"Asset '{current.asset_name}' was changed by another request; reload it and retry.",
+        )
+    live.record(db, updated, event)
+    return updated
+
+
+def transition_all(db: Session, event: str, *conditions, **values) -> list:
+    """
+    Apply a lifecycle event to every asset matching the conditions whose status allows
+    it, in one UPDATE; the others are left alone. Returns the updated assets.
+    """
+    updated = db.execute(_statement(event, *conditions, **values)).scalars().all()
+    for asset in updated:
+        live.record(db, asset, event)
+    return updated
+
+
+def assign(db: Session, asset_id: int, employee_id: int, assigned_by_admin_id: int = None, notes: str = None) -> models.AssetAssignmentHistory:
+    """
+    Assign an 'In Stock' asset to an active employee and open its assignment history record.
+    Raises 404 for an unknown employee and 400 for an inactive one (or an asset not in stock).
+    """
+    employee = db.query(models.Employee).filter(models.Employee.id == employee_id).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found.")
+    if employee.employment_status != "Active":
+        raise HTTPException(status_code=400, detail=f"Employee '{employee.first_name} {employee.last_name}' is not active.")
+
+    transition(db, asset_id, "assign", current_employee_id=employee_id)
+    assignment = models.AssetAssignmentHistory(
+        asset_id=asset_id,
+        employee_id=employee_id,
+        assigned_date=datetime.utcnow(),
+        assigned_by_admin_id=assigned_by_admin_id,
+        notes=notes,
+    )
+    db.add(assignment)
+    return assignment
+
+
+def patch_event(current_status: str, requested_status: str) -> str:
+    """Lifecycle event for a status change requested through PATCH, or raise 400."""
+    if requested_status not in models.ASSET_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown status '{requested_status}'. Use one of: {', '.join(models.ASSET_STATUSES)}.",
+        )
+    event = PATCH_EVENTS.get(requested_status)
+    if event is None or current_status not in TRANSITIONS[event][0]:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Status cannot change from '{current_status}' to '{requested_status}' here. "
+                "Use assignments, returns, maintenance logs or retirement instead."
+            ),
+        )
+    return event
@@ -0,0 +1,227 @@
+"""
+Live feed of asset status changes as server-sent events (GET /api/assets/events).
+
+Lifecycle transitions (assign, return, repair, lost/found, retire) and asset
+create/update, set-based ones (offboarding, imports) included, are recorded on
+the session while a request runs, snapshotted just before its commit and
+published only after the commit succeeds, so subscribers never see changes that
+were rolled back.
+
+The broker is in-process: one bounded asyncio queue per subscriber, fanned out on
+the event loop, so an idle subscriber costs a queue and a suspended coroutine, not
+a thread or a database connection. Events are numbered per process and the last
+LIVE_REPLAY_EVENTS are kept, so a client reconnecting with `Last-Event-ID` gets what
+it missed. A subscriber that falls LIVE_QUEUE_SIZE events behind is sent `overflow`
+and disconnected; it reconnects and catches up from the replay buffer. Changes
+committed by other processes (other workers, the job worker, CLIs) are not seen.
+"""
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import models, tenancy
+
+# Events a subscriber may have queued before it is disconnected as too slow
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "100"))
+# Seconds between keep-alive comments on an idle stream (keeps proxies from closing it)
+LIVE_KEEPALIVE_SECONDS = float(os.getenv("LIVE_KEEPALIVE_SECONDS", "15"))
+# Recent events kept for clients that reconnect with Last-Event-ID
+LIVE_REPLAY_EVENTS = int(os.getenv("LIVE_REPLAY_EVENTS", "1000"))
+# Concurrent subscribers per process; further subscriptions answer 503
+MAX_LIVE_SUBSCRIBERS = int(os.getenv("MAX_LIVE_SUBSCRIBERS", "10000"))
+
+STREAM_PATH = "/api/assets/events"
+
+
+class Subscriber:
+    """One open stream: its tenant, filters and queue of pending events."""
+
+    __slots__ = ("tenant_id", "statuses", "category_ids", "location_ids", "queue", "overflowed", "after_id")
+
+    def __init__(self, tenant_id: int, statuses=None, category_ids=None, location_ids=None):
+        self.tenant_id = tenant_id
+        self.statuses = set(statuses) if statuses else None
+        self.category_ids = set(category_ids) if category_ids else None
+        self.location_ids = set(location_ids) if location_ids else None
+        self.queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+        self.overflowed = False
+        self.after_id = 0
+
+    def matches(self, change: dict) -> bool:
+        return (
+            change["tenant_id"] == self.tenant_id
+            and (self.statuses is None or change["status"] in self.statuses)
+            and (self.category_ids is None or change["category_id"] in self.category_ids)
+            and (self.location_ids is None or change["location_id"] in self.location_ids)
+        )
+
+
+class Broker:
+    """
+    Fans published changes out to the subscribers of their tenant.
+    `publish` may be called from any thread; subscriber queues are only touched on the event loop.
+    """
+
+    def __init__(self):
+        self._subscribers = {}  # tenant id -> set of Subscriber
+        self._count = 0
+        self._loop = None
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._recent = deque(maxlen=LIVE_REPLAY_EVENTS)
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._count
+
+    def subscribe(self, subscriber: Subscriber, last_id: Optional[int] = None) -> Optional[list]:
+        """
+        Start delivering changes to a subscriber. Returns the matching changes after
+        `last_id` (none when it is not given), or None when some of them are no longer kept.
+        """
+        self._loop = asyncio.get_running_loop()
+        with self._lock:
+            recent = list(self._recent)
+            # Changes numbered up to here are replayed (or skipped), never also delivered
+            subscriber.after_id = self._next_id - 1
+        self._subscribers.setdefault(subscriber.tenant_id, set()).add(subscriber)
+        self._count += 1
+        if last_id is None:
+            return []
+        if last_id > subscriber.after_id or (recent and recent[0]["id"] > last_id + 1):
+            return None  # ids from before a restart, or older than the replay buffer
+        return [change for change in recent if change["id"] > last_id and subscriber.matches(change)]
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscribers = self._subscribers.get(subscriber.tenant_id)
+        if subscribers and subscriber in subscribers:
+            subscribers.discard(subscriber)
+            self._count -= 1
+            if not subscribers:
+                del self._subscribers[subscriber.tenant_id]
+
+    def publish(self, changes: List[dict]):
+        """Number the changes, keep them for replay and hand them to the event loop."""
+        with self._lock:
+            for change in changes:
+                change["id"] = self._next_id
+                self._next_id += 1
+                self._recent.append(change)
+        loop = self._loop
+        if loop is None or not self._count:
+            return
+        try:
+            loop.call_soon_threadsafe(self._dispatch, changes)
+        except RuntimeError:  # the loop has been closed
+            self._loop = None
+
+    def _dispatch(self, changes: List[dict]):
+        for change in changes:
+            for subscriber in list(self._subscribers.get(change["tenant_id"], ())):
+                if subscriber.overflowed or change["id"] <= subscriber.after_id or not subscriber.matches(change):
+                    continue
+                try:
+                    subscriber.queue.put_nowait(change)
+                except asyncio.QueueFull:
+                    subscriber.overflowed = True
+
+
+broker = Broker()
+
+
+# --- Recording changes on the session ---
+
+def record(db: Session, asset: models.Asset, change: str):
+    """Queue a change of an asset for publication when the session commits."""
+    db.info.setdefault("live_changes", []).append((asset, change))
+
+
+@event.listens_for(Session, "before_commit")
+def _snapshot_changes(session):
+    recorded = session.info.pop("live_changes", None)
+    if not recorded:
+        return
+    session.flush()
+    at = datetime.utcnow().isoformat()
+    session.info["live_snapshots"] = [
+        {
+            "event": change,
+            "tenant_id": asset.tenant_id,
+            "asset_id": asset.id,
+            "asset_tag": asset.asset_tag,
+            "status": asset.status,
+            "current_employee_id": asset.current_employee_id,
+            "category_id": asset.category_id,
+            "location_id": asset.current_location_id,
+            "at": at,
+        }
+        for asset, change in recorded
+    ]
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_on_commit(session):
+    snapshots = session.info.pop("live_snapshots", None)
+    if snapshots:
+        broker.publish(snapshots)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_on_rollback(session, previous_transaction):
+    session.info.pop("live_changes", None)
+    session.info.pop("live_snapshots", None)
+
+
+# --- Server-sent events ---
+
+def _format(change: dict) -> bytes:
+    data = {key: value for key, value in change.items() if key not in ("id", "tenant_id")}
+    return f"id: {change['id']}\nevent: {change['event']}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def _stream(subscriber: Subscriber, last_id: Optional[int]):
+    backlog = broker.subscribe(subscriber, last_id)
+    try:
+        # Sent at once so the client (and any proxy) sees the stream open
+        yield b"retry: 3000\n: connected\n\n"
+        if backlog is None:
+            # Some changes were missed for good: reload current state instead
+            yield b"event: resync\ndata: {}\n\n"
+        else:
+            for change in backlog:
+                yield _format(change)
+        while True:
+            if subscriber.overflowed and subscriber.queue.empty():
+                yield b"event: overflow\ndata: {}\n\n"
+                return
+            try:
+                change = await asyncio.wait_for(subscriber.queue.get(), timeout=LIVE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            yield _format(change)
+    finally:
+        broker.unsubscribe(subscriber)
+
+
+def event_stream(request: Request, statuses=None, category_ids=None, location_ids=None) -> StreamingResponse:
+    """Subscribe the current tenant to matching asset changes and stream them as server-sent events."""
+    if broker.subscriber_count >= MAX_LIVE_SUBSCRIBERS:
+        raise HTTPException(status_code=503, detail="Too many live subscribers; retry later.")
+    last_id = request.headers.get("last-event-id", "")
+    last_id = int(last_id) if last_id.isdigit() else None
+    subscriber = Subscriber(tenancy.current_tenant_id(), statuses, category_ids, location_ids)
+    return StreamingResponse(
+        _stream(subscriber, last_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
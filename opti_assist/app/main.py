@@ -1,18 +1,79 @@
-from fastapi import FastAPI, Depends, HTTPException
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
-from . import models, database
-from .routers import assets, employees, assignments, departments, locations, vendors, categories, maintenance
+from . import database, profiling, scheduler, worker
+from .admission import AdmissionMiddleware
+from .compression import CompressionMiddleware
+from .idempotency import IdempotencyMiddleware
+from .tenancy import TenantMiddleware
+from .routers import assets, employees, assignments, departments, locations, vendors, categories, maintenance, reports, jobs, admin, audit
+
+# Schema changes are applied with `python -m app.migrate`, not at startup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the database engine and start background work (scheduler, job worker, replica lag checks) with the app.
+    No connection is opened here, so a slow database never blocks startup.
+    """
+    database.init_engine()
+    stop = asyncio.Event()
+    tasks = []
+    if scheduler.SCHEDULER_IN_PROCESS:
+        tasks.append(asyncio.create_task(scheduler.run_scheduler(stop)))
+    if worker.JOB_WORKER_IN_PROCESS:
+        tasks.append(asyncio.create_task(worker.run_worker(stop)))
+    if database.replica_sessions:
+        tasks.append(asyncio.create_task(database.monitor_replicas(stop)))
+    yield
+    stop.set()
+    for task in tasks:
+        await task
+    database.dispose_engine()
 
-# Create tables
-models.Base.metadata.create_all(bind=database.engine)
 
 app = FastAPI(
     title="Opti Assist API",
     description="Enterprise Asset Management System API",
     version="1.0.0",
+    lifespan=lifespan,
 )
+# Endpoints declared on the app itself (/, /health) are profilable like the routers' ones
+app.router.route_class = profiling.ProfiledRoute
+
+# Replay stored responses for retried POSTs (added first so it runs inside compression)
+app.add_middleware(IdempotencyMiddleware)
+# Negotiated gzip/Brotli compression for large responses
+app.add_middleware(CompressionMiddleware)
+# Profile requests on demand (X-Profile) or by sampling; inside the tenant, which profiles record
+app.add_middleware(profiling.ProfilingMiddleware)
+# Resolve the tenant (X-Tenant-ID) before anything reads or writes tenant data
+app.add_middleware(TenantMiddleware)
+# Per-client rate limits and the in-flight cap, checked before any other work
+app.add_middleware(AdmissionMiddleware)
+
+
+@app.middleware("http")
+async def remember_writes(request: Request, call_next):
+    """
+    Mark clients that just wrote, so their reads stay on the primary for a
+    short while and see their own changes (see database.get_read_db).
+    """
+    response = await call_next(request)
+    if database.replica_sessions and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        response.set_cookie(
+            database.LAST_WRITE_COOKIE,
+            str(time.time()),
+            max_age=int(database.REPLICA_STICKY_SECONDS) + 1,
+            httponly=True,
+        )
+    return response
 
 # --- Register all routers ---
 app.include_router(assets.router)
@@ -23,6 +84,10 @@ app.include_router(locations.router)
 app.include_router(vendors.router)
 app.include_router(categories.router)
 app.include_router(maintenance.router)
+app.include_router(reports.router)
+app.include_router(jobs.router)
+app.include_router(admin.router)
+app.include_router(audit.router)
 
 
 @app.get("/", tags=["System"])
@@ -0,0 +1,158 @@
+"""
+Schema management, run explicitly instead of at application startup.
+
+    python -m app.migrate
+
+Creates any missing tables and indexes from the models, and the default
+tenant. Tables created by earlier versions are brought up to the models first:
+missing columns are added (`tenant_id` with the default tenant, so existing rows
+belong to it), unique indexes and constraints the models no longer declare (the
+global asset tag, employee code and email ones) are dropped, and primary keys
+that changed (derived tables now keyed by tenant) are replaced. SQLite cannot
+alter constraints, so there such tables are rebuilt and their rows copied.
+On Postgres, db.sql remains the reference schema for new databases.
+
+Derived counters that writes only ever adjust (holdings, refresh forecast) are
+then built for every tenant that has none yet.
+"""
+from sqlalchemy import inspect
+
+from . import models, database, tenancy
+from .forecast import rebuild_forecast
+from .holdings import rebuild_holdings
+
+# Derived tables that writes keep up to date incrementally: model -> rebuild function
+DERIVED = (
+    (models.AssetHolding, rebuild_holdings),
+    (models.RefreshForecast, rebuild_forecast),
+)
+
+# Index names the application owns; undeclared ones with these prefixes are left over from older versions
+OWN_INDEX_PREFIXES = ("ix_", "ux_")
+
+
+def _quote(connection, name: str) -> str:
+    return connection.dialect.identifier_preparer.quote(name)
+
+
+def _expected_primary_key(connection, table) -> list:
+    columns = [column.name for column in table.primary_key.columns]
+    key = table.info.get("partition_key")
+    if connection.dialect.name == "postgresql" and key is not None and key not in columns:
+        columns.append(key)  # see models._partitioned_primary_key
+    return columns
+
+
+def _declared_unique(table) -> set:
+    unique = {frozenset(index.columns.keys()) for index in table.indexes if index.unique}
+    unique |= {frozenset([column.name]) for column in table.columns if column.unique}
+    return unique
+
+
+def _add_column_clause(connection, column) -> str:
+    """Column definition for ALTER TABLE ADD COLUMN; existing rows get the default tenant or NULL."""
+    definition = f"{_quote(connection, column.name)} {column.type.compile(dialect=connection.dialect)}"
+    if column.name == "tenant_id":
+        return f"{definition} NOT NULL DEFAULT {tenancy.DEFAULT_TENANT_ID}"
+    return definition
+
+
+def _rebuild_sqlite_table(connection, table, indexes: list):
+    """Recreate a SQLite table from its model and copy the rows over (SQLite cannot alter constraints)."""
+    name = _quote(connection, table.name)
+    old = _quote(connection, f"{table.name}_old")
+    for index in indexes:
+        connection.exec_driver_sql(f"DROP INDEX {_quote(connection, index['name'])}")
+    connection.exec_driver_sql(f"ALTER TABLE {name} RENAME TO {old}")
+    table.create(connection)
+    columns = ", ".join(_quote(connection, column.name) for column in table.columns)
+    connection.exec_driver_sql(f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {old}")
+    connection.exec_driver_sql(f"DROP TABLE {old}")
+
+
+def upgrade_table(connection, table) -> bool:
+    """Bring one existing table up to its model; returns True if anything changed."""
+    inspector = inspect(connection)
+    name = _quote(connection, table.name)
+    changed = False
+
+    existing = {column["name"] for column in inspector.get_columns(table.name)}
+    for column in table.columns:
+        if column.name not in existing:
+            connection.exec_driver_sql(f"ALTER TABLE {name} ADD COLUMN {_add_column_clause(connection, column)}")
+            changed = True
+
+    declared_unique = _declared_unique(table)
+    declared_indexes = {index.name for index in table.indexes}
+    indexes = inspector.get_indexes(table.name)
+    stale_indexes = [
+        index for index in indexes
+        if index["name"] not in declared_indexes
+        and (index["unique"] or index["name"].startswith(OWN_INDEX_PREFIXES))
+        and (not index["unique"] or frozenset(index["column_names"]) not in declared_unique)
+    ]
+    stale_constraints = [
+        constraint for constraint in inspector.get_unique_constraints(table.name)
+        if frozenset(constraint["column_names"]) not in declared_unique
+    ]
+    primary_key = inspector.get_pk_constraint(table.name)
+    expected_key = _expected_primary_key(connection, table)
+    key_changed = set(primary_key["constrained_columns"]) != set(expected_key)
+
+    if connection.dialect.name == "sqlite":
+        if stale_constraints or key_changed:
+            _rebuild_sqlite_table(connection, table, indexes)
+            return True
+        for index in stale_indexes:
+            connection.exec_driver_sql(f"DROP INDEX {_quote(connection, index['name'])}")
+        return changed or bool(stale_indexes)
+
+    for index in stale_indexes:
+        connection.exec_driver_sql(f"DROP INDEX {_quote(connection, index['name'])}")
+    for constraint in stale_constraints:
+        connection.exec_driver_sql(f"ALTER TABLE {name} DROP CONSTRAINT {_quote(connection, constraint['name'])}")
+    if key_changed:
+        if primary_key["name"]:
+            connection.exec_driver_sql(f"ALTER TABLE {name} DROP CONSTRAINT {_quote(connection, primary_key['name'])}")
+        columns = ", ".join(_quote(connection, column) for column in expected_key)
+        connection.exec_driver_sql(f"ALTER TABLE {name} ADD PRIMARY KEY ({columns})")
+    return changed or bool(stale_indexes or stale_constraints or key_changed)
+
+
+def upgrade_schema(engine) -> list:
+    """Upgrade every table that already exists, then create missing tables and indexes. Returns the upgraded tables."""
+    upgraded = []
+    with engine.begin() as connection:
+        present = set(inspect(connection).get_table_names())
+        for table in models.Base.metadata.sorted_tables:
+            if table.name in present and upgrade_table(connection, table):
+                upgraded.append(table.name)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for table in models.Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+    return upgraded
+
+
+def migrate():
+    engine = database.init_engine()
+    for table in upgrade_schema(engine):
+        print(f"Upgraded table {table}.")
+    db = database.SessionLocal()
+    try:
+        if db.get(models.Tenant, tenancy.DEFAULT_TENANT_ID) is None:
+            db.add(models.Tenant(id=tenancy.DEFAULT_TENANT_ID, code="default", name="Default company"))
+            db.commit()
+        for tenant_id in tenancy.tenant_ids(db):
+            with tenancy.tenant_context(tenant_id):
+                for model, rebuild in DERIVED:
+                    if db.query(model.tenant_id).first() is None:
+                        rebuild(db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrate()
+    print("Database schema is up to date.")
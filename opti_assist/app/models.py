@@ -1,9 +1,37 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, Date, DateTime, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, Date, DateTime, Numeric, ForeignKey, Index, LargeBinary, Enum, JSON, PrimaryKeyConstraint
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from datetime import date, datetime
 from .database import Base
+from .tenancy import TenantMixin, current_tenant_id
 
-class Department(Base):
+
+@compiles(PrimaryKeyConstraint, "postgresql")
+def _partitioned_primary_key(constraint, compiler, **kw):
+    """
+    Postgres requires the partition key in the primary key of a partitioned table,
+    so tables marked with info["partition_key"] get PRIMARY KEY (id, <key>) there,
+    as in db.sql. Elsewhere (SQLite) the key stays `id` alone so it can autoincrement;
+    ids are unique either way and the ORM identifies rows by `id`.
+    """
+    key = constraint.table.info.get("partition_key")
+    if key is None or key in constraint.columns:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+    columns = [column.name for column in constraint.columns] + [key]
+    return "PRIMARY KEY (%s)" % ", ".join(compiler.preparer.quote(name) for name in columns)
+
+class Tenant(Base):
+    """
+    Represents a company (tenant) whose data is kept apart from every other tenant's.
+    All other tables carry a tenant_id; requests pick their tenant with the X-Tenant-ID header.
+    """
+    __tablename__ = "tenants"
+    id = Column(Integer, primary_key=True, index=True)
+    code = Column(String(50), unique=True, nullable=False) # Short company code (e.g., ACME)
+    name = Column(String(150), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class Department(TenantMixin, Base):
     """
     Represents an organizational department within the company.
     Used for grouping employees and tracking cost centers.
@@ -14,8 +42,14 @@ class Department(Base):
     cost_center_code = Column(String(50))      # Unique code for financial tracking
     manager_employee_id = Column(Integer, nullable=True) # ID of the employee managing this department
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) # Change watermark for integrity scans
+    __table_args__ = (
+        Index("ix_departments_tenant_id", "tenant_id", "id"),
+        Index("ix_departments_tenant_manager", "tenant_id", "manager_employee_id"),
+        Index("ix_departments_tenant_updated", "tenant_id", "updated_at"),
+    )
 
-class Location(Base):
+class Location(TenantMixin, Base):
     """
     Represents a physical office or site location.
     Used to track where assets and employees are situated.
@@ -27,8 +61,11 @@ class Location(Base):
     city = Column(String(50))
     country = Column(String(50))
     is_active = Column(Boolean, default=True)
+    __table_args__ = (
+        Index("ix_locations_tenant_id", "tenant_id", "id"),
+    )
 
-class Vendor(Base):
+class Vendor(TenantMixin, Base):
     """
     Represents a third-party vendor or supplier.
     Used for tracking asset procurement and maintenance services.
@@ -41,8 +78,12 @@ class Vendor(Base):
     support_phone = Column(String(50))
     website = Column(String(200))
     contract_expiry_date = Column(Date)
+    __table_args__ = (
+        Index("ix_vendors_tenant_id", "tenant_id", "id"),
+        Index("ix_vendors_tenant_contract_expiry", "tenant_id", "contract_expiry_date"),
+    )
 
-class AssetCategory(Base):
+class AssetCategory(TenantMixin, Base):
     """
     Represents a category for assets (e.g., Laptops, Furniture, Vehicles).
     Used for organization and defining default depreciation rules.
@@ -52,18 +93,25 @@ class AssetCategory(Base):
     category_name = Column(String(100), nullable=False)
     parent_category_id = Column(Integer, nullable=True) # Allows for hierarchical categories
     depreciation_years = Column(Integer, default=3)    # Standard lifespan for assets in this category
+    maintenance_interval_days = Column(Integer, nullable=True) # Preventive maintenance cadence (NULL = none)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) # Change watermark for integrity scans
+    __table_args__ = (
+        Index("ix_asset_categories_tenant_id", "tenant_id", "id"),
+        Index("ix_asset_categories_tenant_parent", "tenant_id", "parent_category_id"),
+        Index("ix_asset_categories_tenant_updated", "tenant_id", "updated_at"),
+    )
 
-class Employee(Base):
+class Employee(TenantMixin, Base):
     """
     Represents a company employee.
     Employees can be assigned assets for their professional use.
     """
     __tablename__ = "employees"
     id = Column(Integer, primary_key=True, index=True)
-    employee_code = Column(String(50), unique=True, nullable=False) # Unique company ID (e.g., EMP001)
+    employee_code = Column(String(50), nullable=False) # Unique (per tenant) company ID (e.g., EMP001)
     first_name = Column(String(100), nullable=False)
     last_name = Column(String(100), nullable=False)
-    email = Column(String(150), unique=True, nullable=False)
+    email = Column(String(150), nullable=False) # Unique per tenant
     phone_number = Column(String(50))
     job_title = Column(String(100))
     department_id = Column(Integer, nullable=True) # Foreign key to departments
@@ -71,20 +119,32 @@ class Employee(Base):
     employment_status = Column(String(50), default='Active') # Active, Inactive, On Leave
     hire_date = Column(Date)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) # Change watermark for integrity scans
+    __table_args__ = (
+        Index("ux_employees_tenant_code", "tenant_id", "employee_code", unique=True),
+        Index("ux_employees_tenant_email", "tenant_id", "email", unique=True),
+        Index("ix_employees_tenant_id", "tenant_id", "id"),
+        Index("ix_employees_tenant_department", "tenant_id", "department_id"),
+        Index("ix_employees_tenant_location", "tenant_id", "location_id"),
+        Index("ix_employees_tenant_updated", "tenant_id", "updated_at"),
+    )
+
+# Asset lifecycle states (stored as the native `asset_status` enum on Postgres)
+ASSET_STATUSES = ("In Stock", "Assigned", "In Repair", "Retired", "Lost")
 
-class Asset(Base):
+class Asset(TenantMixin, Base):
     """
     Represents a physical asset owned by the company.
     This is the core entity for tracking equipment, its status, and ownership.
     """
     __tablename__ = "assets"
     id = Column(Integer, primary_key=True, index=True)
-    asset_tag = Column(String(50), unique=True, nullable=False) # Unique barcode/RFID tag
+    asset_tag = Column(String(50), nullable=False) # Barcode/RFID tag, unique per tenant
     serial_number = Column(String(100))
     asset_name = Column(String(150), nullable=False)
     model_number = Column(String(100))
     category_id = Column(Integer, nullable=True) # Link to asset_categories
-    status = Column(String(50), default='In Stock') # In Stock, Assigned, In Repair, Retired
+    status = Column(Enum(*ASSET_STATUSES, name="asset_status"), default='In Stock') # Transitions live in app.lifecycle
     condition_grade = Column(String(20)) # New, Like New, Good, Fair, Poor
     vendor_id = Column(Integer, nullable=True) # Link to vendors
     purchase_date = Column(Date)
@@ -96,8 +156,23 @@ class Asset(Base):
     notes = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     last_updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Every index leads with tenant_id, so a tenant's queries never read another tenant's entries
+    __table_args__ = (
+        Index("ux_assets_tenant_tag", "tenant_id", "asset_tag", unique=True),
+        Index("ix_assets_tenant_id", "tenant_id", "id"),
+        Index("ix_assets_tenant_status_category", "tenant_id", "status", "category_id"),
+        Index("ix_assets_tenant_category", "tenant_id", "category_id"),
+        Index("ix_assets_tenant_vendor", "tenant_id", "vendor_id"),
+        Index("ix_assets_tenant_purchase_date", "tenant_id", "purchase_date"),
+        Index("ix_assets_tenant_purchase_cost", "tenant_id", "purchase_cost"),
+        Index("ix_assets_tenant_warranty_expiry", "tenant_id", "warranty_expiry_date"),
+        Index("ix_assets_tenant_employee", "tenant_id", "current_employee_id"),
+        Index("ix_assets_tenant_location", "tenant_id", "current_location_id"),
+        Index("ix_assets_tenant_condition", "tenant_id", "condition_grade"),
+        Index("ix_assets_tenant_last_updated", "tenant_id", "last_updated_at"),
+    )
 
-class AssetAssignmentHistory(Base):
+class AssetAssignmentHistory(TenantMixin, Base):
     """
     Tracks the movement of assets between employees over time.
     Provides an audit trail for asset stewardship.
@@ -106,12 +181,19 @@ class AssetAssignmentHistory(Base):
     id = Column(Integer, primary_key=True, index=True)
     asset_id = Column(Integer, nullable=False)
     employee_id = Column(Integer, nullable=True)
-    assigned_date = Column(DateTime, default=datetime.utcnow)
+    assigned_date = Column(DateTime, nullable=False, default=datetime.utcnow) # Partition key (db.sql)
     returned_date = Column(DateTime, nullable=True) # NULL if currently assigned
     assigned_by_admin_id = Column(Integer, nullable=True)
     notes = Column(Text)
+    __table_args__ = (
+        Index("ix_asset_assignment_history_tenant_id", "tenant_id", "id"),
+        Index("ix_asset_assignment_history_tenant_asset_assigned", "tenant_id", "asset_id", "assigned_date"),
+        Index("ix_asset_assignment_history_tenant_employee", "tenant_id", "employee_id"),
+        Index("ix_asset_assignment_history_tenant_returned", "tenant_id", "returned_date"),
+        {"info": {"partition_key": "assigned_date"}},
+    )
 
-class MaintenanceLog(Base):
+class MaintenanceLog(TenantMixin, Base):
     """
     Records maintenance activities, repairs, and inspections for assets.
     Helps in calculating total cost of ownership (TCO) and asset health.
@@ -123,6 +205,139 @@ class MaintenanceLog(Base):
     description = Column(Text)
     cost = Column(Numeric(10, 2))
     vendor_id = Column(Integer, nullable=True) # Link to vendor performing maintenance
-    start_date = Column(Date)
+    start_date = Column(Date, nullable=False, default=date.today) # Partition key (db.sql)
     completion_date = Column(Date)
     status = Column(String(50)) # Pending, In Progress, Completed
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) # Change watermark for integrity scans
+    __table_args__ = (
+        Index("ix_maintenance_logs_tenant_id", "tenant_id", "id"),
+        Index("ix_maintenance_logs_tenant_asset_start", "tenant_id", "asset_id", "start_date"),
+        Index("ix_maintenance_logs_tenant_vendor", "tenant_id", "vendor_id"),
+        Index("ix_maintenance_logs_tenant_completion", "tenant_id", "completion_date"),
+        Index("ix_maintenance_logs_tenant_updated", "tenant_id", "updated_at"),
+        {"info": {"partition_key": "start_date"}},
+    )
+
+class ExpiryDue(TenantMixin, Base):
+    """
+    Precomputed list of asset warranties and vendor contracts expiring soon.
+    Maintained by the background scheduler so expiry reports never scan the fleet.
+    """
+    __tablename__ = "expiry_due"
+    id = Column(Integer, primary_key=True, index=True)
+    entity_type = Column(String(20), nullable=False) # Asset, Vendor
+    entity_id = Column(Integer, nullable=False)      # Soft link to assets.id / vendors.id
+    label = Column(String(150))                      # Asset name or vendor name at computation time
+    expiry_date = Column(Date, nullable=False)
+    computed_at = Column(DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        Index("ix_expiry_due_tenant_expiry", "tenant_id", "expiry_date"),
+        Index("ix_expiry_due_tenant_entity", "tenant_id", "entity_type", "entity_id"),
+    )
+
+class AssetHolding(TenantMixin, Base):
+    """
+    Materialized count and value of assets currently held, per employee, department and location.
+    Maintained incrementally by the asset and employee writes that move them; rebuilt with `python -m app.holdings`.
+    """
+    __tablename__ = "asset_holdings"
+    tenant_id = Column(Integer, primary_key=True, default=current_tenant_id)
+    scope = Column(String(20), primary_key=True)     # employee, department, location
+    scope_id = Column(Integer, primary_key=True)     # Soft link to employees.id / departments.id / locations.id
+    asset_count = Column(Integer, nullable=False, default=0)
+    total_cost = Column(Numeric(14, 2), nullable=False, default=0) # Sum of purchase_cost
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Watermark(TenantMixin, Base):
+    """
+    Progress marker for incremental background jobs.
+    Records how far a job got so its next run only processes what changed.
+    """
+    __tablename__ = "job_watermarks"
+    tenant_id = Column(Integer, primary_key=True, default=current_tenant_id)
+    name = Column(String(100), primary_key=True) # Job name (e.g., expiry_due)
+    last_run_at = Column(DateTime)               # Start time of the last successful run
+    last_date = Column(Date)                     # Date-range high-water mark, if the job uses one
+    last_id = Column(Integer)                    # Primary-key high-water mark, if the job uses one
+
+class IdempotencyKey(TenantMixin, Base):
+    """
+    Stored response of a POST made with an `Idempotency-Key` header.
+    A retry with the same key gets this response back instead of running again.
+    """
+    __tablename__ = "idempotency_keys"
+    tenant_id = Column(Integer, primary_key=True, default=current_tenant_id)
+    key = Column(String(255), primary_key=True)            # Client-supplied Idempotency-Key
+    request_hash = Column(String(64), nullable=False)      # SHA-256 of method, path, query string and body
+    status_code = Column(Integer)                          # NULL while the first request is still running
+    headers = Column(JSON)                                 # Response headers as [name, value] pairs
+    body = Column(LargeBinary)                             # zlib-compressed response body
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True) # Hold of a running request, then replay TTL
+
+class Job(TenantMixin, Base):
+    """
+    A long-running bulk operation queued for the background worker.
+    Workers claim queued jobs in id order and report progress while they run.
+    """
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), nullable=False)      # Registered handler name (see app.jobs.JOB_TYPES)
+    status = Column(String(20), nullable=False, default="Queued") # Queued, Running, Succeeded, Failed
+    params = Column(JSON)
+    result = Column(JSON)
+    error = Column(Text)
+    progress_done = Column(Integer, default=0)
+    progress_total = Column(Integer)                   # NULL when the job cannot tell in advance
+    attempts = Column(Integer, default=0)
+    worker = Column(String(100))                       # host:pid of the worker running it
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)                    # Refreshed while running; stale jobs are requeued
+    finished_at = Column(DateTime)
+    __table_args__ = (
+        Index("ix_jobs_status_id", "status", "id"),           # Workers claim across tenants
+        Index("ix_jobs_tenant_id", "tenant_id", "id"),
+    )
+
+class IntegrityOrphan(TenantMixin, Base):
+    """
+    A soft link pointing at a row that does not exist, found by the integrity scanner.
+    Rows disappear again once the reference is fixed and the scanner re-checks it.
+    """
+    __tablename__ = "integrity_orphans"
+    tenant_id = Column(Integer, primary_key=True, default=current_tenant_id)
+    link = Column(String(100), primary_key=True)   # Referencing column, e.g. 'assets.vendor_id'
+    row_id = Column(Integer, primary_key=True)     # id of the referencing row
+    missing_id = Column(Integer, nullable=False)   # Value that points nowhere
+    detected_at = Column(DateTime, default=datetime.utcnow)
+
+class StockSnapshot(TenantMixin, Base):
+    """
+    Daily aggregate of the asset stock per location, category and status.
+    Append-only time series: one set of rows per snapshot date, never updated.
+    """
+    __tablename__ = "stock_snapshots"
+    tenant_id = Column(Integer, primary_key=True, default=current_tenant_id)
+    snapshot_date = Column(Date, primary_key=True)
+    location_id = Column(Integer, primary_key=True)  # 0 = no location
+    category_id = Column(Integer, primary_key=True)  # 0 = no category
+    status = Column(String(20), primary_key=True)
+    asset_count = Column(Integer, nullable=False)
+    total_value = Column(Numeric(14, 2), nullable=False) # Sum of purchase_cost
+
+class RefreshForecast(TenantMixin, Base):
+    """
+    Count and value of assets reaching end of life (purchase date + category depreciation years)
+    per quarter, category and holder's department. Maintained incrementally by asset writes;
+    built by `python -m app.migrate` for new tenants, rebuilt with `python -m app.forecast`.
+    """
+    __tablename__ = "refresh_forecast"
+    tenant_id = Column(Integer, primary_key=True, default=current_tenant_id)
+    eol_year = Column(Integer, primary_key=True)
+    eol_quarter = Column(Integer, primary_key=True)   # 1-4
+    category_id = Column(Integer, primary_key=True)   # 0 = no category
+    department_id = Column(Integer, primary_key=True) # 0 = not held, or holder without department
+    asset_count = Column(Integer, nullable=False, default=0)
+    total_cost = Column(Numeric(14, 2), nullable=False, default=0) # Sum of purchase_cost
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,82 @@
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import update, func
+from sqlalchemy.orm import Session
+
+from . import lifecycle, live, models
+from .forecast import apply_forecast_deltas, forecast_buckets
+from .holdings import apply_holding_deltas, holding_buckets, merge_deltas, negate
+
+# Keep IN (...) lists well under driver parameter limits
+CHUNK_SIZE = 500
+
+
+def _chunks(values: list, size: int = CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _released_forecast(db: Session, employee_ids: List[int]) -> dict:
+    """Forecast deltas moving what the given employees hold out of their departments."""
+    held = forecast_buckets(db, models.Asset.current_employee_id.in_(employee_ids))
+    released = [{(category, 0, year, quarter): value} for (category, _, year, quarter), value in held.items()]
+    return merge_deltas(negate(held), *released)
+
+
+def offboard_employees(db: Session, employee_ids: List[int]) -> dict:
+    """
+    Deactivate employees and reclaim everything they hold, in one transaction.
+
+    Uses set-based UPDATEs: open assignment history rows are closed, held assets
+    are returned through the lifecycle ('Assigned' goes back to 'In Stock', assets in
+    repair keep their status; lost or retired ones only lose the holder), and the
+    employees are marked 'Inactive'. Holdings counters and the refresh
+    forecast are adjusted to match, and every reclaimed asset goes to the live feed.
+    """
+    now = datetime.utcnow()
+    ids = sorted(set(employee_ids))
+    result = {"employees": 0, "assignments_closed": 0, "assets_reclaimed": 0}
+    deltas = []
+    forecast_deltas = []
+
+    for chunk in _chunks(ids):
+        deltas.append(negate(holding_buckets(db, models.Asset.current_employee_id.in_(chunk))))
+        forecast_deltas.append(_released_forecast(db, chunk))
+        result["assignments_closed"] += db.execute(
+            update(models.AssetAssignmentHistory)
+            .where(
+                models.AssetAssignmentHistory.employee_id.in_(chunk),
+                models.AssetAssignmentHistory.returned_date.is_(None),
+            )
+            .values(
+                returned_date=now,
+                notes=func.coalesce(models.AssetAssignmentHistory.notes, "") + " | Returned on offboarding",
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        held = models.Asset.current_employee_id.in_(chunk)
+        result["assets_reclaimed"] += len(lifecycle.transition_all(db, "return", held, current_employee_id=None))
+        # Lost and retired assets cannot be returned; they only drop the holder
+        released = db.execute(
+            update(models.Asset)
+            .where(held)
+            .values(current_employee_id=None, last_updated_at=now)
+            .returning(models.Asset)
+            .execution_options(populate_existing=True)
+        ).scalars().all()
+        for asset in released:
+            live.record(db, asset, "update")
+        result["assets_reclaimed"] += len(released)
+        result["employees"] += db.execute(
+            update(models.Employee)
+            .where(models.Employee.id.in_(chunk))
+            .values(employment_status="Inactive")
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    apply_holding_deltas(db, merge_deltas(*deltas))
+    apply_forecast_deltas(db, merge_deltas(*forecast_deltas))
+    db.commit()
+    return result
+
@@ -0,0 +1,75 @@
+import base64
+import json
+import os
+from datetime import date, datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Largest `limit` any list endpoint accepts; bigger pages hold a pooled connection too long
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+
+
+def _value(row, name: str):
+    """Read a field from an ORM object or a plain dict (archived rows)."""
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def encode_cursor(row, sort_attr: str) -> str:
+    """Opaque cursor pointing just after `row` in (sort_attr DESC, id DESC) order."""
+    payload = [_value(row, sort_attr).isoformat(), _value(row, "id")]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str], sort_type):
+    """Return (sort value, id) from a cursor, or None when no cursor was given."""
+    if not cursor:
+        return None
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return sort_type.fromisoformat(value), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def keyset_filter(sort_column, id_column, position):
+    """SQL condition selecting rows after the cursor position in descending order."""
+    value, row_id = position
+    return or_(sort_column < value, and_(sort_column == value, id_column < row_id))
+
+
+def date_bounds(date_from: Optional[date], date_to: Optional[date], sort_type):
+    """Inclusive from/to dates as (lower, upper) bounds in the sort column's type."""
+    lower = upper = None
+    if date_from:
+        lower = datetime.combine(date_from, datetime.min.time()) if sort_type is datetime else date_from
+    if date_to:
+        upper = datetime.combine(date_to, datetime.max.time()) if sort_type is datetime else date_to
+    return lower, upper
+
+
+def in_page_window(row, sort_attr: str, lower, upper, position) -> bool:
+    """Python equivalent of the SQL filters, for rows that do not come from the database."""
+    value = _value(row, sort_attr)
+    if lower is not None and value < lower:
+        return False
+    if upper is not None and value > upper:
+        return False
+    if position is not None:
+        return (value, _value(row, "id")) < position
+    return True
+
+
+def paginate(rows: list, limit: int, sort_attr: str):
+    """
+    Order rows by (sort_attr, id) descending and cut one page.
+    Expects up to limit + 1 rows; returns (page, next cursor or None).
+    """
+    rows = sorted(rows, key=lambda row: (_value(row, sort_attr), _value(row, "id")), reverse=True)
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(page[-1], sort_attr)
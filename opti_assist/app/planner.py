@@ -0,0 +1,118 @@
+import argparse
+from datetime import date, timedelta
+
+from sqlalchemy import Date, select, insert, literal, union_all, func, or_, exists
+from sqlalchemy.orm import Session
+
+from . import models, database, tenancy
+
+# Maintenance types that count as a completed service for interval purposes
+SERVICE_TYPES = ("Preventive", "Inspection")
+
+
+def plan_preventive_maintenance(db: Session, as_of: date = None) -> dict:
+    """
+    Create 'Scheduled' preventive maintenance logs for every asset that is due.
+
+    An asset is due when its last preventive service (or, failing that, its purchase
+    date) is older than its category's maintenance interval and it has no open
+    scheduled work order. Everything happens in a single INSERT ... SELECT, so the
+    database does the work regardless of fleet size.
+    """
+    as_of = as_of or date.today()
+    categories = (
+        db.query(models.AssetCategory.id, models.AssetCategory.maintenance_interval_days)
+        .filter(models.AssetCategory.maintenance_interval_days.isnot(None))
+        .all()
+    )
+    if not categories:
+        return {"as_of": as_of, "created": 0, "batches": []}
+
+    # Per-category cutoff dates, computed here so the query stays dialect-neutral
+    cutoffs = union_all(*[
+        select(
+            literal(category_id).label("category_id"),
+            literal(as_of - timedelta(days=interval), Date).label("cutoff"),
+        )
+        for category_id, interval in categories
+    ]).subquery("cutoffs")
+
+    log = models.MaintenanceLog
+    last_service = (
+        select(log.asset_id, func.max(func.coalesce(log.completion_date, log.start_date)).label("last_date"))
+        .where(log.maintenance_type.in_(SERVICE_TYPES), log.status != "Scheduled")
+        .group_by(log.asset_id)
+        .subquery()
+    )
+    baseline = func.coalesce(last_service.c.last_date, models.Asset.purchase_date)
+    open_work_order = exists().where(log.asset_id == models.Asset.id, log.status == "Scheduled")
+
+    due = (
+        select(
+            models.Asset.id,
+            literal("Preventive"),
+            literal("Planned preventive maintenance"),
+            models.Asset.vendor_id,
+            literal(as_of, Date),
+            literal("Scheduled"),
+        )
+        .join(cutoffs, cutoffs.c.category_id == models.Asset.category_id)
+        .outerjoin(last_service, last_service.c.asset_id == models.Asset.id)
+        .where(
+            models.Asset.status.notin_(("Retired", "Lost")),
+            or_(baseline.is_(None), baseline <= cutoffs.c.cutoff),
+            ~open_work_order,
+        )
+    )
+    created = db.execute(
+        insert(log).from_select(
+            ["asset_id", "maintenance_type", "description", "vendor_id", "start_date", "status"], due
+        )
+    ).rowcount
+    db.commit()
+    return {"as_of": as_of, "created": created, "batches": scheduled_batches(db, due_date=as_of)}
+
+
+def scheduled_batches(db: Session, vendor_id: int = None, location_id: int = None, due_date: date = None) -> list:
+    """
+    Group open scheduled work orders by vendor and asset location so technicians can batch visits.
+    """
+    log = models.MaintenanceLog
+    query = (
+        db.query(
+            log.vendor_id,
+            models.Asset.current_location_id.label("location_id"),
+            func.count(log.id).label("work_orders"),
+            func.min(log.start_date).label("earliest_due"),
+        )
+        .join(models.Asset, models.Asset.id == log.asset_id)
+        .filter(log.status == "Scheduled")
+    )
+    if vendor_id is not None:
+        query = query.filter(log.vendor_id == vendor_id)
+    if location_id is not None:
+        query = query.filter(models.Asset.current_location_id == location_id)
+    if due_date is not None:
+        query = query.filter(log.start_date == due_date)
+    rows = (
+        query.group_by(log.vendor_id, models.Asset.current_location_id)
+        .order_by(func.count(log.id).desc())
+        .all()
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Schedule preventive maintenance for every asset that is due")
+    parser.add_argument("--tenant", type=int, help="Only plan for this tenant (default: every tenant)")
+    args = parser.parse_args()
+
+    database.init_engine()
+    db = database.SessionLocal()
+    try:
+        for tenant_id in [args.tenant] if args.tenant is not None else tenancy.tenant_ids(db):
+            with tenancy.tenant_context(tenant_id):
+                result = plan_preventive_maintenance(db)
+                print(f"Tenant {tenant_id}: scheduled {result['created']} preventive work orders in {len(result['batches'])} batches.")
+    finally:
+        db.close()
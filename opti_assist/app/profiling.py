@@ -0,0 +1,239 @@
+"""
+On-demand and sampled profiling of API requests.
+
+A request is profiled when it carries `X-Profile: <PROFILE_TOKEN>` (on demand;
+disabled while PROFILE_TOKEN is unset) or is picked at random with probability
+PROFILE_SAMPLE_RATE. Its endpoint function runs under cProfile, in the thread
+that executes it, and every SQL statement it issues is recorded with its
+duration (statement text only, no parameters). The last PROFILE_KEEP profiles
+are kept in memory and served by /api/admin/profiles; the response carries
+`X-Profile-ID`. Reading them requires `Authorization: Bearer <PROFILE_TOKEN>`,
+and a tenant only sees the profiles of its own requests.
+
+cProfile hooks a whole thread, and async endpoints share the event loop thread,
+so only one async endpoint is run under cProfile at a time; concurrent profiled
+async requests still record their SQL statements and duration.
+
+Requests that are not profiled pay one random draw and a context-variable check
+per endpoint call and per SQL statement, so sampling 1% of traffic costs about
+1% of one profiled request's overhead on average.
+"""
+import asyncio
+import cProfile
+import functools
+import hmac
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Header, HTTPException
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers, MutableHeaders
+
+from . import tenancy
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-ID"
+# Secret that enables on-demand profiling through the X-Profile header (unset: disabled)
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+# Fraction of requests profiled at random (0 disables sampling; 0.01 profiles 1%)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Profiles kept in memory by this process
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "100"))
+# Functions listed in a profile's text report
+PROFILE_STATS_LIMIT = 40
+
+_ids = itertools.count(1)
+_profiles = deque(maxlen=PROFILE_KEEP)
+_lock = threading.Lock()
+_capture: ContextVar[Optional["Capture"]] = ContextVar("profile_capture", default=None)
+# Set while an async endpoint runs under cProfile on the event loop thread
+_loop_profiling = False
+
+
+class Capture:
+    """Everything recorded while profiling one request."""
+
+    def __init__(self, method: str, path: str, trigger: str):
+        self.id = next(_ids)
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.tenant_id = tenancy.current_tenant_id()
+        self.started_at = datetime.utcnow()
+        self.status_code = None
+        self.duration_ms = None
+        self.statements = []  # [statement, duration ms]
+        self.stats = None  # pstats.Stats of the endpoint function
+
+    def add_profile(self, profiler: cProfile.Profile):
+        with _lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler)
+            else:
+                self.stats.add(profiler)
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "tenant_id": self.tenant_id,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "sql_count": len(self.statements),
+            "sql_ms": round(sum(duration for _, duration in self.statements), 3),
+        }
+
+    def detail(self) -> dict:
+        report = ""
+        if self.stats is not None:
+            stream = io.StringIO()
+            self.stats.stream = stream
+            self.stats.sort_stats("cumulative").print_stats(PROFILE_STATS_LIMIT)
+            report = stream.getvalue()
+        return {
+            **self.summary(),
+            "sql": [{"statement": statement, "duration_ms": duration} for statement, duration in self.statements],
+            "stats": report,
+        }
+
+    def pstats_dump(self) -> bytes:
+        """The profile in the `.prof` format read by pstats, snakeviz and similar tools."""
+        return marshal.dumps(self.stats.stats if self.stats is not None else {})
+
+
+def require_token(authorization: Optional[str] = Header(None)):
+    """Dependency guarding the profile endpoints: `Authorization: Bearer <PROFILE_TOKEN>`."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if not PROFILE_TOKEN or scheme.lower() != "bearer" or not hmac.compare_digest(token.strip(), PROFILE_TOKEN):
+        raise HTTPException(status_code=403, detail="Profiles require Authorization: Bearer <PROFILE_TOKEN>.")
+
+
+def list_profiles() -> list:
+    """Profiles of the current tenant's requests, newest first."""
+    tenant_id = tenancy.current_tenant_id()
+    with _lock:
+        return [capture.summary() for capture in reversed(_profiles) if capture.tenant_id == tenant_id]
+
+
+def get_profile(profile_id: int) -> Optional[Capture]:
+    """One profile of the current tenant's requests, or None."""
+    tenant_id = tenancy.current_tenant_id()
+    with _lock:
+        return next(
+            (capture for capture in _profiles if capture.id == profile_id and capture.tenant_id == tenant_id), None
+        )
+
+
+# --- SQL statements ---
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    if _capture.get() is not None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    capture = _capture.get()
+    if capture is not None and conn.info.get("profile_started"):
+        started = conn.info["profile_started"].pop()
+        capture.statements.append([statement, round((time.perf_counter() - started) * 1000, 3)])
+
+
+# --- Endpoint functions ---
+
+def _profiled(call):
+    """Wrap an endpoint so it runs under cProfile when its request is being captured."""
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def wrapper(*args, **kwargs):
+            global _loop_profiling
+            capture = _capture.get()
+            if capture is None or _loop_profiling:
+                # Enabling a second profiler would take the thread's hook from the first
+                return await call(*args, **kwargs)
+            # Other requests' coroutines interleave on the event loop and show up too
+            _loop_profiling = True
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                profiler.disable()
+                _loop_profiling = False
+                capture.add_profile(profiler)
+        return wrapper
+
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        capture = _capture.get()
+        if capture is None:
+            return call(*args, **kwargs)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            profiler.disable()
+            capture.add_profile(profiler)
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """Route class of the API routers: endpoints run under cProfile when their request is being profiled."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _profiled(endpoint), **kwargs)
+
+
+class ProfilingMiddleware:
+    """Decide which requests to profile, time them and keep their profiles."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = Headers(scope=scope).get(PROFILE_HEADER)
+        if PROFILE_TOKEN and requested == PROFILE_TOKEN:
+            trigger = "requested"
+        elif PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            trigger = "sampled"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        capture = Capture(scope["method"], scope["path"], trigger)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                capture.status_code = message["status"]
+                MutableHeaders(scope=message)[PROFILE_ID_HEADER] = str(capture.id)
+            await send(message)
+
+        token = _capture.set(capture)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            capture.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            _capture.reset(token)
+            with _lock:
+                _profiles.append(capture)
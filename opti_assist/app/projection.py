@@ -0,0 +1,122 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is optional; JSON is always available
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def _accepted_ranges(accept: str) -> dict:
+    """Media range -> q-value from an Accept header (an entry without q counts as q=1)."""
+    ranges = {}
+    for part in accept.split(","):
+        name, *params = part.strip().split(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges[name] = quality
+    return ranges
+
+
+def _quality(ranges: dict, media_type: str) -> float:
+    """q-value of the most specific range matching the media type, or 0 (not acceptable)."""
+    for candidate in (media_type, media_type.split("/")[0] + "/*", "*/*"):
+        if candidate in ranges:
+            return ranges[candidate]
+    return 0.0
+
+
+def _vary(headers: Optional[dict]) -> dict:
+    """Response headers plus `Vary: Accept` when the body format was negotiated."""
+    headers = dict(headers or {})
+    if msgpack is not None:
+        headers["Vary"] = "Accept"
+    return headers
+
+
+def wants_msgpack(request: Request, response: Optional[Response] = None) -> bool:
+    """
+    True if the client names MessagePack in Accept with a q-value above 0 and at least
+    JSON's (and the `msgpack` package is installed). Wildcards alone keep JSON.
+    `response` gets `Vary: Accept`, since its format now depends on that header.
+    """
+    if msgpack is None:
+        return False
+    if response is not None:
+        response.headers.update(_vary(None))
+    ranges = _accepted_ranges(request.headers.get("accept", ""))
+    packed = max(ranges.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    return packed > 0 and packed >= _quality(ranges, "application/json")
+
+
+def select_columns(model, schema, fields: Optional[str], all_columns: bool = False) -> Optional[List]:
+    """
+    Translate a `fields=` query value (comma-separated names) into model columns.
+
+    Only columns exposed by the read schema may be requested. Returns None when no
+    projection was asked for, so callers can fall back to loading full ORM objects;
+    with `all_columns` every schema column is selected instead (no ORM objects at all).
+    """
+    if not fields:
+        if all_columns:
+            return [getattr(model, name) for name in schema.model_fields if name in model.__table__.columns]
+        return None
+    allowed = set(schema.model_fields) & set(model.__table__.columns.keys())
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(sorted(allowed))}.",
+        )
+    if not names:
+        return None
+    return [getattr(model, name) for name in names]
+
+
+def projected_response(rows, headers: Optional[dict] = None, packed: bool = False) -> Response:
+    """Serialize column rows from a projected query, bypassing the full response model."""
+    if packed:
+        return msgpack_response([dict(row._mapping) for row in rows], headers)
+    return JSONResponse(content=jsonable_encoder([dict(row._mapping) for row in rows]), headers=_vary(headers))
+
+
+def msgpack_default(value):
+    """MessagePack has no date or decimal types: send them as in JSON (ISO strings, numbers)."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+
+def msgpack_response(items: list, headers: Optional[dict] = None, schema=None) -> Response:
+    """
+    Encode a list of dicts (or ORM objects, read through `schema`'s fields) as
+    MessagePack. The document has the same shape as the JSON response.
+    """
+    if schema is not None:
+        names = list(schema.model_fields)
+        items = [
+            {name: item.get(name) for name in names} if isinstance(item, dict)
+            else {name: getattr(item, name) for name in names}
+            for item in items
+        ]
+    body = msgpack.packb(items, default=msgpack_default)
+    return Response(content=body, media_type=MSGPACK_MEDIA_TYPES[0], headers=_vary(headers))
@@ -0,0 +1,105 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from typing import List
+
+from .. import models, schemas, database, admission, integrity, profiling
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"], route_class=profiling.ProfiledRoute)
+
+
+@router.get("/integrity", response_model=List[schemas.IntegrityLink])
+def get_integrity_report(
+    sample_size: int = Query(20, ge=0, le=500, description="Offending rows listed per link"),
+    db: Session = Depends(database.get_read_db)
+):
+    """
+    Orphaned soft links found by the last integrity scan, per link.
+    Scans run on the scheduler, via `python -m app.integrity` or `POST /api/admin/integrity/scan`.
+    """
+    return integrity.integrity_report(db, sample_size=sample_size)
+
+
+@router.post("/integrity/scan", response_model=List[schemas.IntegrityLink])
+def run_integrity_scan(
+    full: bool = Query(False, description="Rescan every row instead of only rows changed since the last scan"),
+    db: Session = Depends(database.get_db)
+):
+    """
+    Run the integrity scanner now and return the refreshed report.
+    Full scans of large tables are better queued as an `integrity_scan` job.
+    """
+    integrity.scan(db, full=full)
+    return integrity.integrity_report(db)
+
+
+@router.get("/tenants", response_model=List[schemas.Tenant])
+def list_tenants(db: Session = Depends(database.get_read_db)):
+    """
+    List the companies (tenants) hosted by this installation.
+    """
+    return db.query(models.Tenant).order_by(models.Tenant.id).all()
+
+
+@router.post("/tenants", response_model=schemas.Tenant, status_code=201)
+def create_tenant(tenant: schemas.TenantCreate, db: Session = Depends(database.get_db)):
+    """
+    Onboard a company as a new tenant.
+
+    - **code**: Short unique company code (e.g., 'ACME').
+    - **name**: Company name.
+
+    Requests for the tenant carry its id in the `X-Tenant-ID` header; its data starts empty.
+    """
+    if db.query(models.Tenant).filter(models.Tenant.code == tenant.code).first():
+        raise HTTPException(status_code=400, detail="Tenant code already exists.")
+    db_tenant = models.Tenant(**tenant.model_dump())
+    db.add(db_tenant)
+    db.commit()
+    db.refresh(db_tenant)
+    return db_tenant
+
+
+@router.get("/metrics", response_model=schemas.AdmissionMetrics)
+def get_metrics():
+    """
+    Admission control counters of this API process (admitted, rate-limited and shed
+    requests, requests in flight) and the state of its database connection pool.
+    """
+    return admission.metrics()
+
+
+@router.get("/profiles", response_model=List[schemas.ProfileSummary], dependencies=[Depends(profiling.require_token)])
+def list_profiles():
+    """
+    The tenant's requests profiled by this API process, newest first (of the last PROFILE_KEEP).
+    A request is profiled when it sends `X-Profile: <PROFILE_TOKEN>`, or at random
+    with probability PROFILE_SAMPLE_RATE. Requires `Authorization: Bearer <PROFILE_TOKEN>`.
+    """
+    return profiling.list_profiles()
+
+
+@router.get("/profiles/{profile_id}", response_model=schemas.ProfileDetail, dependencies=[Depends(profiling.require_token)])
+def get_profile(profile_id: int):
+    """
+    One profiled request: its SQL statements with durations and the cProfile
+    report of its endpoint function (by cumulative time).
+    """
+    capture = profiling.get_profile(profile_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Profile not found (it may have been evicted).")
+    return capture.detail()
+
+
+@router.get("/profiles/{profile_id}/pstats", dependencies=[Depends(profiling.require_token)])
+def download_profile(profile_id: int):
+    """
+    Download the raw profile in the `.prof` format (pstats, snakeviz).
+    """
+    capture = profiling.get_profile(profile_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Profile not found (it may have been evicted).")
+    return Response(
+        content=capture.pstats_dump(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'},
+    )
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
 
-from .. import models, schemas, database
+from .. import models, schemas, database, counting, filtering, forecast, holdings, lifecycle, live, pagination, projection, profiling
+from ..archive import read_archived
 
-router = APIRouter(prefix="/api/assets", tags=["Assets"])
+router = APIRouter(prefix="/api/assets", tags=["Assets"], route_class=profiling.ProfiledRoute)
 
 
 @router.post("/", response_model=schemas.Asset, status_code=201)
@@ -14,22 +16,36 @@ def create_asset(asset: schemas.AssetCreate, db: Session = Depends(database.get_
     Register a new physical asset in the system.
     
     - **asset_tag**: Unique identifier (barcode/RFID).
-    - **status**: Defaults to 'In Stock'.
+    - **status**: Must be 'In Stock' (the default); other statuses are reached through assignments, maintenance and the lifecycle endpoints.
+    - **current_employee_id**: Optional holder; the asset is then assigned to them with an assignment history record.
     """
     # Check for duplicate asset_tag
     existing = db.query(models.Asset).filter(models.Asset.asset_tag == asset.asset_tag).first()
     if existing:
         raise HTTPException(status_code=400, detail=f"Asset with tag '{asset.asset_tag}' already exists.")
     
-    db_asset = models.Asset(**asset.dict())
-    db.add(db_asset)
+    if asset.status != lifecycle.IN_STOCK:
+        raise HTTPException(
+            status_code=400,
+            detail=f"New assets start '{lifecycle.IN_STOCK}', not '{asset.status}'. Assign or change them afterwards.",
+        )
+    
+    # A new asset enters the refresh forecast, and the holdings of its holder if it has one
+    tracked = models.Asset.asset_tag == asset.asset_tag
+    with holdings.tracking(db, tracked), forecast.tracking(db, tracked):
+        db_asset = models.Asset(**asset.model_dump(exclude={"current_employee_id"}))
+        db.add(db_asset)
+        db.flush()
+        live.record(db, db_asset, "create")
+        if asset.current_employee_id is not None:
+            lifecycle.assign(db, db_asset.id, asset.current_employee_id)
     db.commit()
     db.refresh(db_asset)
     return db_asset
 
 
 @router.get("/tag/{asset_tag}", response_model=schemas.Asset)
-def get_asset_by_tag(asset_tag: str, db: Session = Depends(database.get_db)):
+def get_asset_by_tag(asset_tag: str, db: Session = Depends(database.get_read_db)):
     """
     Retrieve asset details using its unique asset tag.
     """
@@ -41,22 +57,77 @@ def get_asset_by_tag(asset_tag: str, db: Session = Depends(database.get_db)):
 
 @router.get("/", response_model=List[schemas.Asset])
 def list_assets(
-    status: Optional[str] = Query(None, description="Filter by status (e.g., 'In Stock', 'Assigned')"),
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(database.get_db)
+    request: Request,
+    response: Response,
+    status: Optional[List[str]] = Query(None, description="Filter by status (e.g., 'In Stock', 'Assigned'); repeat for several"),
+    category_id: Optional[List[int]] = Query(None, description="Filter by category; repeat for several"),
+    vendor_id: Optional[List[int]] = Query(None, description="Filter by vendor; repeat for several"),
+    location_id: Optional[List[int]] = Query(None, description="Filter by current location; repeat for several"),
+    employee_id: Optional[int] = Query(None, description="Filter by current holder"),
+    condition_grade: Optional[List[str]] = Query(None, description="Filter by condition grade; repeat for several"),
+    purchased_from: Optional[date] = Query(None, description="Earliest purchase date (inclusive)"),
+    purchased_to: Optional[date] = Query(None, description="Latest purchase date (inclusive)"),
+    warranty_from: Optional[date] = Query(None, description="Earliest warranty expiry date (inclusive)"),
+    warranty_to: Optional[date] = Query(None, description="Latest warranty expiry date (inclusive)"),
+    cost_min: Optional[Decimal] = Query(None, description="Minimum purchase cost (inclusive)"),
+    cost_max: Optional[Decimal] = Query(None, description="Maximum purchase cost (inclusive)"),
+    sort: Optional[str] = Query(None, description="Comma-separated sort columns, '-' for descending (e.g., '-purchase_cost,asset_tag')"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return (e.g., 'asset_tag,asset_name,status')"),
+    count: str = Query("none", pattern=counting.COUNT_MODE_PATTERN, description="Total count in X-Total-Count: none, exact, cached or estimated"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: Session = Depends(database.get_read_db)
+):
+    """
+    List assets with optional filters, sorting and pagination support.
+    All filters are combined with AND into a single SQL query.
+    Use `fields` to fetch only the listed columns (the SQL SELECT is narrowed too).
+    Use `count` to get the total number of matching assets in `X-Total-Count`.
+    Send `Accept: application/msgpack` for a MessagePack body instead of JSON.
+    """
+    packed = projection.wants_msgpack(request, response)
+    columns = projection.select_columns(models.Asset, schemas.Asset, fields, all_columns=packed)
+    query = db.query(*columns) if columns else db.query(models.Asset)
+    query = filtering.filter_assets(
+        query,
+        status=status,
+        category_id=category_id,
+        vendor_id=vendor_id,
+        location_id=location_id,
+        employee_id=employee_id,
+        condition_grade=condition_grade,
+        purchased_from=purchased_from,
+        purchased_to=purchased_to,
+        warranty_from=warranty_from,
+        warranty_to=warranty_to,
+        cost_min=cost_min,
+        cost_max=cost_max,
+    )
+    headers = counting.set_total_count(response, db, query, models.Asset.__tablename__, count)
+    rows = filtering.sort_assets(query, sort).offset(skip).limit(limit).all()
+    return projection.projected_response(rows, headers, packed) if columns else rows
+
+
+@router.get("/events")
+async def stream_asset_events(
+    request: Request,
+    status: Optional[List[str]] = Query(None, description="Only changes leaving an asset in this status; repeat for several"),
+    category_id: Optional[List[int]] = Query(None, description="Only assets of this category; repeat for several"),
+    location_id: Optional[List[int]] = Query(None, description="Only assets at this location; repeat for several"),
 ):
     """
-    List all assets with optional filtering by status and pagination support.
+    Live feed of asset changes as server-sent events (`text/event-stream`).
+
+    Each event is named after the change (`create`, `update`, `assign`, `return`,
+    `start_repair`, `finish_repair`, `lose`, `find`, `retire`) and carries the asset's
+    state after it. Reconnect with `Last-Event-ID` to receive missed events; `resync`
+    means some were lost and the client should reload, `overflow` that it read too slowly.
     """
-    query = db.query(models.Asset)
-    if status:
-        query = query.filter(models.Asset.status == status)
-    return query.offset(skip).limit(limit).all()
+    return live.event_stream(request, statuses=status, category_ids=category_id, location_ids=location_id)
 
 
 @router.get("/{asset_id}", response_model=schemas.Asset)
-def get_asset(asset_id: int, db: Session = Depends(database.get_db)):
+def get_asset(asset_id: int, db: Session = Depends(database.get_read_db)):
     """
     Retrieve full specifications of a specific asset by its database ID.
     """
@@ -71,15 +142,32 @@ def update_asset(asset_id: int, asset_update: schemas.AssetUpdate, db: Session =
     """
     Update metadata for an existing asset.
     Allows partial updates for condition, notes, location, etc.
+    `status` may only be set to 'Lost', or back from 'Lost'; other status changes
+    and holder changes have dedicated endpoints.
     """
     asset = db.query(models.Asset).filter(models.Asset.id == asset_id).first()
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found.")
     
-    update_data = asset_update.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(asset, key, value)
-    
+    update_data = asset_update.model_dump(exclude_unset=True)
+    if "current_employee_id" in update_data and update_data["current_employee_id"] != asset.current_employee_id:
+        raise HTTPException(status_code=400, detail="Use /api/assignments and /api/returns to change the holder.")
+    update_data.pop("current_employee_id", None)
+
+    # A new location or cost moves the holdings counters; a new category or
+    # purchase date moves the asset to another refresh quarter
+    with holdings.tracking(db, models.Asset.id == asset_id), forecast.tracking(db, models.Asset.id == asset_id):
+        # Status changes go through the lifecycle state machine
+        status = update_data.pop("status", None)
+        if status is not None and status != asset.status:
+            event = lifecycle.patch_event(asset.status, status)
+            asset = lifecycle.transition(db, asset_id, event, models.Asset.status == asset.status)
+        else:
+            live.record(db, asset, "update")
+
+        for key, value in update_data.items():
+            setattr(asset, key, value)
+
     asset.last_updated_at = datetime.utcnow()
     db.commit()
     db.refresh(asset)
@@ -95,44 +183,115 @@ def retire_asset(asset_id: int, db: Session = Depends(database.get_db)):
     asset = db.query(models.Asset).filter(models.Asset.id == asset_id).first()
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found.")
-    
-    asset.status = "Retired"
-    asset.last_updated_at = datetime.utcnow()
+    if asset.status == lifecycle.RETIRED:
+        return {"message": f"Asset '{asset.asset_name}' (ID: {asset_id}) has been retired."}
+
+    holder_id = asset.current_employee_id
+    # A retired asset no longer counts towards its holder's holdings nor the refresh forecast
+    with holdings.tracking(db, models.Asset.id == asset_id), forecast.tracking(db, models.Asset.id == asset_id):
+        asset = lifecycle.transition(db, asset_id, "retire", models.Asset.current_employee_id == holder_id)
+
     db.commit()
     return {"message": f"Asset '{asset.asset_name}' (ID: {asset_id}) has been retired."}
 
 
 @router.get("/{asset_id}/history", response_model=List[schemas.AssetAssignmentHistory])
-def get_asset_history(asset_id: int, db: Session = Depends(database.get_db)):
+def get_asset_history(
+    asset_id: int,
+    request: Request,
+    response: Response,
+    date_from: Optional[date] = Query(None, alias="from", description="Earliest assignment date (inclusive)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Latest assignment date (inclusive)"),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE),
+    include_archived: bool = Query(False, description="Also return records moved to cold storage"),
+    db: Session = Depends(database.get_read_db)
+):
     """
-    Retrieve the complete assignment and movement history for a specific asset.
-    Ordered by assignment date (descending).
+    Retrieve the assignment and movement history for a specific asset.
+    Ordered by assignment date (descending); when more rows exist, the
+    `X-Next-Cursor` response header holds the cursor for the next page.
+    Send `Accept: application/msgpack` for a MessagePack body instead of JSON.
     """
     asset = db.query(models.Asset).filter(models.Asset.id == asset_id).first()
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found.")
     
+    history_model = models.AssetAssignmentHistory
+    position = pagination.decode_cursor(cursor, datetime)
+    lower, upper = pagination.date_bounds(date_from, date_to, datetime)
+    query = db.query(history_model).filter(history_model.asset_id == asset_id)
+    if lower is not None:
+        query = query.filter(history_model.assigned_date >= lower)
+    if upper is not None:
+        query = query.filter(history_model.assigned_date <= upper)
+    if position:
+        query = query.filter(pagination.keyset_filter(history_model.assigned_date, history_model.id, position))
     history = (
-        db.query(models.AssetAssignmentHistory)
-        .filter(models.AssetAssignmentHistory.asset_id == asset_id)
-        .order_by(models.AssetAssignmentHistory.assigned_date.desc())
+        query.order_by(history_model.assigned_date.desc(), history_model.id.desc())
+        .limit(limit + 1)
         .all()
     )
-    return history
+    if include_archived:
+        history += [
+            row for row in read_archived("asset_assignment_history", asset_id)
+            if pagination.in_page_window(row, "assigned_date", lower, upper, position)
+        ]
+
+    page, next_cursor = pagination.paginate(history, limit, "assigned_date")
+    headers = {pagination.NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    if projection.wants_msgpack(request, response):
+        return projection.msgpack_response(page, headers, schemas.AssetAssignmentHistory)
+    response.headers.update(headers)
+    return page
 
 
 @router.get("/{asset_id}/maintenance", response_model=List[schemas.MaintenanceLog])
-def get_asset_maintenance(asset_id: int, db: Session = Depends(database.get_db)):
+def get_asset_maintenance(
+    asset_id: int,
+    request: Request,
+    response: Response,
+    date_from: Optional[date] = Query(None, alias="from", description="Earliest start date (inclusive)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Latest start date (inclusive)"),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE),
+    include_archived: bool = Query(False, description="Also return records moved to cold storage"),
+    db: Session = Depends(database.get_read_db)
+):
     """
-    Retrieve all maintenance and repair logs associated with a specific asset.
+    Retrieve the maintenance and repair logs associated with a specific asset.
+    Ordered by start date (descending); when more rows exist, the
+    `X-Next-Cursor` response header holds the cursor for the next page.
+    Send `Accept: application/msgpack` for a MessagePack body instead of JSON.
     """
     asset = db.query(models.Asset).filter(models.Asset.id == asset_id).first()
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found.")
     
+    log_model = models.MaintenanceLog
+    position = pagination.decode_cursor(cursor, date)
+    lower, upper = pagination.date_bounds(date_from, date_to, date)
+    query = db.query(log_model).filter(log_model.asset_id == asset_id)
+    if lower is not None:
+        query = query.filter(log_model.start_date >= lower)
+    if upper is not None:
+        query = query.filter(log_model.start_date <= upper)
+    if position:
+        query = query.filter(pagination.keyset_filter(log_model.start_date, log_model.id, position))
     logs = (
-        db.query(models.MaintenanceLog)
-        .filter(models.MaintenanceLog.asset_id == asset_id)
+        query.order_by(log_model.start_date.desc(), log_model.id.desc())
+        .limit(limit + 1)
         .all()
     )
-    return logs
+    if include_archived:
+        logs += [
+            row for row in read_archived("maintenance_logs", asset_id)
+            if pagination.in_page_window(row, "start_date", lower, upper, position)
+        ]
+
+    page, next_cursor = pagination.paginate(logs, limit, "start_date")
+    headers = {pagination.NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    if projection.wants_msgpack(request, response):
+        return projection.msgpack_response(page, headers, schemas.MaintenanceLog)
+    response.headers.update(headers)
+    return page
@@ -3,9 +3,9 @@ from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime
 
-from .. import models, schemas, database
+from .. import models, schemas, database, forecast, holdings, lifecycle, profiling
 
-router = APIRouter(prefix="/api", tags=["Assignments"])
+router = APIRouter(prefix="/api", tags=["Assignments"], route_class=profiling.ProfiledRoute)
 
 
 @router.post("/assignments", response_model=schemas.AssetAssignmentHistory, status_code=201)
@@ -19,39 +19,14 @@ def assign_asset(request: schemas.AssignAssetRequest, db: Session = Depends(data
     
     This endpoint creates a new assignment history record and updates the asset's status and current holder.
     """
-    # Validate asset exists
-    asset = db.query(models.Asset).filter(models.Asset.id == request.asset_id).first()
-    if not asset:
-        raise HTTPException(status_code=404, detail="Asset not found.")
-    
-    if asset.status == "Assigned":
-        raise HTTPException(status_code=400, detail=f"Asset '{asset.asset_name}' is already assigned. Return it first.")
-    
-    if asset.status == "Retired":
-        raise HTTPException(status_code=400, detail=f"Asset '{asset.asset_name}' is retired and cannot be assigned.")
-
-    # Validate employee exists and is active
-    employee = db.query(models.Employee).filter(models.Employee.id == request.employee_id).first()
-    if not employee:
-        raise HTTPException(status_code=404, detail="Employee not found.")
-    
-    if employee.employment_status != "Active":
-        raise HTTPException(status_code=400, detail=f"Employee '{employee.first_name} {employee.last_name}' is not active.")
-
-    # Create assignment history record
-    assignment = models.AssetAssignmentHistory(
-        asset_id=request.asset_id,
-        employee_id=request.employee_id,
-        assigned_date=datetime.utcnow(),
-        assigned_by_admin_id=request.assigned_by_admin_id,
-        notes=request.notes,
-    )
-    db.add(assignment)
-
-    # Update the asset
-    asset.current_employee_id = request.employee_id
-    asset.status = "Assigned"
-    asset.last_updated_at = datetime.utcnow()
+    # The asset now counts towards the employee's holdings and department in the refresh forecast
+    tracked = models.Asset.id == request.asset_id
+    with holdings.tracking(db, tracked), forecast.tracking(db, tracked):
+        # Move the asset to 'Assigned' only if it is still 'In Stock' (checked in the UPDATE itself)
+        assignment = lifecycle.assign(
+            db, request.asset_id, request.employee_id,
+            assigned_by_admin_id=request.assigned_by_admin_id, notes=request.notes,
+        )
 
     db.commit()
     db.refresh(assignment)
@@ -66,14 +41,22 @@ def return_asset(request: schemas.ReturnAssetRequest, db: Session = Depends(data
     - **asset_id**: The ID of the asset being returned.
     
     This marks the current assignment as completed (sets returned_date) and resets the asset's status to 'In Stock'.
+    An asset returned while in repair stays 'In Repair' and goes to stock once the repair is finished.
+    Returning an asset nobody holds answers 409.
     """
     # Validate asset exists
     asset = db.query(models.Asset).filter(models.Asset.id == request.asset_id).first()
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found.")
-    
-    if asset.status != "Assigned":
-        raise HTTPException(status_code=400, detail=f"Asset '{asset.asset_name}' is not currently assigned.")
+    holder_id = asset.current_employee_id
+
+    # Releases the holdings counted against the previous holder
+    tracked = models.Asset.id == request.asset_id
+    with holdings.tracking(db, tracked), forecast.tracking(db, tracked):
+        # Released only if still held by the same holder (checked in the UPDATE itself)
+        asset = lifecycle.transition(
+            db, request.asset_id, "return", models.Asset.current_employee_id == holder_id, current_employee_id=None
+        )
 
     # Find the open assignment record (no returned_date)
     assignment = (
@@ -90,10 +73,5 @@ def return_asset(request: schemas.ReturnAssetRequest, db: Session = Depends(data
         if request.notes:
             assignment.notes = (assignment.notes or "") + f" | Return note: {request.notes}"
 
-    # Update the asset
-    asset.current_employee_id = None
-    asset.status = "In Stock"
-    asset.last_updated_at = datetime.utcnow()
-
     db.commit()
     return {"message": f"Asset '{asset.asset_name}' (ID: {request.asset_id}) has been returned to inventory."}
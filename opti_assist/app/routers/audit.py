@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from .. import models, schemas, database, audit, tenancy, profiling
+
+router = APIRouter(prefix="/api/audit", tags=["Audit"], route_class=profiling.ProfiledRoute)
+
+
+def _check_location(db: Session, location_id: int):
+    if db.query(models.Location.id).filter(models.Location.id == location_id).first() is None:
+        raise HTTPException(status_code=404, detail="Location not found.")
+
+
+@router.get("/snapshot")
+def download_audit_snapshot(
+    background_tasks: BackgroundTasks,
+    location_id: int = Query(..., description="Location being audited"),
+    db: Session = Depends(database.get_read_db),
+):
+    """
+    Download the offline audit snapshot of a location: a gzip-compressed SQLite file
+    with tables `assets` (indexed by tag and serial number), `employees` (the holders),
+    `categories` and `snapshot_info`.
+    """
+    _check_location(db, location_id)
+    path = audit.build_snapshot(db, location_id)
+    background_tasks.add_task(audit.remove_snapshot, path)
+    filename = f"audit-tenant{tenancy.current_tenant_id()}-location{location_id}-{datetime.utcnow():%Y%m%dT%H%M%S}.sqlite.gz"
+    return FileResponse(path, media_type="application/gzip", filename=filename)
+
+
+@router.post("/reconcile", response_model=schemas.AuditReconcileResult)
+def reconcile_audit(request: schemas.AuditReconcileRequest, db: Session = Depends(database.get_read_db)):
+    """
+    Compare the tags scanned at a location with the assets expected there.
+
+    - **found**: scanned and recorded at this location.
+    - **missing**: recorded at this location (and not retired) but not scanned.
+    - **misplaced**: scanned here but recorded elsewhere, or retired.
+    - **unknown**: scanned tags matching no asset.
+    """
+    if len(request.asset_tags) > audit.MAX_RECONCILE_TAGS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {audit.MAX_RECONCILE_TAGS} tags per request; split the batch.",
+        )
+    _check_location(db, request.location_id)
+    return audit.reconcile(db, request.location_id, request.asset_tags)
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List
 
-from .. import models, schemas, database
+from .. import models, schemas, database, forecast, integrity, pagination, profiling
 
-router = APIRouter(prefix="/api/asset-categories", tags=["Asset Categories"])
+router = APIRouter(prefix="/api/asset-categories", tags=["Asset Categories"], route_class=profiling.ProfiledRoute)
 
 
 @router.post("/", response_model=schemas.AssetCategory, status_code=201)
@@ -12,7 +12,7 @@ def create_category(category: schemas.AssetCategoryCreate, db: Session = Depends
     """
     Create a new asset category (e.g., Laptops, Furniture).
     """
-    db_category = models.AssetCategory(**category.dict())
+    db_category = models.AssetCategory(**category.model_dump())
     db.add(db_category)
     db.commit()
     db.refresh(db_category)
@@ -20,7 +20,7 @@ def create_category(category: schemas.AssetCategoryCreate, db: Session = Depends
 
 
 @router.get("/", response_model=List[schemas.AssetCategory])
-def list_categories(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
+def list_categories(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE), db: Session = Depends(database.get_read_db)):
     """
     Retrieve a list of all asset categories.
     """
@@ -28,7 +28,7 @@ def list_categories(skip: int = 0, limit: int = 100, db: Session = Depends(datab
 
 
 @router.get("/{category_id}", response_model=schemas.AssetCategory)
-def get_category(category_id: int, db: Session = Depends(database.get_db)):
+def get_category(category_id: int, db: Session = Depends(database.get_read_db)):
     """
     Retrieve details of a single category by its ID.
     """
@@ -39,7 +39,7 @@ def get_category(category_id: int, db: Session = Depends(database.get_db)):
 
 
 @router.get("/{category_id}/assets", response_model=List[schemas.Asset])
-def get_assets_by_category(category_id: int, db: Session = Depends(database.get_db)):
+def get_assets_by_category(category_id: int, db: Session = Depends(database.get_read_db)):
     """
     List all assets belonging to a specific category.
     """
@@ -60,23 +60,31 @@ def update_category(category_id: int, cat_update: schemas.AssetCategoryUpdate, d
     if not cat:
         raise HTTPException(status_code=404, detail="Asset category not found.")
     
-    for key, value in cat_update.dict(exclude_unset=True).items():
-        setattr(cat, key, value)
-    
+    # A new depreciation period moves the category's assets to other refresh quarters
+    with forecast.tracking(db, models.Asset.category_id == category_id):
+        for key, value in cat_update.model_dump(exclude_unset=True).items():
+            setattr(cat, key, value)
+
     db.commit()
     db.refresh(cat)
     return cat
 
 
 @router.delete("/{category_id}")
-def delete_category(category_id: int, db: Session = Depends(database.get_db)):
+def delete_category(
+    category_id: int,
+    on_references: str = Query("ignore", pattern=integrity.ON_REFERENCES_PATTERN, description="When still referenced: ignore, refuse (409) or cascade (clear the references)"),
+    db: Session = Depends(database.get_db)
+):
     """
     Delete an asset category from the system.
+    Rows pointing at it are checked with one indexed existence query (see `on_references`).
     """
     cat = db.query(models.AssetCategory).filter(models.AssetCategory.id == category_id).first()
     if not cat:
         raise HTTPException(status_code=404, detail="Asset category not found.")
     
+    integrity.guard_delete(db, models.AssetCategory, category_id, on_references)
     db.delete(cat)
     db.commit()
     return {"message": f"Category '{cat.category_name}' (ID: {category_id}) deleted."}
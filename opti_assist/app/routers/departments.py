@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List
 
-from .. import models, schemas, database
+from .. import models, schemas, database, integrity, pagination, profiling
 
-router = APIRouter(prefix="/api/departments", tags=["Departments"])
+router = APIRouter(prefix="/api/departments", tags=["Departments"], route_class=profiling.ProfiledRoute)
 
 
 @router.post("/", response_model=schemas.Department, status_code=201)
@@ -12,7 +12,7 @@ def create_department(department: schemas.DepartmentCreate, db: Session = Depend
     """
     Create a new organizational department.
     """
-    db_department = models.Department(**department.dict())
+    db_department = models.Department(**department.model_dump())
     db.add(db_department)
     db.commit()
     db.refresh(db_department)
@@ -20,7 +20,7 @@ def create_department(department: schemas.DepartmentCreate, db: Session = Depend
 
 
 @router.get("/", response_model=List[schemas.Department])
-def list_departments(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
+def list_departments(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE), db: Session = Depends(database.get_read_db)):
     """
     Retrieve a list of all departments.
     """
@@ -28,7 +28,7 @@ def list_departments(skip: int = 0, limit: int = 100, db: Session = Depends(data
 
 
 @router.get("/{department_id}", response_model=schemas.Department)
-def get_department(department_id: int, db: Session = Depends(database.get_db)):
+def get_department(department_id: int, db: Session = Depends(database.get_read_db)):
     """
     Retrieve details of a single department by its ID.
     """
@@ -47,7 +47,7 @@ def update_department(department_id: int, dept_update: schemas.DepartmentUpdate,
     if not dept:
         raise HTTPException(status_code=404, detail="Department not found.")
     
-    for key, value in dept_update.dict(exclude_unset=True).items():
+    for key, value in dept_update.model_dump(exclude_unset=True).items():
         setattr(dept, key, value)
     
     db.commit()
@@ -56,14 +56,20 @@ def update_department(department_id: int, dept_update: schemas.DepartmentUpdate,
 
 
 @router.delete("/{department_id}")
-def delete_department(department_id: int, db: Session = Depends(database.get_db)):
+def delete_department(
+    department_id: int,
+    on_references: str = Query("ignore", pattern=integrity.ON_REFERENCES_PATTERN, description="When still referenced: ignore, refuse (409) or cascade (clear the references)"),
+    db: Session = Depends(database.get_db)
+):
     """
     Delete a department from the system.
+    Rows pointing at it are checked with one indexed existence query (see `on_references`).
     """
     dept = db.query(models.Department).filter(models.Department.id == department_id).first()
     if not dept:
         raise HTTPException(status_code=404, detail="Department not found.")
     
+    integrity.guard_delete(db, models.Department, department_id, on_references)
     db.delete(dept)
     db.commit()
     return {"message": f"Department '{dept.name}' (ID: {department_id}) deleted."}
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from .. import models, schemas, database
+from .. import models, schemas, database, counting, forecast, holdings, jobs, pagination, projection, profiling
+from ..offboarding import offboard_employees
 
-router = APIRouter(prefix="/api/employees", tags=["Employees"])
+router = APIRouter(prefix="/api/employees", tags=["Employees"], route_class=profiling.ProfiledRoute)
 
 
 @router.post("/", response_model=schemas.Employee, status_code=201)
@@ -24,7 +25,7 @@ def create_employee(employee: schemas.EmployeeCreate, db: Session = Depends(data
     if existing_email:
         raise HTTPException(status_code=400, detail=f"Employee with email '{employee.email}' already exists.")
     
-    db_employee = models.Employee(**employee.dict())
+    db_employee = models.Employee(**employee.model_dump())
     db.add(db_employee)
     db.commit()
     db.refresh(db_employee)
@@ -33,22 +34,33 @@ def create_employee(employee: schemas.EmployeeCreate, db: Session = Depends(data
 
 @router.get("/", response_model=List[schemas.Employee])
 def list_employees(
+    request: Request,
+    response: Response,
     status: Optional[str] = Query(None, description="Filter by employment status (e.g., 'Active', 'Inactive')"),
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(database.get_db)
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return (e.g., 'employee_code,email')"),
+    count: str = Query("none", pattern=counting.COUNT_MODE_PATTERN, description="Total count in X-Total-Count: none, exact, cached or estimated"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: Session = Depends(database.get_read_db)
 ):
     """
     List all employees with optional status filtering and pagination.
+    Use `fields` to fetch only the listed columns (the SQL SELECT is narrowed too).
+    Use `count` to get the total number of matching employees in `X-Total-Count`.
+    Send `Accept: application/msgpack` for a MessagePack body instead of JSON.
     """
-    query = db.query(models.Employee)
+    packed = projection.wants_msgpack(request, response)
+    columns = projection.select_columns(models.Employee, schemas.Employee, fields, all_columns=packed)
+    query = db.query(*columns) if columns else db.query(models.Employee)
     if status:
         query = query.filter(models.Employee.employment_status == status)
-    return query.offset(skip).limit(limit).all()
+    headers = counting.set_total_count(response, db, query, models.Employee.__tablename__, count)
+    rows = query.order_by(models.Employee.id).offset(skip).limit(limit).all()
+    return projection.projected_response(rows, headers, packed) if columns else rows
 
 
 @router.get("/{employee_id}", response_model=schemas.EmployeeWithAssets)
-def get_employee_with_assets(employee_id: int, db: Session = Depends(database.get_db)):
+def get_employee_with_assets(employee_id: int, db: Session = Depends(database.get_read_db)):
     """
     Retrieve an employee's profile including a list of all assets currently assigned to them.
     """
@@ -90,10 +102,13 @@ def update_employee(employee_id: int, employee_update: schemas.EmployeeUpdate, d
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found.")
     
-    update_data = employee_update.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(employee, key, value)
-    
+    update_data = employee_update.model_dump(exclude_unset=True)
+    # Assets follow their holder's department in the holdings counters and the refresh forecast
+    held = models.Asset.current_employee_id == employee_id
+    with holdings.tracking(db, held), forecast.tracking(db, held):
+        for key, value in update_data.items():
+            setattr(employee, key, value)
+
     db.commit()
     db.refresh(employee)
     return employee
@@ -113,3 +128,46 @@ def deactivate_employee(employee_id: int, db: Session = Depends(database.get_db)
     db.commit()
     db.refresh(employee)
     return employee
+
+
+@router.post("/{employee_id}/offboard", response_model=schemas.OffboardResult)
+def offboard_employee(employee_id: int, db: Session = Depends(database.get_db)):
+    """
+    Offboard an employee in one transaction: close their open assignments,
+    return all their assets to inventory and set their status to 'Inactive'.
+    """
+    employee = db.query(models.Employee).filter(models.Employee.id == employee_id).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found.")
+
+    return offboard_employees(db, [employee_id])
+
+
+@router.post("/offboard", response_model=schemas.OffboardResult)
+def offboard_employee_batch(
+    request: schemas.OffboardRequest,
+    response: Response,
+    db: Session = Depends(database.get_db)
+):
+    """
+    Offboard a batch of employees identified by ID and/or employee code.
+
+    - **run_async**: Queue the work as a background job and return immediately with
+      status 202; poll `GET /api/jobs/{job_id}` for the outcome.
+    """
+    ids = set(request.employee_ids)
+    if request.employee_codes:
+        rows = (
+            db.query(models.Employee.id)
+            .filter(models.Employee.employee_code.in_(request.employee_codes))
+            .all()
+        )
+        ids.update(row.id for row in rows)
+    if not ids:
+        raise HTTPException(status_code=404, detail="No matching employees found.")
+
+    if request.run_async:
+        job = jobs.enqueue(db, "offboard", {"employee_ids": sorted(ids)})
+        response.status_code = 202
+        return {"queued": True, "job_id": job.id}
+    return offboard_employees(db, sorted(ids))
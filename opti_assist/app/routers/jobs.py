@@ -0,0 +1,78 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from .. import models, schemas, database, jobs, profiling
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"], route_class=profiling.ProfiledRoute)
+
+# Job status is polled for progress, so reads go to the primary rather than a lagging replica
+
+
+@router.post("/", response_model=schemas.Job, status_code=202)
+def submit_job(request: schemas.JobCreate, db: Session = Depends(database.get_db)):
+    """
+    Queue a long-running bulk operation for the background worker.
+
+    - **job_type**: One of the registered job types (e.g., 'export_assets', 'import_assets', 'hr_sync', 'offboard').
+    - **params**: Job-specific parameters. A `path` (hr_sync, import_assets) names a file in the import directory.
+
+    Poll `GET /api/jobs/{id}` for progress and the result.
+    """
+    if request.job_type not in jobs.JOB_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown job type '{request.job_type}'. Use one of: {', '.join(sorted(jobs.JOB_TYPES))}.",
+        )
+    if "path" in request.params:
+        try:
+            jobs.import_path(str(request.params["path"]))
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error))
+    return jobs.enqueue(db, request.job_type, request.params)
+
+
+@router.get("/", response_model=List[schemas.Job])
+def list_jobs(
+    status: Optional[str] = Query(None, description="Filter by status (Queued, Running, Succeeded, Failed)"),
+    job_type: Optional[str] = Query(None, description="Filter by job type"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(database.get_db)
+):
+    """
+    List jobs, newest first.
+    """
+    query = db.query(models.Job)
+    if status:
+        query = query.filter(models.Job.status == status)
+    if job_type:
+        query = query.filter(models.Job.job_type == job_type)
+    return query.order_by(models.Job.id.desc()).limit(limit).all()
+
+
+@router.get("/{job_id}", response_model=schemas.Job)
+def get_job(job_id: int, db: Session = Depends(database.get_db)):
+    """
+    Retrieve a job's status, progress, and result or error.
+    """
+    job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
+@router.get("/{job_id}/download")
+def download_export(job_id: int, db: Session = Depends(database.get_db)):
+    """
+    Download the file written by a finished export job.
+    """
+    job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    path = jobs.export_path(job)
+    if path is None:
+        raise HTTPException(status_code=404, detail="This job has no export file to download.")
+    return FileResponse(path, media_type="application/gzip", filename=os.path.basename(path))
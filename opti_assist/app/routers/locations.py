@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List
 
-from .. import models, schemas, database
+from .. import models, schemas, database, integrity, pagination, profiling
 
-router = APIRouter(prefix="/api/locations", tags=["Locations"])
+router = APIRouter(prefix="/api/locations", tags=["Locations"], route_class=profiling.ProfiledRoute)
 
 
 @router.post("/", response_model=schemas.Location, status_code=201)
@@ -12,7 +12,7 @@ def create_location(location: schemas.LocationCreate, db: Session = Depends(data
     """
     Register a new physical location/site.
     """
-    db_location = models.Location(**location.dict())
+    db_location = models.Location(**location.model_dump())
     db.add(db_location)
     db.commit()
     db.refresh(db_location)
@@ -20,7 +20,7 @@ def create_location(location: schemas.LocationCreate, db: Session = Depends(data
 
 
 @router.get("/", response_model=List[schemas.Location])
-def list_locations(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
+def list_locations(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE), db: Session = Depends(database.get_read_db)):
     """
     Retrieve a list of all registered locations.
     """
@@ -28,7 +28,7 @@ def list_locations(skip: int = 0, limit: int = 100, db: Session = Depends(databa
 
 
 @router.get("/{location_id}", response_model=schemas.Location)
-def get_location(location_id: int, db: Session = Depends(database.get_db)):
+def get_location(location_id: int, db: Session = Depends(database.get_read_db)):
     """
     Retrieve details of a single location by its ID.
     """
@@ -47,7 +47,7 @@ def update_location(location_id: int, loc_update: schemas.LocationUpdate, db: Se
     if not loc:
         raise HTTPException(status_code=404, detail="Location not found.")
     
-    for key, value in loc_update.dict(exclude_unset=True).items():
+    for key, value in loc_update.model_dump(exclude_unset=True).items():
         setattr(loc, key, value)
     
     db.commit()
@@ -56,14 +56,20 @@ def update_location(location_id: int, loc_update: schemas.LocationUpdate, db: Se
 
 
 @router.delete("/{location_id}")
-def delete_location(location_id: int, db: Session = Depends(database.get_db)):
+def delete_location(
+    location_id: int,
+    on_references: str = Query("ignore", pattern=integrity.ON_REFERENCES_PATTERN, description="When still referenced: ignore, refuse (409) or cascade (clear the references)"),
+    db: Session = Depends(database.get_db)
+):
     """
     Delete a location from the system.
+    Rows pointing at it are checked with one indexed existence query (see `on_references`).
     """
     loc = db.query(models.Location).filter(models.Location.id == location_id).first()
     if not loc:
         raise HTTPException(status_code=404, detail="Location not found.")
     
+    integrity.guard_delete(db, models.Location, location_id, on_references)
     db.delete(loc)
     db.commit()
     return {"message": f"Location '{loc.site_name}' (ID: {location_id}) deleted."}
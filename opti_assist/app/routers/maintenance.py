@@ -1,23 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date
 
-from .. import models, schemas, database
+from .. import models, schemas, database, counting, lifecycle, pagination, planner, projection, profiling
 
-router = APIRouter(prefix="/api/maintenance-logs", tags=["Maintenance"])
+# Log statuses of work under way; only these (on unplanned work) keep an asset in repair
+OPEN_LOG_STATUSES = ("Pending", "In Progress")
+
+
+def _keeps_in_repair(status: Optional[str], maintenance_type: Optional[str]) -> bool:
+    """Open work other than planned services (preventive maintenance, inspections) takes an asset out of use."""
+    return status in OPEN_LOG_STATUSES and maintenance_type not in planner.SERVICE_TYPES
+
+router = APIRouter(prefix="/api/maintenance-logs", tags=["Maintenance"], route_class=profiling.ProfiledRoute)
 
 
 @router.post("/", response_model=schemas.MaintenanceLog, status_code=201)
 def create_maintenance_log(log: schemas.MaintenanceLogCreate, db: Session = Depends(database.get_db)):
     """
     Log a new maintenance event for a specific asset.
+    Open repair work ('Pending' or 'In Progress', not a planned service) moves the asset to 'In Repair'.
     """
     # Validate asset exists
     asset = db.query(models.Asset).filter(models.Asset.id == log.asset_id).first()
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found.")
     
-    db_log = models.MaintenanceLog(**log.dict())
+    if _keeps_in_repair(log.status, log.maintenance_type) and asset.status != lifecycle.IN_REPAIR:
+        lifecycle.transition(db, log.asset_id, "start_repair")
+
+    db_log = models.MaintenanceLog(**log.model_dump(exclude_none=True))
     db.add(db_log)
     db.commit()
     db.refresh(db_log)
@@ -25,15 +39,59 @@ def create_maintenance_log(log: schemas.MaintenanceLogCreate, db: Session = Depe
 
 
 @router.get("/", response_model=List[schemas.MaintenanceLog])
-def list_maintenance_logs(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
+def list_maintenance_logs(
+    request: Request,
+    response: Response,
+    status: Optional[str] = Query(None, description="Filter by status (e.g., 'Scheduled', 'Completed')"),
+    vendor_id: Optional[int] = Query(None, description="Filter by the vendor performing the work"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return (e.g., 'asset_id,status')"),
+    count: str = Query("none", pattern=counting.COUNT_MODE_PATTERN, description="Total count in X-Total-Count: none, exact, cached or estimated"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: Session = Depends(database.get_read_db)
+):
     """
-    List all maintenance logs across all assets.
+    List all maintenance logs across all assets, optionally filtered by status and vendor.
+    Use `fields` to fetch only the listed columns (the SQL SELECT is narrowed too).
+    Use `count` to get the total number of matching logs in `X-Total-Count`.
+    Send `Accept: application/msgpack` for a MessagePack body instead of JSON.
     """
-    return db.query(models.MaintenanceLog).offset(skip).limit(limit).all()
+    packed = projection.wants_msgpack(request, response)
+    columns = projection.select_columns(models.MaintenanceLog, schemas.MaintenanceLog, fields, all_columns=packed)
+    query = db.query(*columns) if columns else db.query(models.MaintenanceLog)
+    if status:
+        query = query.filter(models.MaintenanceLog.status == status)
+    if vendor_id is not None:
+        query = query.filter(models.MaintenanceLog.vendor_id == vendor_id)
+    headers = counting.set_total_count(response, db, query, models.MaintenanceLog.__tablename__, count)
+    rows = query.order_by(models.MaintenanceLog.id).offset(skip).limit(limit).all()
+    return projection.projected_response(rows, headers, packed) if columns else rows
+
+
+@router.post("/plan", response_model=schemas.MaintenancePlanResult)
+def plan_maintenance(as_of: Optional[date] = None, db: Session = Depends(database.get_db)):
+    """
+    Run the preventive maintenance planner.
+    Creates 'Scheduled' logs for every asset past its category's maintenance interval
+    and returns the new work orders grouped by vendor and location.
+    """
+    return planner.plan_preventive_maintenance(db, as_of=as_of)
+
+
+@router.get("/plan/batches", response_model=List[schemas.MaintenanceBatch])
+def list_maintenance_batches(
+    vendor_id: Optional[int] = None,
+    location_id: Optional[int] = None,
+    db: Session = Depends(database.get_read_db)
+):
+    """
+    List open scheduled work orders grouped by vendor and location for batched technician visits.
+    """
+    return planner.scheduled_batches(db, vendor_id=vendor_id, location_id=location_id)
 
 
 @router.get("/{log_id}", response_model=schemas.MaintenanceLog)
-def get_maintenance_log(log_id: int, db: Session = Depends(database.get_db)):
+def get_maintenance_log(log_id: int, db: Session = Depends(database.get_read_db)):
     """
     Retrieve details of a single maintenance log by its ID.
     """
@@ -52,8 +110,27 @@ def update_maintenance_log(log_id: int, log_update: schemas.MaintenanceLogUpdate
     if not log:
         raise HTTPException(status_code=404, detail="Maintenance log not found.")
     
-    for key, value in log_update.dict(exclude_unset=True).items():
+    for key, value in log_update.model_dump(exclude_unset=True).items():
         setattr(log, key, value)
+    db.flush()
+
+    # The asset leaves repair once none of its logs is open any more
+    if not _keeps_in_repair(log.status, log.maintenance_type):
+        open_work = (
+            db.query(models.MaintenanceLog.id)
+            .filter(
+                models.MaintenanceLog.asset_id == log.asset_id,
+                models.MaintenanceLog.status.in_(OPEN_LOG_STATUSES),
+                or_(
+                    models.MaintenanceLog.maintenance_type.is_(None),
+                    models.MaintenanceLog.maintenance_type.notin_(planner.SERVICE_TYPES),
+                ),
+            )
+            .first()
+        )
+        asset_status = db.query(models.Asset.status).filter(models.Asset.id == log.asset_id).scalar()
+        if open_work is None and asset_status == lifecycle.IN_REPAIR:
+            lifecycle.transition(db, log.asset_id, "finish_repair")
     
     db.commit()
     db.refresh(log)
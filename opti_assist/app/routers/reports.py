@@ -0,0 +1,123 @@
+import re
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from .. import models, schemas, database, forecast, pagination, profiling
+from ..expiry import EXPIRY_HORIZON_DAYS
+from ..holdings import SCOPES
+from ..snapshots import DIMENSIONS, stock_trends
+
+router = APIRouter(prefix="/api/reports", tags=["Reports"], route_class=profiling.ProfiledRoute)
+
+
+def _parse_days(value: str) -> int:
+    """Parse a window such as '30d' (or a bare '30') into a number of days."""
+    match = re.fullmatch(r"(\d+)d?", value.strip())
+    if not match:
+        raise HTTPException(status_code=400, detail=f"Invalid window '{value}'. Use a number of days, e.g. '30d'.")
+    return int(match.group(1))
+
+
+@router.get("/expiring", response_model=List[schemas.ExpiryDue])
+def list_expiring(
+    within: str = Query("30d", description="Look-ahead window, e.g. '30d', '60d', '90d'"),
+    entity_type: Optional[str] = Query(None, description="Filter by 'Asset' or 'Vendor'"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: Session = Depends(database.get_read_db)
+):
+    """
+    List asset warranties and vendor contracts expiring within the given window.
+    Served from the precomputed expiry list maintained by the background scheduler.
+    """
+    days = _parse_days(within)
+    if days > EXPIRY_HORIZON_DAYS:
+        raise HTTPException(status_code=400, detail=f"Window cannot exceed {EXPIRY_HORIZON_DAYS} days.")
+
+    today = datetime.utcnow().date()  # Same clock as the expiry refresh
+    query = db.query(models.ExpiryDue).filter(
+        models.ExpiryDue.expiry_date.between(today, today + timedelta(days=days))
+    )
+    if entity_type:
+        query = query.filter(models.ExpiryDue.entity_type == entity_type)
+    return query.order_by(models.ExpiryDue.expiry_date, models.ExpiryDue.id).offset(skip).limit(limit).all()
+
+
+@router.get("/holdings", response_model=List[schemas.AssetHolding])
+def list_holdings(
+    scope: str = Query("department", description="Group by 'employee', 'department' or 'location'"),
+    scope_id: Optional[int] = Query(None, description="Return only this employee/department/location"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE),
+    db: Session = Depends(database.get_read_db)
+):
+    """
+    Count and total purchase cost of assets currently held, per employee, department or location.
+    Served from materialized counters kept up to date by assignments, returns and retirements.
+    """
+    if scope not in SCOPES:
+        raise HTTPException(status_code=400, detail=f"Invalid scope '{scope}'. Use one of: {', '.join(SCOPES)}.")
+
+    query = db.query(models.AssetHolding).filter(models.AssetHolding.scope == scope)
+    if scope_id is not None:
+        query = query.filter(models.AssetHolding.scope_id == scope_id)
+    return query.order_by(models.AssetHolding.scope_id).offset(skip).limit(limit).all()
+
+# Longest date range the stock trends report accepts
+MAX_TREND_DAYS = 731
+
+
+@router.get("/stock-trends", response_model=List[schemas.StockTrendPoint])
+def list_stock_trends(
+    date_from: Optional[date] = Query(None, alias="from", description="First snapshot date (default: 90 days ago)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Last snapshot date (default: today)"),
+    group_by: str = Query("location", description="Comma-separated dimensions: location, category, status"),
+    location_id: Optional[int] = Query(None, description="Only this location (0 = no location)"),
+    category_id: Optional[int] = Query(None, description="Only this category (0 = no category)"),
+    status: Optional[str] = Query(None, description="Only assets in this status"),
+    db: Session = Depends(database.get_read_db)
+):
+    """
+    Daily asset count and purchase value over a date range, per location, category and/or status.
+    Served from the append-only daily stock snapshots.
+    """
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=90)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'.")
+    if (date_to - date_from).days > MAX_TREND_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {MAX_TREND_DAYS} days.")
+    dimensions = list(dict.fromkeys(name.strip() for name in group_by.split(",") if name.strip()))
+    unknown = [name for name in dimensions if name not in DIMENSIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid group_by '{', '.join(unknown)}'. Use any of: {', '.join(DIMENSIONS)}.",
+        )
+    return stock_trends(db, date_from, date_to, dimensions, location_id, category_id, status)
+
+
+@router.get("/refresh-forecast", response_model=List[schemas.RefreshForecastPoint])
+def get_refresh_forecast(
+    years: int = Query(3, ge=1, le=forecast.MAX_FORECAST_YEARS, description="Quarters covered, from the current one, in years"),
+    group_by: str = Query("category,department", description="Comma-separated dimensions: category, department (empty: totals only)"),
+    category_id: Optional[int] = Query(None, description="Only this category (0 = no category)"),
+    department_id: Optional[int] = Query(None, description="Only assets held in this department (0 = not held / no department)"),
+    db: Session = Depends(database.get_read_db)
+):
+    """
+    Assets reaching end of life (purchase date + category depreciation years) per quarter,
+    with their purchase value, for refresh budgeting. Assets already past end of life come
+    first as `overdue` rows. Served from the precomputed refresh forecast.
+    """
+    dimensions = list(dict.fromkeys(name.strip() for name in group_by.split(",") if name.strip()))
+    unknown = [name for name in dimensions if name not in forecast.DIMENSIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid group_by '{', '.join(unknown)}'. Use any of: {', '.join(forecast.DIMENSIONS)}.",
+        )
+    return forecast.refresh_forecast(db, years, dimensions, category_id, department_id)
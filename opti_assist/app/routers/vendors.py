@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date
 
-from .. import models, schemas, database
+from .. import models, schemas, database, analytics, integrity, pagination, profiling
 
-router = APIRouter(prefix="/api/vendors", tags=["Vendors"])
+router = APIRouter(prefix="/api/vendors", tags=["Vendors"], route_class=profiling.ProfiledRoute)
 
 
 @router.post("/", response_model=schemas.Vendor, status_code=201)
@@ -12,7 +13,7 @@ def create_vendor(vendor: schemas.VendorCreate, db: Session = Depends(database.g
     """
     Register a new third-party vendor.
     """
-    db_vendor = models.Vendor(**vendor.dict())
+    db_vendor = models.Vendor(**vendor.model_dump())
     db.add(db_vendor)
     db.commit()
     db.refresh(db_vendor)
@@ -20,15 +21,45 @@ def create_vendor(vendor: schemas.VendorCreate, db: Session = Depends(database.g
 
 
 @router.get("/", response_model=List[schemas.Vendor])
-def list_vendors(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
+def list_vendors(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=pagination.MAX_PAGE_SIZE), db: Session = Depends(database.get_read_db)):
     """
     Retrieve a list of all vendors.
     """
     return db.query(models.Vendor).offset(skip).limit(limit).all()
 
 
+@router.get("/analytics", response_model=List[schemas.VendorPerformance])
+def get_vendor_performance(
+    date_from: Optional[date] = Query(None, alias="from", description="Only repairs started on or after this date"),
+    date_to: Optional[date] = Query(None, alias="to", description="Only repairs started on or before this date"),
+    vendor_id: Optional[int] = Query(None, description="Only this maintaining vendor"),
+    db: Session = Depends(database.get_read_db)
+):
+    """
+    Repair performance per maintaining vendor: number of repairs, median and p90
+    turnaround in days (completed repairs), and average, median and total cost.
+    Planned service ('Preventive', 'Inspection') is not counted as a repair.
+    """
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'.")
+    return analytics.vendor_performance(db, date_from, date_to, vendor_id)
+
+
+@router.get("/analytics/models", response_model=List[schemas.ModelFailureRate])
+def get_model_failure_rates(
+    vendor_id: Optional[int] = Query(None, description="Only assets bought from this vendor"),
+    min_assets: int = Query(1, ge=1, description="Leave out models with fewer assets than this"),
+    db: Session = Depends(database.get_read_db)
+):
+    """
+    Failure rate per asset model: share of assets that needed at least one repair,
+    and repairs per asset. Highest failure rate first.
+    """
+    return analytics.model_failure_rates(db, vendor_id, min_assets)
+
+
 @router.get("/{vendor_id}", response_model=schemas.Vendor)
-def get_vendor(vendor_id: int, db: Session = Depends(database.get_db)):
+def get_vendor(vendor_id: int, db: Session = Depends(database.get_read_db)):
     """
     Retrieve details of a single vendor by its ID.
     """
@@ -47,7 +78,7 @@ def update_vendor(vendor_id: int, vendor_update: schemas.VendorUpdate, db: Sessi
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found.")
     
-    for key, value in vendor_update.dict(exclude_unset=True).items():
+    for key, value in vendor_update.model_dump(exclude_unset=True).items():
         setattr(vendor, key, value)
     
     db.commit()
@@ -56,14 +87,20 @@ def update_vendor(vendor_id: int, vendor_update: schemas.VendorUpdate, db: Sessi
 
 
 @router.delete("/{vendor_id}")
-def delete_vendor(vendor_id: int, db: Session = Depends(database.get_db)):
+def delete_vendor(
+    vendor_id: int,
+    on_references: str = Query("ignore", pattern=integrity.ON_REFERENCES_PATTERN, description="When still referenced: ignore, refuse (409) or cascade (clear the references)"),
+    db: Session = Depends(database.get_db)
+):
     """
     Delete a vendor from the system.
+    Rows pointing at it are checked with one indexed existence query (see `on_references`).
     """
     vendor = db.query(models.Vendor).filter(models.Vendor.id == vendor_id).first()
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found.")
     
+    integrity.guard_delete(db, models.Vendor, vendor_id, on_references)
     db.delete(vendor)
     db.commit()
     return {"message": f"Vendor '{vendor.vendor_name}' (ID: {vendor_id}) deleted."}
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import os
+import time
+
+from . import database, tenancy
+from .archive import ensure_partitions
+from .expiry import refresh_expiry_due
+from .idempotency import purge_expired_keys
+from .integrity import scan as scan_integrity
+from .snapshots import take_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Seconds between scheduler ticks
+SCHEDULER_INTERVAL_SECONDS = int(os.getenv("SCHEDULER_INTERVAL_SECONDS", "900"))
+# Delay before the first in-process run, so booting workers do not hit the database immediately
+SCHEDULER_INITIAL_DELAY_SECONDS = int(os.getenv("SCHEDULER_INITIAL_DELAY_SECONDS", "30"))
+# Run the scheduler inside the API process (off by default: the tasks run in `python -m app.scheduler`)
+SCHEDULER_IN_PROCESS = os.getenv("SCHEDULER_IN_PROCESS", "0") == "1"
+
+# Periodic tasks: (name, callable taking a Session, runs once per tenant)
+TASKS = [
+    ("expiry_due", refresh_expiry_due, True),
+    ("ensure_partitions", ensure_partitions, False),
+    ("purge_idempotency_keys", purge_expired_keys, False),
+    ("integrity_scan", scan_integrity, True),
+    ("stock_snapshot", take_snapshot, True),
+]
+
+
+def _run_task(name: str, task):
+    db = database.SessionLocal()
+    try:
+        result = task(db)
+        logger.info("Scheduled task '%s' finished for tenant %s: %s", name, tenancy.current_tenant_id(), result)
+    except Exception:
+        db.rollback()
+        logger.exception("Scheduled task '%s' failed for tenant %s", name, tenancy.current_tenant_id())
+    finally:
+        db.close()
+
+
+def run_tasks_once():
+    """
+    Run every scheduled task once, each in its own session; per-tenant tasks run
+    for every tenant in turn. A failing task is logged and does not prevent the
+    others from running.
+    """
+    db = database.SessionLocal()
+    try:
+        tenant_ids = tenancy.tenant_ids(db)
+    finally:
+        db.close()
+    for name, task, per_tenant in TASKS:
+        if not per_tenant:
+            _run_task(name, task)
+            continue
+        for tenant_id in tenant_ids:
+            with tenancy.tenant_context(tenant_id):
+                _run_task(name, task)
+
+
+async def run_scheduler(stop: asyncio.Event):
+    """
+    In-process scheduler loop, started from the application lifespan.
+    Tasks run in a worker thread so they never block the event loop.
+    """
+    delay = SCHEDULER_INITIAL_DELAY_SECONDS
+    while True:
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=delay)
+            return
+        except asyncio.TimeoutError:
+            pass
+        await asyncio.to_thread(run_tasks_once)
+        delay = SCHEDULER_INTERVAL_SECONDS
+
+
+def main():
+    """Standalone worker entry point: `python -m app.scheduler`."""
+    logging.basicConfig(level=logging.INFO)
+    database.init_engine()
+    while True:
+        run_tasks_once()
+        time.sleep(SCHEDULER_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import date, datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 # --- Shared Properties ---
 
@@ -32,6 +32,7 @@ class AssetCategoryBase(BaseModel):
     category_name: str
     parent_category_id: Optional[int] = None
     depreciation_years: int = 3
+    maintenance_interval_days: Optional[int] = None
 
 class EmployeeBase(BaseModel):
     """Base schema for Employee, containing shared fields."""
@@ -148,6 +149,7 @@ class AssetCategoryUpdate(BaseModel):
     category_name: Optional[str] = None
     parent_category_id: Optional[int] = None
     depreciation_years: Optional[int] = None
+    maintenance_interval_days: Optional[int] = None
 
 class EmployeeUpdate(BaseModel):
     """Schema for updating an existing Employee."""
@@ -202,6 +204,20 @@ class ReturnAssetRequest(BaseModel):
     asset_id: int
     notes: Optional[str] = None
 
+class OffboardRequest(BaseModel):
+    """Schema for offboarding a batch of employees (e.g., from an HR termination feed)."""
+    employee_ids: List[int] = []
+    employee_codes: List[str] = []
+    run_async: bool = False
+
+class OffboardResult(BaseModel):
+    """Outcome of an offboarding run."""
+    employees: int = 0
+    assignments_closed: int = 0
+    assets_reclaimed: int = 0
+    queued: bool = False
+    job_id: Optional[int] = None
+
 class EmployeeWithAssets(BaseModel):
     """Schema for Employee profile, including their currently assigned assets."""
     id: int
@@ -217,8 +233,7 @@ class EmployeeWithAssets(BaseModel):
     hire_date: Optional[date] = None
     created_at: datetime
     assigned_assets: List["Asset"] = []
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # --- Reading Models ---
 
@@ -226,53 +241,220 @@ class Department(DepartmentBase):
     """Complete schema for reading Department data."""
     id: int
     created_at: datetime
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class Location(LocationBase):
     """Complete schema for reading Location data."""
     id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class Vendor(VendorBase):
     """Complete schema for reading Vendor data."""
     id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class AssetCategory(AssetCategoryBase):
     """Complete schema for reading AssetCategory data."""
     id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class Employee(EmployeeBase):
     """Complete schema for reading Employee data."""
     id: int
     created_at: datetime
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class Asset(AssetBase):
     """Complete schema for reading Asset data."""
     id: int
     created_at: datetime
     last_updated_at: datetime
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class AssetAssignmentHistory(AssetAssignmentHistoryBase):
     """Complete schema for reading AssetAssignmentHistory data."""
     id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class MaintenanceLog(MaintenanceLogBase):
     """Complete schema for reading MaintenanceLog data."""
     id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class ExpiryDue(BaseModel):
+    """Schema for an upcoming warranty or contract expiry."""
+    entity_type: str
+    entity_id: int
+    label: Optional[str] = None
+    expiry_date: date
+    computed_at: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+class MaintenanceBatch(BaseModel):
+    """Open scheduled work orders grouped by vendor and location for a single visit."""
+    vendor_id: Optional[int] = None
+    location_id: Optional[int] = None
+    work_orders: int
+    earliest_due: Optional[date] = None
+
+class MaintenancePlanResult(BaseModel):
+    """Outcome of a preventive maintenance planning run."""
+    as_of: date
+    created: int
+    batches: List[MaintenanceBatch] = []
+
+class AssetHolding(BaseModel):
+    """Schema for the assets currently held by an employee, department or location."""
+    scope: str
+    scope_id: int
+    asset_count: int
+    total_cost: float
+    updated_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class JobCreate(BaseModel):
+    """Schema for queueing a background job."""
+    job_type: str
+    params: Dict[str, Any] = {}
+
+class Job(BaseModel):
+    """Schema for a background job and its progress."""
+    id: int
+    job_type: str
+    status: str
+    params: Optional[Dict[str, Any]] = None
+    progress_done: Optional[int] = None
+    progress_total: Optional[int] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    attempts: Optional[int] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class IntegritySample(BaseModel):
+    """One referencing row whose soft link points at a missing row."""
+    row_id: int
+    missing_id: int
+
+class IntegrityLink(BaseModel):
+    """Integrity scan results for one soft link."""
+    link: str
+    orphans: int
+    last_scanned_at: Optional[datetime] = None
+    samples: List[IntegritySample] = []
+
+class StockTrendPoint(BaseModel):
+    """Stock on one snapshot date; dimensions not grouped by are null."""
+    snapshot_date: date
+    location_id: Optional[int] = None
+    category_id: Optional[int] = None
+    status: Optional[str] = None
+    asset_count: int
+    total_value: float
+
+class RefreshForecastPoint(BaseModel):
+    """Assets reaching end of life in one quarter (overdue rows: before the current quarter); dimensions not grouped by are null."""
+    year: Optional[int] = None
+    quarter: Optional[int] = None
+    overdue: bool = False
+    category_id: Optional[int] = None
+    department_id: Optional[int] = None
+    asset_count: int
+    total_cost: float
+
+class TenantCreate(BaseModel):
+    """Schema for onboarding a company as a new tenant."""
+    code: str
+    name: str
+
+class Tenant(TenantCreate):
+    """Schema for a tenant; its id is sent as the X-Tenant-ID header."""
+    id: int
+    created_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class AdmissionMetrics(BaseModel):
+    """Admission control counters of one API process since it started."""
+    admitted: int
+    rate_limited: int
+    shed: int
+    in_flight: int
+    peak_in_flight: int
+    tracked_clients: int
+    max_in_flight: int
+    rate_limit_per_second: float
+    rate_limit_burst: int
+    pool_checked_out: Optional[int] = None
+    pool_size: Optional[int] = None
+    live_subscribers: int = 0
+
+class VendorPerformance(BaseModel):
+    """Repair statistics of one maintaining vendor."""
+    vendor_id: int
+    vendor_name: Optional[str] = None
+    repairs: int
+    completed: int
+    median_turnaround_days: Optional[float] = None
+    p90_turnaround_days: Optional[float] = None
+    average_cost: Optional[float] = None
+    median_cost: Optional[float] = None
+    total_cost: float
+
+class ModelFailureRate(BaseModel):
+    """How often assets of one model needed repair."""
+    model_number: str
+    assets: int
+    failed_assets: int
+    repairs: int
+    failure_rate: float
+    repairs_per_asset: float
+
+class AuditReconcileRequest(BaseModel):
+    """Tags scanned during a physical audit of one location."""
+    location_id: int
+    asset_tags: List[str]
+
+class AuditItem(BaseModel):
+    """An asset in an audit reconciliation, with where the system records it."""
+    asset_id: int
+    asset_tag: str
+    asset_name: str
+    status: str
+    current_location_id: Optional[int] = None
+
+class AuditReconcileResult(BaseModel):
+    """Scanned tags compared with the assets expected at the location."""
+    location_id: int
+    scanned: int
+    found: List[AuditItem] = []
+    missing: List[AuditItem] = []
+    misplaced: List[AuditItem] = []
+    unknown: List[str] = []
+
+class ProfileSummary(BaseModel):
+    """A profiled request of this API process."""
+    id: int
+    method: str
+    path: str
+    status_code: Optional[int] = None
+    tenant_id: int
+    trigger: str
+    started_at: datetime
+    duration_ms: Optional[float] = None
+    sql_count: int
+    sql_ms: float
+
+class ProfiledStatement(BaseModel):
+    """A SQL statement executed by a profiled request."""
+    statement: str
+    duration_ms: float
+
+class ProfileDetail(ProfileSummary):
+    """A profiled request with its SQL statements and cProfile report."""
+    sql: List[ProfiledStatement] = []
+    stats: str = ""
 
 # Update forward references
 EmployeeWithAssets.model_rebuild()
@@ -1,9 +1,12 @@
 from datetime import date, datetime
-from .database import SessionLocal, engine
+from . import database
 from . import models
+from .forecast import rebuild_forecast
+from .holdings import rebuild_holdings
 
 def seed_data():
-    db = SessionLocal()
+    database.init_engine()
+    db = database.SessionLocal()
     
     # 1. Departments (Goal: 5+, Already has 6)
     # Adding a few more just in case
@@ -70,6 +73,9 @@ def seed_data():
         db.add_all(new_maintenance)
         
         db.commit()
+        # Writes above bypass the endpoints that keep the derived counters up to date
+        rebuild_holdings(db)
+        rebuild_forecast(db)
         print("Database seeded successfully!")
     except Exception as e:
         db.rollback()
@@ -0,0 +1,107 @@
+"""
+Daily stock snapshots: how many assets (and how much purchase value) sit at each
+location, per category and status.
+
+    python -m app.snapshots [--tenant 1]
+
+The scheduler takes today's snapshot on its first run of the day. Rows are only
+ever appended, so trend reports read this small table instead of the assets or
+history tables.
+"""
+import argparse
+from datetime import date
+
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from . import models, database, tenancy
+
+# Grouping dimensions accepted by the trends report: name -> snapshot column
+DIMENSIONS = {
+    "location": models.StockSnapshot.location_id,
+    "category": models.StockSnapshot.category_id,
+    "status": models.StockSnapshot.status,
+}
+
+
+def take_snapshot(db: Session, day: date = None) -> dict:
+    """
+    Record the current stock under `day` (default today) with one grouped INSERT ... SELECT.
+    Does nothing if that day was already recorded; retired assets are left out.
+    """
+    day = day or date.today()
+    snapshot = models.StockSnapshot
+    if db.query(snapshot.snapshot_date).filter(snapshot.snapshot_date == day).first():
+        return {"snapshot_date": day, "rows": 0}
+
+    asset = models.Asset
+    location = func.coalesce(asset.current_location_id, 0)
+    category = func.coalesce(asset.category_id, 0)
+    rows = db.execute(
+        insert(snapshot).from_select(
+            ["snapshot_date", "location_id", "category_id", "status", "asset_count", "total_value"],
+            select(
+                literal(day),
+                location,
+                category,
+                asset.status,
+                func.count(asset.id),
+                func.coalesce(func.sum(asset.purchase_cost), 0),
+            )
+            .where(asset.status != "Retired")
+            .group_by(location, category, asset.status),
+        )
+    ).rowcount
+    db.commit()
+    return {"snapshot_date": day, "rows": rows}
+
+
+def stock_trends(
+    db: Session,
+    date_from: date,
+    date_to: date,
+    group_by: list,
+    location_id: int = None,
+    category_id: int = None,
+    status: str = None,
+) -> list:
+    """Daily totals between two dates (inclusive), grouped by the given dimensions."""
+    snapshot = models.StockSnapshot
+    columns = [DIMENSIONS[name].label(DIMENSIONS[name].key) for name in group_by]
+    query = (
+        db.query(
+            snapshot.snapshot_date,
+            *columns,
+            func.sum(snapshot.asset_count).label("asset_count"),
+            func.sum(snapshot.total_value).label("total_value"),
+        )
+        .filter(snapshot.snapshot_date.between(date_from, date_to))
+    )
+    if location_id is not None:
+        query = query.filter(snapshot.location_id == location_id)
+    if category_id is not None:
+        query = query.filter(snapshot.category_id == category_id)
+    if status:
+        query = query.filter(snapshot.status == status)
+    keys = [snapshot.snapshot_date] + [DIMENSIONS[name] for name in group_by]
+    return [dict(row._mapping) for row in query.group_by(*keys).order_by(*keys).all()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record today's stock snapshot")
+    parser.add_argument("--tenant", type=int, help="Only snapshot this tenant (default: every tenant)")
+    args = parser.parse_args()
+
+    database.init_engine()
+    db = database.SessionLocal()
+    try:
+        for tenant_id in [args.tenant] if args.tenant is not None else tenancy.tenant_ids(db):
+            with tenancy.tenant_context(tenant_id):
+                result = take_snapshot(db)
+                print(f"tenant {tenant_id} {result['snapshot_date']}: {result['rows']} rows recorded")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Per-company (tenant) data isolation.
+
+Every tenant-owned table carries a `tenant_id` column that leads its indexes.
+The tenant of an API request comes from the `X-Tenant-ID` header (or
+DEFAULT_TENANT_ID when it is absent); background jobs, scheduled tasks and CLIs
+run inside `tenant_context()`.
+
+Isolation is applied in one place: a session hook adds `tenant_id = <current>`
+to every ORM SELECT, UPDATE and DELETE (subqueries and EXISTS included), and new
+rows, including INSERT ... SELECT, get the current tenant as their default.
+Queue and housekeeping code that must see every tenant passes the
+`all_tenants=True` execution option.
+"""
+import json
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import Column, Integer, event
+from sqlalchemy.orm import Session, with_loader_criteria
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+TENANT_HEADER = "x-tenant-id"
+# Tenant used when a request or CLI does not name one (single-company installs never need the header)
+DEFAULT_TENANT_ID = int(os.getenv("DEFAULT_TENANT_ID", "1"))
+# Reject API requests without an X-Tenant-ID header instead of using the default tenant
+TENANT_HEADER_REQUIRED = os.getenv("TENANT_HEADER_REQUIRED", "0") == "1"
+
+_current_tenant: ContextVar[Optional[int]] = ContextVar("current_tenant", default=None)
+
+# Tenant ids confirmed to exist; tenants are never deleted, so entries do not go stale
+_known_tenants = set()
+
+
+def current_tenant_id() -> int:
+    """Tenant of the running request, job or CLI (the default tenant outside any context)."""
+    tenant_id = _current_tenant.get()
+    return DEFAULT_TENANT_ID if tenant_id is None else tenant_id
+
+
+@contextmanager
+def tenant_context(tenant_id: int):
+    """Run a block of work on behalf of one tenant."""
+    token = _current_tenant.set(tenant_id)
+    try:
+        yield
+    finally:
+        _current_tenant.reset(token)
+
+
+class TenantMixin:
+    """Adds the tenant column to a model; rows are only visible to their own tenant."""
+    tenant_id = Column(Integer, nullable=False, default=current_tenant_id) # Soft link to tenants.id
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope_to_tenant(orm_execute_state):
+    if orm_execute_state.execution_options.get("all_tenants"):
+        return
+    if orm_execute_state.is_select or orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        tenant_id = current_tenant_id()
+        orm_execute_state.statement = orm_execute_state.statement.options(
+            with_loader_criteria(TenantMixin, lambda cls: cls.tenant_id == tenant_id, include_aliases=True)
+        )
+
+
+def tenant_ids(db: Session) -> list:
+    """Ids of every tenant, for work that runs once per tenant (scheduler, maintenance CLIs)."""
+    from . import models  # models imports this module
+    return [row[0] for row in db.query(models.Tenant.id).order_by(models.Tenant.id)]
+
+
+def tenant_exists(db: Session, tenant_id: int) -> bool:
+    from . import models  # models imports this module
+    if tenant_id not in _known_tenants:
+        if db.query(models.Tenant.id).filter(models.Tenant.id == tenant_id).first() is None:
+            return False
+        _known_tenants.add(tenant_id)
+    return True
+
+
+def _check_tenant(tenant_id: int) -> bool:
+    from . import database
+    if tenant_id in _known_tenants:
+        return True
+    db = database.SessionLocal()
+    try:
+        return tenant_exists(db, tenant_id)
+    finally:
+        db.close()
+
+
+class TenantMiddleware:
+    """
+    Resolve the tenant of each request from the `X-Tenant-ID` header.
+    Must sit outside every middleware that touches the database (idempotency keys are per tenant).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header = Headers(scope=scope).get(TENANT_HEADER)
+        if header is None:
+            if TENANT_HEADER_REQUIRED:
+                await _send_error(send, 400, "The X-Tenant-ID header is required.")
+                return
+            tenant_id = DEFAULT_TENANT_ID
+        else:
+            try:
+                tenant_id = int(header)
+            except ValueError:
+                await _send_error(send, 400, "X-Tenant-ID must be an integer tenant id.")
+                return
+            if not await run_in_threadpool(_check_tenant, tenant_id):
+                await _send_error(send, 404, f"Tenant {tenant_id} not found.")
+                return
+        with tenant_context(tenant_id):
+            await self.app(scope, receive, send)
+
+
+async def _send_error(send, status: int, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
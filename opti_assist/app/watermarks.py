@@ -0,0 +1,28 @@
+"""
+Progress markers of incremental jobs (`job_watermarks`).
+
+Several processes may run the same job at once (the in-process scheduler of each
+API worker, `python -m app.scheduler`, job workers), so a job claims its
+watermark row instead of reading it: the row is created with INSERT ... ON
+CONFLICT DO NOTHING, so the first run of concurrent ones never collides on the
+primary key, and on Postgres it is locked until the job commits, so runs of the
+same job take turns and each one starts from the previous one's mark.
+"""
+from sqlalchemy.orm import Session
+
+from . import models, database
+
+
+def claim(db: Session, name: str) -> models.Watermark:
+    """The current tenant's watermark of a job, created if missing and locked until the caller commits."""
+    insert = database.dialect_insert(db)
+    if insert is not None:
+        db.execute(insert(models.Watermark).values(name=name).on_conflict_do_nothing())
+    query = db.query(models.Watermark).filter(models.Watermark.name == name)
+    if db.get_bind().dialect.name == "postgresql":
+        query = query.with_for_update()
+    mark = query.first()
+    if mark is None:
+        mark = models.Watermark(name=name)
+        db.add(mark)
+    return mark
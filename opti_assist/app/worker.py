@@ -0,0 +1,89 @@
+"""
+Job worker: runs queued jobs from the `jobs` table.
+
+    python -m app.worker [--concurrency 2]
+
+Run it as its own process next to the API (docker-compose has a `worker` service).
+For a single-process local setup, JOB_WORKER_IN_PROCESS=1 runs one worker inside
+the API instead.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import database, jobs
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before polling again when the queue is empty
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+# Jobs run in parallel by `python -m app.worker`
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "2"))
+# Run a job worker inside the API process (off by default: jobs run in `python -m app.worker`)
+JOB_WORKER_IN_PROCESS = os.getenv("JOB_WORKER_IN_PROCESS", "0") == "1"
+
+
+def work_once(worker: str) -> bool:
+    """Requeue abandoned jobs, then claim and run the next queued one. Returns False if the queue was empty."""
+    db = database.SessionLocal()
+    try:
+        jobs.requeue_stale_jobs(db)
+        job_id = jobs.claim_next_job(db, worker)
+    finally:
+        db.close()
+    if job_id is None:
+        return False
+    jobs.run_job(job_id)
+    return True
+
+
+async def run_worker(stop: asyncio.Event):
+    """In-process worker loop, started from the application lifespan; jobs run in a worker thread."""
+    worker = f"{jobs.worker_name()}:api"
+    while not stop.is_set():
+        try:
+            busy = await asyncio.to_thread(work_once, worker)
+        except Exception:
+            logger.exception("Job worker iteration failed")
+            busy = False
+        if not busy:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _work_forever(worker: str, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            busy = work_once(worker)
+        except Exception:
+            logger.exception("Job worker iteration failed")
+            busy = False
+        if not busy:
+            stop.wait(JOB_POLL_SECONDS)
+
+
+def main():
+    """Standalone worker entry point: `python -m app.worker`."""
+    parser = argparse.ArgumentParser(description="Run queued background jobs")
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY, help="Jobs run in parallel")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    database.init_engine()
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for slot in range(args.concurrency):
+            pool.submit(_work_forever, f"{jobs.worker_name()}:{slot}", stop)
+        try:
+            stop.wait()
+        except KeyboardInterrupt:
+            stop.set()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import pytest
+
+from app import admission, pagination
+
+
+@pytest.fixture
+def limited(client, monkeypatch):
+    monkeypatch.setattr(admission, "RATE_LIMIT_PER_SECOND", 0.01)
+    monkeypatch.setattr(admission, "RATE_LIMIT_BURST", 2)
+    admission._buckets.clear()
+    yield client
+    admission._buckets.clear()
+
+
+def test_clients_over_their_rate_get_429(limited):
+    assert limited.get("/api/assets/").status_code == 200
+    assert limited.get("/api/assets/").status_code == 200
+
+    refused = limited.get("/api/assets/")
+    assert refused.status_code == 429
+    assert int(refused.headers["retry-after"]) >= 1
+    # Probes stay reachable
+    assert limited.get("/health").status_code == 200
+    assert admission.counters["rate_limited"] >= 1
+
+
+def test_clients_are_limited_by_their_own_address(limited, monkeypatch):
+    monkeypatch.setattr(admission, "_client_key", lambda scope: "10.0.0.1")
+    for _ in range(2):
+        limited.get("/api/assets/")
+    assert limited.get("/api/assets/", headers={"X-Forwarded-For": "10.0.0.2"}).status_code == 429
+
+    monkeypatch.setattr(admission, "_client_key", lambda scope: "10.0.0.2")
+    assert limited.get("/api/assets/").status_code == 200
+
+
+def test_page_sizes_are_capped(client):
+    assert client.get("/api/assets/", params={"limit": pagination.MAX_PAGE_SIZE + 1}).status_code == 422
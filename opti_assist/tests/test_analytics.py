@@ -0,0 +1,52 @@
+import pytest
+
+from app import analytics
+from tests.conftest import create_asset
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    analytics._cache.clear()
+
+
+def log(client, asset, vendor, **fields):
+    body = {"asset_id": asset["id"], "vendor_id": vendor["id"], "maintenance_type": "Corrective", **fields}
+    response = client.post("/api/maintenance-logs/", json=body)
+    assert response.status_code == 201, response.text
+
+
+def test_vendor_turnaround_and_cost_percentiles(client):
+    vendor = client.post("/api/vendors/", json={"vendor_name": "Fixit"}).json()
+    first = create_asset(client, "LAP-001", model_number="M1")
+    second = create_asset(client, "LAP-002", model_number="M1")
+    spare = create_asset(client, "LAP-003", model_number="M2")
+    log(client, first, vendor, start_date="2026-01-01", completion_date="2026-01-03", status="Completed", cost=100)
+    log(client, first, vendor, start_date="2026-01-10", completion_date="2026-01-20", status="Completed", cost=300)
+    log(client, second, vendor, start_date="2026-02-01", status="In Progress", cost=200)
+    # Planned service is not a failure
+    log(client, spare, vendor, maintenance_type="Inspection", start_date="2026-01-05", completion_date="2026-01-05", status="Completed", cost=50)
+
+    [report] = client.get("/api/vendors/analytics").json()
+    assert (report["vendor_name"], report["repairs"], report["completed"]) == ("Fixit", 3, 2)
+    assert (report["median_turnaround_days"], report["p90_turnaround_days"]) == (6.0, pytest.approx(9.2))
+    assert (report["average_cost"], report["median_cost"], report["total_cost"]) == (200.0, 200.0, 600.0)
+
+    [recent] = client.get("/api/vendors/analytics", params={"from": "2026-01-05"}).json()
+    assert (recent["repairs"], recent["median_turnaround_days"]) == (2, 10.0)
+    assert client.get("/api/vendors/analytics", params={"from": "2026-02-01", "to": "2026-01-01"}).status_code == 400
+
+    rates = client.get("/api/vendors/analytics/models").json()
+    assert [(row["model_number"], row["failed_assets"], row["repairs"], row["failure_rate"]) for row in rates] == [
+        ("M1", 2, 3, 1.0),
+        ("M2", 0, 0, 0.0),
+    ]
+
+
+def test_new_repairs_invalidate_cached_analytics(client):
+    vendor = client.post("/api/vendors/", json={"vendor_name": "Fixit"}).json()
+    asset = create_asset(client)
+    log(client, asset, vendor, start_date="2026-01-01", completion_date="2026-01-02", status="Completed", cost=100)
+    assert client.get("/api/vendors/analytics").json()[0]["repairs"] == 1
+
+    log(client, asset, vendor, start_date="2026-01-05", completion_date="2026-01-06", status="Completed", cost=100)
+    assert client.get("/api/vendors/analytics").json()[0]["repairs"] == 2
@@ -0,0 +1,49 @@
+import os
+from decimal import Decimal
+
+import pytest
+
+from app import archive, tenancy
+from app.archive import archive_closed_records, read_archived
+from tests.conftest import create_asset
+
+
+@pytest.fixture(params=["parquet", "jsonl"])
+def archive_dir(request, monkeypatch, tmp_path):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path))
+    if request.param == "jsonl":
+        monkeypatch.setattr(archive, "pyarrow", None)
+    elif archive.pyarrow is None:
+        pytest.skip("pyarrow is not installed")
+    return str(tmp_path)
+
+
+def test_closed_records_move_to_cold_storage_with_exact_costs(client, db, archive_dir):
+    asset = create_asset(client)
+    old = {"asset_id": asset["id"], "maintenance_type": "Corrective", "cost": 1234.56,
+           "start_date": "2019-03-01", "completion_date": "2019-03-05", "status": "Completed"}
+    client.post("/api/maintenance-logs/", json=old)
+    client.post("/api/maintenance-logs/", json={**old, "start_date": "2026-09-01", "completion_date": "2026-09-02"})
+
+    assert archive_closed_records(db, years=3) == {"asset_assignment_history": 0, "maintenance_logs": 1}
+    hot = client.get(f"/api/assets/{asset['id']}/maintenance").json()
+    assert [log["start_date"] for log in hot] == ["2026-09-01"]
+    both = client.get(f"/api/assets/{asset['id']}/maintenance", params={"include_archived": True}).json()
+    assert [log["start_date"] for log in both] == ["2026-09-01", "2019-03-01"]
+
+    [archived] = read_archived("maintenance_logs", asset["id"])
+    assert archived["cost"] == Decimal("1234.56")
+    tenant_directory = os.path.join(archive_dir, "maintenance_logs", f"tenant-{tenancy.DEFAULT_TENANT_ID}")
+    assert os.listdir(tenant_directory) == ["assets-0"]
+
+
+def test_archives_are_read_per_tenant(client, db, archive_dir, other_tenant):
+    asset = create_asset(client)
+    client.post("/api/maintenance-logs/", json={
+        "asset_id": asset["id"], "start_date": "2019-03-01", "completion_date": "2019-03-05", "status": "Completed",
+    })
+    archive_closed_records(db, years=3)
+
+    with tenancy.tenant_context(int(other_tenant["X-Tenant-ID"])):
+        assert read_archived("maintenance_logs", asset["id"]) == []
+    assert len(read_archived("maintenance_logs", asset["id"])) == 1
@@ -0,0 +1,55 @@
+import gzip
+import sqlite3
+
+from tests.conftest import create_asset, create_employee
+
+
+def tags(items):
+    return [item["asset_tag"] for item in items]
+
+
+def test_reconcile_sorts_scanned_tags(client):
+    hq = client.post("/api/locations/", json={"site_name": "HQ"}).json()
+    warehouse = client.post("/api/locations/", json={"site_name": "Warehouse"}).json()
+    create_asset(client, "LAP-001", current_location_id=hq["id"])
+    create_asset(client, "LAP-002", current_location_id=hq["id"])
+    create_asset(client, "LAP-003", current_location_id=warehouse["id"])
+    retired = create_asset(client, "LAP-004", current_location_id=hq["id"])
+    client.delete(f"/api/assets/{retired['id']}")
+
+    result = client.post(
+        "/api/audit/reconcile",
+        json={"location_id": hq["id"], "asset_tags": ["LAP-001", "LAP-003", "LAP-004", "NOPE", "LAP-001", " "]},
+    ).json()
+    assert result["scanned"] == 4
+    assert tags(result["found"]) == ["LAP-001"]
+    assert tags(result["missing"]) == ["LAP-002"]
+    assert tags(result["misplaced"]) == ["LAP-003", "LAP-004"]
+    assert result["unknown"] == ["NOPE"]
+
+    nothing_scanned = client.post("/api/audit/reconcile", json={"location_id": hq["id"], "asset_tags": []}).json()
+    assert tags(nothing_scanned["missing"]) == ["LAP-001", "LAP-002"]
+    assert client.post("/api/audit/reconcile", json={"location_id": 404, "asset_tags": []}).status_code == 404
+
+
+def test_snapshot_holds_the_locations_stock(client, tmp_path):
+    hq = client.post("/api/locations/", json={"site_name": "HQ"}).json()
+    employee = create_employee(client)
+    create_asset(client, "LAP-001", serial_number="SN-1", current_location_id=hq["id"], current_employee_id=employee["id"])
+    create_asset(client, "LAP-002", current_location_id=hq["id"])
+    create_asset(client, "LAP-003")
+
+    response = client.get("/api/audit/snapshot", params={"location_id": hq["id"]})
+    assert response.status_code == 200
+    path = tmp_path / "snapshot.sqlite"
+    path.write_bytes(gzip.decompress(response.content))
+
+    snapshot = sqlite3.connect(path)
+    try:
+        assert snapshot.execute("SELECT asset_tag FROM assets ORDER BY asset_tag").fetchall() == [("LAP-001",), ("LAP-002",)]
+        assert snapshot.execute("SELECT asset_tag FROM assets WHERE serial_number = 'SN-1'").fetchone() == ("LAP-001",)
+        assert snapshot.execute("SELECT employee_code FROM employees").fetchall() == [("E-001",)]
+        assert dict(snapshot.execute("SELECT key, value FROM snapshot_info"))["assets"] == "2"
+    finally:
+        snapshot.close()
+    assert client.get("/api/audit/snapshot", params={"location_id": 404}).status_code == 404
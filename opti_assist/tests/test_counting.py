@@ -0,0 +1,41 @@
+from app import counting
+from tests.conftest import create_asset
+
+
+def total(client, mode, **params):
+    response = client.get("/api/assets/", params={"count": mode, **params})
+    return int(response.headers["X-Total-Count"]), response.headers["X-Total-Count-Mode"]
+
+
+def test_count_modes(client):
+    for number in range(3):
+        create_asset(client, f"LAP-{number}")
+
+    assert "X-Total-Count" not in client.get("/api/assets/").headers
+    assert total(client, "exact", limit=1) == (3, "exact")
+    assert total(client, "cached") == (3, "cached")
+    # No planner estimate on SQLite
+    assert total(client, "estimated") == (3, "cached")
+
+
+def test_cached_counts_follow_writes_and_stay_bounded(client, monkeypatch):
+    monkeypatch.setattr(counting, "_cache", counting.OrderedDict())
+    monkeypatch.setattr(counting, "COUNT_CACHE_MAX_ENTRIES", 2)
+    create_asset(client, "LAP-1")
+    assert total(client, "cached") == (1, "cached")
+
+    create_asset(client, "LAP-2")
+    assert total(client, "cached") == (2, "cached")
+
+    for status in ("In Stock", "Assigned", "Lost"):
+        total(client, "cached", status=status)
+    assert len(counting._cache) == 2
+
+
+def test_expired_counts_are_dropped(client, monkeypatch):
+    monkeypatch.setattr(counting, "_cache", counting.OrderedDict())
+    monkeypatch.setattr(counting, "COUNT_CACHE_TTL_SECONDS", -1)
+    create_asset(client)
+    total(client, "cached")
+    total(client, "cached", status="Lost")
+    assert len(counting._cache) == 1
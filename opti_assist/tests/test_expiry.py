@@ -0,0 +1,36 @@
+from datetime import date, timedelta
+
+from app.expiry import refresh_expiry_due
+from tests.conftest import create_asset
+
+
+def test_expiring_report_lists_warranties_inside_the_window(client, db):
+    today = date.today()
+    soon = create_asset(client, "LAP-001", warranty_expiry_date=str(today + timedelta(days=20)))
+    create_asset(client, "LAP-002", warranty_expiry_date=str(today + timedelta(days=200)))
+    vendor = client.post(
+        "/api/vendors/", json={"vendor_name": "Acme", "contract_expiry_date": str(today + timedelta(days=45))}
+    ).json()
+
+    refresh_expiry_due(db)
+
+    within_30 = client.get("/api/reports/expiring", params={"within": "30d"}).json()
+    assert [(row["entity_type"], row["entity_id"]) for row in within_30] == [("Asset", soon["id"])]
+    within_60 = client.get("/api/reports/expiring", params={"within": "60d", "entity_type": "Vendor"}).json()
+    assert [row["entity_id"] for row in within_60] == [vendor["id"]]
+    assert client.get("/api/reports/expiring", params={"within": "365d"}).status_code == 400
+
+
+def test_refresh_picks_up_changed_warranties(client, db):
+    today = date.today()
+    asset = create_asset(client, warranty_expiry_date=str(today + timedelta(days=200)))
+    refresh_expiry_due(db)
+    assert client.get("/api/reports/expiring", params={"within": "90d"}).json() == []
+
+    client.patch(f"/api/assets/{asset['id']}", json={"warranty_expiry_date": str(today + timedelta(days=10))})
+    refresh_expiry_due(db)
+    assert [row["entity_id"] for row in client.get("/api/reports/expiring", params={"within": "90d"}).json()] == [asset["id"]]
+
+    client.delete(f"/api/assets/{asset['id']}")
+    refresh_expiry_due(db)
+    assert client.get("/api/reports/expiring", params={"within": "90d"}).json() == []
@@ -0,0 +1,25 @@
+from tests.conftest import create_asset
+
+
+def tags(client, **params):
+    response = client.get("/api/assets/", params=params)
+    assert response.status_code == 200, response.text
+    return [asset["asset_tag"] for asset in response.json()]
+
+
+def test_filters_combine_and_sort(client):
+    laptops = client.post("/api/asset-categories/", json={"category_name": "Laptops"}).json()
+    create_asset(client, "LAP-001", category_id=laptops["id"], purchase_cost=1500, condition_grade="A")
+    create_asset(client, "LAP-002", category_id=laptops["id"], purchase_cost=900, condition_grade="B")
+    create_asset(client, "LAP-003", category_id=laptops["id"], purchase_cost=1100, condition_grade="A", purchase_date="2022-01-01")
+    create_asset(client, "DSK-001", purchase_cost=2000, condition_grade="A")
+
+    assert tags(client, category_id=laptops["id"], sort="-purchase_cost") == ["LAP-001", "LAP-003", "LAP-002"]
+    assert tags(client, condition_grade=["A", "B"], cost_min=1000, cost_max=1600, sort="asset_tag") == ["LAP-001", "LAP-003"]
+    assert tags(client, purchased_to="2023-12-31") == ["LAP-003"]
+    assert tags(client, status=["In Stock", "Assigned"], sort="-asset_tag", limit=2) == ["LAP-003", "LAP-002"]
+
+
+def test_only_whitelisted_columns_sort(client):
+    assert client.get("/api/assets/", params={"sort": "notes"}).status_code == 400
+    assert client.get("/api/assets/", params={"sort": "-tenant_id"}).status_code == 400
@@ -0,0 +1,59 @@
+from app import models
+from app.forecast import rebuild_forecast
+from tests.conftest import assert_matches_rebuild, create_asset, create_employee
+
+FORECAST_KEY = ("category_id", "department_id", "eol_year", "eol_quarter")
+
+
+def assert_forecast_matches_rebuild(db):
+    assert_matches_rebuild(db, models.RefreshForecast, FORECAST_KEY, rebuild_forecast)
+
+
+def test_forecast_follows_asset_writes(client, db):
+    category = client.post("/api/asset-categories/", json={"category_name": "Laptops", "depreciation_years": 4}).json()
+    department = client.post("/api/departments/", json={"name": "Finance"}).json()
+    employee = create_employee(client, department_id=department["id"])
+    asset = create_asset(client, "LAP-001", category_id=category["id"])
+    create_asset(client, "LAP-002", category_id=category["id"], purchase_date="2023-05-01")
+
+    client.post("/api/assignments", json={"asset_id": asset["id"], "employee_id": employee["id"]})
+    assert_forecast_matches_rebuild(db)
+
+    client.patch(f"/api/assets/{asset['id']}", json={"purchase_date": "2025-08-20", "purchase_cost": 900})
+    assert_forecast_matches_rebuild(db)
+
+    client.delete(f"/api/assets/{asset['id']}")
+    assert_forecast_matches_rebuild(db)
+
+    forecast = client.get("/api/reports/refresh-forecast", params={"years": 10, "group_by": "category"}).json()
+    assert sum(point["asset_count"] for point in forecast) == 1
+
+
+def test_cascading_a_category_moves_its_assets_to_no_category(client, db):
+    category = client.post("/api/asset-categories/", json={"category_name": "Laptops", "depreciation_years": 5}).json()
+    department = client.post("/api/departments/", json={"name": "Finance"}).json()
+    employee = create_employee(client, department_id=department["id"])
+    create_asset(client, "LAP-001", category_id=category["id"], current_employee_id=employee["id"])
+    create_asset(client, "LAP-002", category_id=category["id"])
+
+    deleted = client.delete(f"/api/asset-categories/{category['id']}", params={"on_references": "cascade"})
+    assert deleted.status_code == 200
+    assert_forecast_matches_rebuild(db)
+
+    forecast = client.get("/api/reports/refresh-forecast", params={"years": 10, "group_by": "category"}).json()
+    assert [(point["category_id"], point["asset_count"]) for point in forecast] == [(0, 2)]
+
+
+def test_decrements_never_create_counters(client, db):
+    employee = create_employee(client)
+    asset = create_asset(client, current_employee_id=employee["id"])
+
+    # Counters lost to, say, a direct database edit are not replaced by negative ones
+    db.query(models.AssetHolding).delete()
+    db.query(models.RefreshForecast).delete()
+    db.commit()
+    client.delete(f"/api/assets/{asset['id']}")
+
+    db.expire_all()
+    assert db.query(models.AssetHolding).count() == 0
+    assert db.query(models.RefreshForecast).count() == 0
@@ -0,0 +1,55 @@
+from app import models
+from app.holdings import rebuild_holdings
+from tests.conftest import assert_matches_rebuild, create_asset, create_employee
+
+HOLDING_KEY = ("scope", "scope_id")
+
+
+def holdings(client, scope, scope_id):
+    rows = client.get("/api/reports/holdings", params={"scope": scope, "scope_id": scope_id}).json()
+    return [(row["asset_count"], float(row["total_cost"])) for row in rows if row["asset_count"]]
+
+
+def test_holdings_follow_assignments(client, db):
+    location = client.post("/api/locations/", json={"site_name": "HQ"}).json()
+    department = client.post("/api/departments/", json={"name": "Engineering"}).json()
+    employee = create_employee(client, department_id=department["id"])
+    laptop = create_asset(client, "LAP-001", purchase_cost=1200, current_location_id=location["id"])
+    phone = create_asset(client, "PHN-001", purchase_cost=300, current_location_id=location["id"])
+
+    for asset in (laptop, phone):
+        client.post("/api/assignments", json={"asset_id": asset["id"], "employee_id": employee["id"]})
+    assert holdings(client, "employee", employee["id"]) == [(2, 1500.0)]
+    assert holdings(client, "department", department["id"]) == [(2, 1500.0)]
+    assert holdings(client, "location", location["id"]) == [(2, 1500.0)]
+
+    client.post("/api/returns", json={"asset_id": phone["id"]})
+    assert holdings(client, "employee", employee["id"]) == [(1, 1200.0)]
+
+    client.delete(f"/api/assets/{laptop['id']}")
+    assert holdings(client, "employee", employee["id"]) == []
+    assert holdings(client, "department", department["id"]) == []
+    assert_matches_rebuild(db, models.AssetHolding, HOLDING_KEY, rebuild_holdings)
+
+
+def test_asset_created_with_a_holder_counts_at_once(client, db):
+    department = client.post("/api/departments/", json={"name": "Engineering"}).json()
+    employee = create_employee(client, department_id=department["id"])
+
+    create_asset(client, "LAP-001", purchase_cost=1200, current_employee_id=employee["id"])
+    assert holdings(client, "employee", employee["id"]) == [(1, 1200.0)]
+    assert holdings(client, "department", department["id"]) == [(1, 1200.0)]
+    assert_matches_rebuild(db, models.AssetHolding, HOLDING_KEY, rebuild_holdings)
+
+
+def test_moving_an_asset_moves_its_location_holdings(client, db):
+    first = client.post("/api/locations/", json={"site_name": "HQ"}).json()
+    second = client.post("/api/locations/", json={"site_name": "Warehouse"}).json()
+    employee = create_employee(client)
+    asset = create_asset(client, current_location_id=first["id"])
+    client.post("/api/assignments", json={"asset_id": asset["id"], "employee_id": employee["id"]})
+
+    client.patch(f"/api/assets/{asset['id']}", json={"current_location_id": second["id"]})
+    assert holdings(client, "location", first["id"]) == []
+    assert holdings(client, "location", second["id"]) == [(1, 1200.0)]
+    assert_matches_rebuild(db, models.AssetHolding, HOLDING_KEY, rebuild_holdings)
@@ -0,0 +1,43 @@
+from app import models
+from app.hr_sync import sync_roster
+from tests.conftest import create_asset, create_employee
+
+
+def employee(db, code):
+    db.expire_all()
+    return db.query(models.Employee).filter(models.Employee.employee_code == code).one()
+
+
+def test_roster_diff_inserts_updates_and_offboards(client, db):
+    create_employee(client, "E-001", phone_number="555-0100")
+    leaver = create_employee(client, "E-002")
+    asset = create_asset(client)
+    client.post("/api/assignments", json={"asset_id": asset["id"], "employee_id": leaver["id"]})
+    roster = [
+        {"employee_code": "E-001", "first_name": "Ada", "last_name": "King", "email": "E-001@example.com"},
+        {"employee_code": "E-003", "first_name": "Alan", "last_name": "Turing", "email": "alan@example.com"},
+    ]
+
+    assert sync_roster(db, roster, dry_run=True) == {"inserted": 1, "updated": 1, "deactivated": 1, "unchanged": 0}
+    assert employee(db, "E-001").last_name == "Lovelace"
+
+    summary = sync_roster(db, roster)
+    assert summary == {"inserted": 1, "updated": 1, "deactivated": 1, "unchanged": 0, "assets_reclaimed": 1}
+    assert employee(db, "E-001").last_name == "King"
+    # The roster has no phone column, so stored numbers are kept
+    assert employee(db, "E-001").phone_number == "555-0100"
+    assert employee(db, "E-003").employment_status == "Active"
+    assert employee(db, "E-002").employment_status == "Inactive"
+    assert client.get(f"/api/assets/{asset['id']}").json()["status"] == "In Stock"
+
+    assert sync_roster(db, roster) == {"inserted": 0, "updated": 0, "deactivated": 0, "unchanged": 2}
+
+
+def test_leavers_can_keep_their_assets(client, db):
+    leaver = create_employee(client, "E-001")
+    asset = create_asset(client)
+    client.post("/api/assignments", json={"asset_id": asset["id"], "employee_id": leaver["id"]})
+
+    sync_roster(db, [], reclaim_assets=False)
+    assert employee(db, "E-001").employment_status == "Inactive"
+    assert client.get(f"/api/assets/{asset['id']}").json()["current_employee_id"] == leaver["id"]
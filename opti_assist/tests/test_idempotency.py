@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from app import models
+from app.idempotency import IdempotencyMiddleware, _request_hash
+from tests.conftest import create_asset, create_employee
+
+
+@pytest.fixture
+def calls(client):
+    """A POST endpoint behind the middleware that counts its runs and fails on request."""
+    runs = []
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware)
+
+    @app.post("/things", status_code=201)
+    def create_thing(response: Response, fail: bool = False):
+        runs.append(fail)
+        if fail:
+            raise RuntimeError("crashed mid-request")
+        response.headers["Location"] = f"/things/{len(runs)}"
+        response.set_cookie("session", "abc")
+        return {"run": len(runs)}
+
+    with TestClient(app, raise_server_exceptions=False) as things:
+        yield things, runs
+
+
+def test_assignment_retries_run_once(client):
+    asset = create_asset(client)
+    employee = create_employee(client)
+    body = {"asset_id": asset["id"], "employee_id": employee["id"]}
+    headers = {"Idempotency-Key": "assign-1"}
+
+    first = client.post("/api/assignments", json=body, headers=headers)
+    retry = client.post("/api/assignments", json=body, headers=headers)
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert len(client.get(f"/api/assets/{asset['id']}/history").json()) == 1
+
+    other = client.post("/api/assignments", json={**body, "notes": "again"}, headers=headers)
+    assert other.status_code == 422
+
+
+def test_replays_keep_headers_and_bind_the_query(calls):
+    things, runs = calls
+    first = things.post("/things", headers={"Idempotency-Key": "k"})
+    retry = things.post("/things", headers={"Idempotency-Key": "k"})
+    assert retry.json() == first.json() == {"run": 1}
+    assert retry.headers["location"] == "/things/1"
+    assert "session=abc" in retry.headers["set-cookie"]
+    assert retry.headers["content-type"] == "application/json"
+
+    assert things.post("/things?fail=false", headers={"Idempotency-Key": "k"}).status_code == 422
+    assert len(runs) == 1
+
+
+def test_failed_requests_release_their_key(calls):
+    things, runs = calls
+    assert things.post("/things?fail=true", headers={"Idempotency-Key": "k"}).status_code == 500
+    assert things.post("/things?fail=true", headers={"Idempotency-Key": "k"}).status_code == 500
+    assert runs == [True, True]
+
+
+def test_abandoned_holds_lapse(calls, db):
+    things, runs = calls
+    now, request_hash = datetime.utcnow(), _request_hash("POST", "/things", b"", b"")
+    db.add(models.IdempotencyKey(key="running", request_hash=request_hash, expires_at=now + timedelta(minutes=5)))
+    db.add(models.IdempotencyKey(key="abandoned", request_hash=request_hash, expires_at=now - timedelta(seconds=1)))
+    db.commit()
+
+    assert things.post("/things", headers={"Idempotency-Key": "running"}).status_code == 409
+    assert things.post("/things", headers={"Idempotency-Key": "abandoned"}).status_code == 201
+    assert len(runs) == 1
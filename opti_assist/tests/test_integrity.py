@@ -0,0 +1,42 @@
+from app import models
+from app.forecast import rebuild_forecast
+from app.holdings import rebuild_holdings
+from tests.conftest import assert_matches_rebuild, create_asset, create_employee
+
+HOLDING_KEY = ("scope", "scope_id")
+FORECAST_KEY = ("category_id", "department_id", "eol_year", "eol_quarter")
+
+
+def orphans(report, link):
+    return next(entry for entry in report if entry["link"] == link)
+
+
+def test_scan_finds_links_to_deleted_rows(client):
+    vendor = client.post("/api/vendors/", json={"vendor_name": "Acme"}).json()
+    asset = create_asset(client, vendor_id=vendor["id"])
+    clean = client.post("/api/admin/integrity/scan").json()
+    assert orphans(clean, "assets.vendor_id")["orphans"] == 0
+
+    assert client.delete(f"/api/vendors/{vendor['id']}?on_references=refuse").status_code == 409
+    assert client.delete(f"/api/vendors/{vendor['id']}").status_code == 200
+
+    link = orphans(client.post("/api/admin/integrity/scan").json(), "assets.vendor_id")
+    assert link["orphans"] == 1
+    assert link["samples"] == [{"row_id": asset["id"], "missing_id": vendor["id"]}]
+
+
+def test_cascading_a_department_keeps_counters_in_step(client, db):
+    department = client.post("/api/departments/", json={"name": "Sales"}).json()
+    location = client.post("/api/locations/", json={"site_name": "HQ"}).json()
+    employee = create_employee(client, department_id=department["id"], location_id=location["id"])
+    create_asset(client, "LAP-001", current_employee_id=employee["id"], current_location_id=location["id"])
+    create_asset(client, "LAP-002", current_employee_id=employee["id"])
+
+    deleted = client.delete(f"/api/departments/{department['id']}?on_references=cascade")
+    assert deleted.status_code == 200
+    assert client.get(f"/api/employees/{employee['id']}").json()["department_id"] is None
+    assert_matches_rebuild(db, models.AssetHolding, HOLDING_KEY, rebuild_holdings)
+    assert_matches_rebuild(db, models.RefreshForecast, FORECAST_KEY, rebuild_forecast)
+
+    assert client.delete(f"/api/locations/{location['id']}?on_references=cascade").status_code == 200
+    assert_matches_rebuild(db, models.AssetHolding, HOLDING_KEY, rebuild_holdings)
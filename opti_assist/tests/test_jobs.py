@@ -0,0 +1,52 @@
+import gzip
+import os
+import subprocess
+import sys
+
+from app import jobs, worker
+from tests.conftest import create_asset
+
+DEFAULTS_CHECK = """
+from app import scheduler, worker
+assert not worker.JOB_WORKER_IN_PROCESS
+assert not scheduler.SCHEDULER_IN_PROCESS
+"""
+
+
+def test_background_work_runs_outside_the_api_by_default():
+    environment = {name: value for name, value in os.environ.items() if not name.endswith("_IN_PROCESS")}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", DEFAULTS_CHECK], cwd=root, env=environment, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_worker_claims_and_runs_queued_jobs(client, db, tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "EXPORT_DIR", str(tmp_path))
+    create_asset(client, "LAP-001")
+    create_asset(client, "LAP-002")
+
+    queued = client.post("/api/jobs/", json={"job_type": "export_assets"})
+    assert queued.status_code == 202
+    assert queued.json()["status"] == jobs.QUEUED
+
+    assert worker.work_once("test-worker")
+    assert not worker.work_once("test-worker")
+
+    job = client.get(f"/api/jobs/{queued.json()['id']}").json()
+    assert (job["status"], job["result"]["rows"]) == (jobs.SUCCEEDED, 2)
+    download = client.get(f"/api/jobs/{job['id']}/download")
+    assert download.status_code == 200
+    lines = gzip.decompress(download.content).decode().splitlines()
+    assert len(lines) == 3 and "LAP-002" in lines[2]
+
+
+def test_claims_are_exclusive(client, db):
+    job = jobs.enqueue(db, "rebuild_holdings")
+    assert jobs.claim_next_job(db, "first") == job.id
+    assert jobs.claim_next_job(db, "second") is None
+
+
+def test_job_files_must_stay_in_the_import_directory(client):
+    escaped = client.post("/api/jobs/", json={"job_type": "import_assets", "params": {"path": "../etc/passwd"}})
+    assert escaped.status_code == 400
+    assert client.post("/api/jobs/", json={"job_type": "nope"}).status_code == 400
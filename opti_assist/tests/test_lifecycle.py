@@ -0,0 +1,128 @@
+from app import jobs
+from tests.conftest import create_asset, create_employee
+
+
+def status(client, asset_id):
+    return client.get(f"/api/assets/{asset_id}").json()["status"]
+
+
+def test_assign_and_return(client):
+    asset = create_asset(client)
+    employee = create_employee(client)
+
+    assigned = client.post("/api/assignments", json={"asset_id": asset["id"], "employee_id": employee["id"]})
+    assert assigned.status_code == 201
+    assert status(client, asset["id"]) == "Assigned"
+
+    again = client.post("/api/assignments", json={"asset_id": asset["id"], "employee_id": employee["id"]})
+    assert again.status_code == 400
+
+    assert client.post("/api/returns", json={"asset_id": asset["id"]}).status_code == 200
+    assert status(client, asset["id"]) == "In Stock"
+    assert client.get(f"/api/assets/{asset['id']}").json()["current_employee_id"] is None
+
+
+def test_routine_service_does_not_put_asset_in_repair(client):
+    asset = create_asset(client)
+
+    logged = client.post("/api/maintenance-logs/", json={"asset_id": asset["id"], "maintenance_type": "Inspection"})
+    assert logged.status_code == 201
+    assert status(client, asset["id"]) == "In Stock"
+
+
+def test_return_during_repair_keeps_asset_in_repair(client):
+    asset = create_asset(client)
+    employee = create_employee(client)
+    client.post("/api/assignments", json={"asset_id": asset["id"], "employee_id": employee["id"]})
+
+    log = client.post(
+        "/api/maintenance-logs/",
+        json={"asset_id": asset["id"], "maintenance_type": "Corrective", "status": "In Progress"},
+    ).json()
+    assert status(client, asset["id"]) == "In Repair"
+
+    assert client.post("/api/returns", json={"asset_id": asset["id"]}).status_code == 200
+    assert status(client, asset["id"]) == "In Repair"
+
+    assert client.patch(f"/api/maintenance-logs/{log['id']}", json={"status": "Completed"}).status_code == 200
+    assert status(client, asset["id"]) == "In Stock"
+
+
+def test_status_changes_are_restricted(client):
+    asset = create_asset(client)
+
+    assert client.patch(f"/api/assets/{asset['id']}", json={"status": "Assigned"}).status_code == 400
+    assert client.patch(f"/api/assets/{asset['id']}", json={"status": "Lost"}).status_code == 200
+    assert client.patch(f"/api/assets/{asset['id']}", json={"status": "In Stock"}).status_code == 200
+
+    assert client.delete(f"/api/assets/{asset['id']}").status_code == 200
+    assert status(client, asset["id"]) == "Retired"
+    employee = create_employee(client)
+    assert client.post("/api/assignments", json={"asset_id": asset["id"], "employee_id": employee["id"]}).status_code == 400
+
+
+def test_new_assets_start_in_stock(client):
+    for initial in ("Assigned", "Retired", "Lost"):
+        assert client.post("/api/assets/", json={"asset_tag": f"LAP-{initial}", "asset_name": "Laptop", "status": initial}).status_code == 400
+
+    employee = create_employee(client)
+    asset = create_asset(client, current_employee_id=employee["id"])
+    assert (asset["status"], asset["current_employee_id"]) == ("Assigned", employee["id"])
+    history = client.get(f"/api/assets/{asset['id']}/history").json()
+    assert [(row["employee_id"], row["returned_date"]) for row in history] == [(employee["id"], None)]
+
+    inactive = create_employee(client, "E-002", employment_status="Inactive")
+    assert client.post(
+        "/api/assets/", json={"asset_tag": "LAP-002", "asset_name": "Laptop", "current_employee_id": inactive["id"]}
+    ).status_code == 400
+    assert client.get("/api/assets/tag/LAP-002").status_code == 404
+
+
+def test_returning_an_unheld_asset_is_a_conflict(client):
+    asset = create_asset(client)
+    client.post(
+        "/api/maintenance-logs/",
+        json={"asset_id": asset["id"], "maintenance_type": "Corrective", "status": "In Progress"},
+    )
+    assert status(client, asset["id"]) == "In Repair"
+
+    returned = client.post("/api/returns", json={"asset_id": asset["id"]})
+    assert returned.status_code == 409
+    assert status(client, asset["id"]) == "In Repair"
+
+
+def test_offboarding_keeps_repair_and_lost_statuses(client):
+    employee = create_employee(client)
+    laptop = create_asset(client, "LAP-001", current_employee_id=employee["id"])
+    phone = create_asset(client, "PHN-001", current_employee_id=employee["id"])
+    client.post(
+        "/api/maintenance-logs/",
+        json={"asset_id": laptop["id"], "maintenance_type": "Corrective", "status": "In Progress"},
+    )
+    assert client.patch(f"/api/assets/{phone['id']}", json={"status": "Lost"}).status_code == 200
+
+    result = client.post(f"/api/employees/{employee['id']}/offboard").json()
+    assert result["assets_reclaimed"] == 2
+    for asset, expected in ((laptop, "In Repair"), (phone, "Lost")):
+        reclaimed = client.get(f"/api/assets/{asset['id']}").json()
+        assert (reclaimed["status"], reclaimed["current_employee_id"]) == (expected, None)
+
+
+def test_imported_assets_are_assigned_through_the_lifecycle(client, db, tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "IMPORT_DIR", str(tmp_path))
+    employee = create_employee(client)
+    (tmp_path / "assets.csv").write_text(
+        "asset_tag,asset_name,status,current_employee_id\n"
+        f"LAP-001,Laptop,,{employee['id']}\n"
+        "LAP-002,Laptop,,\n"
+        "LAP-003,Laptop,Assigned,\n"
+        "LAP-004,Laptop,,404\n"
+    )
+
+    result = jobs._import_assets(db, {"path": "assets.csv"}, lambda *args: None)
+    assert (result["inserted"], result["rejected"]) == (2, 2)
+
+    held = client.get("/api/assets/tag/LAP-001").json()
+    assert (held["status"], held["current_employee_id"]) == ("Assigned", employee["id"])
+    assert [row["employee_id"] for row in client.get(f"/api/assets/{held['id']}/history").json()] == [employee["id"]]
+    assert status(client, client.get("/api/assets/tag/LAP-002").json()["id"]) == "In Stock"
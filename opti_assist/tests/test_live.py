@@ -0,0 +1,62 @@
+import pytest
+
+from app import jobs, live
+from app.hr_sync import sync_roster
+from tests.conftest import create_asset, create_employee
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Changes handed to the broker, in publication order."""
+    changes = []
+    monkeypatch.setattr(live.broker, "publish", changes.extend)
+    return changes
+
+
+def events(changes):
+    return [(change["event"], change["asset_tag"], change["status"]) for change in changes]
+
+
+def test_changes_are_published_after_commit(client, published):
+    asset = create_asset(client)
+    employee = create_employee(client)
+    client.post("/api/assignments", json={"asset_id": asset["id"], "employee_id": employee["id"]})
+    # Refused transitions publish nothing
+    client.post("/api/assignments", json={"asset_id": asset["id"], "employee_id": employee["id"]})
+
+    assert events(published) == [("create", "LAP-001", "In Stock"), ("assign", "LAP-001", "Assigned")]
+
+
+def test_offboarding_publishes_every_reclaimed_asset(client, published):
+    employee = create_employee(client)
+    create_asset(client, "LAP-001", current_employee_id=employee["id"])
+    lost = create_asset(client, "PHN-001", current_employee_id=employee["id"])
+    client.patch(f"/api/assets/{lost['id']}", json={"status": "Lost"})
+    published.clear()
+
+    client.post(f"/api/employees/{employee['id']}/offboard")
+    assert sorted(events(published)) == [("return", "LAP-001", "In Stock"), ("update", "PHN-001", "Lost")]
+    assert all(change["current_employee_id"] is None for change in published)
+
+
+def test_hr_sync_reclaims_are_published(client, db, published):
+    employee = create_employee(client, "E-001")
+    create_asset(client, current_employee_id=employee["id"])
+    published.clear()
+
+    sync_roster(db, [{"employee_code": "E-002", "first_name": "Grace", "last_name": "Hopper", "email": "grace@example.com"}])
+    assert events(published) == [("return", "LAP-001", "In Stock")]
+
+
+def test_imports_are_published(client, db, tmp_path, monkeypatch, published):
+    monkeypatch.setattr(jobs, "IMPORT_DIR", str(tmp_path))
+    employee = create_employee(client)
+    published.clear()
+    (tmp_path / "assets.csv").write_text(f"asset_tag,asset_name,current_employee_id\nLAP-001,Laptop,{employee['id']}\nLAP-002,Laptop,\n")
+
+    jobs._import_assets(db, {"path": "assets.csv"}, lambda *args: None)
+    assert events(published) == [
+        ("create", "LAP-001", "Assigned"),
+        ("create", "LAP-002", "In Stock"),
+        ("assign", "LAP-001", "Assigned"),
+    ]
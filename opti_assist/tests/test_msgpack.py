@@ -0,0 +1,44 @@
+import pytest
+
+from tests.conftest import create_asset, create_employee
+
+# MessagePack is an optional dependency
+msgpack = pytest.importorskip("msgpack")
+
+
+def test_msgpack_is_negotiated_from_accept(client):
+    create_asset(client, "LAP-001", purchase_cost=1200.5)
+    as_json = client.get("/api/assets/")
+
+    packed = client.get("/api/assets/", headers={"Accept": "application/msgpack"})
+    assert packed.headers["content-type"] == "application/msgpack"
+    assert packed.headers["vary"] == "Accept"
+    assets = msgpack.unpackb(packed.content)
+    # Same document as the JSON response: dates as ISO strings, decimals as numbers
+    assert assets == as_json.json()
+    assert (assets[0]["purchase_date"], assets[0]["purchase_cost"]) == ("2024-02-10", 1200.5)
+
+    projected = client.get("/api/assets/", params={"fields": "asset_tag"}, headers={"Accept": "application/x-msgpack"})
+    assert msgpack.unpackb(projected.content) == [{"asset_tag": "LAP-001"}]
+
+
+def test_json_stays_the_default(client):
+    create_asset(client)
+
+    for accept in ("*/*", "application/json", "application/msgpack;q=0", "application/json, application/msgpack;q=0.5"):
+        response = client.get("/api/assets/", headers={"Accept": accept})
+        assert response.headers["content-type"] == "application/json", accept
+        assert response.headers["vary"] == "Accept"
+
+
+def test_history_pages_keep_their_cursor_in_msgpack(client):
+    asset = create_asset(client)
+    employee = create_employee(client)
+    for _ in range(2):
+        client.post("/api/assignments", json={"asset_id": asset["id"], "employee_id": employee["id"]})
+        client.post("/api/returns", json={"asset_id": asset["id"]})
+
+    page = client.get(f"/api/assets/{asset['id']}/history", params={"limit": 1}, headers={"Accept": "application/msgpack"})
+    [row] = msgpack.unpackb(page.content)
+    assert row["employee_id"] == employee["id"]
+    assert page.headers["x-next-cursor"]
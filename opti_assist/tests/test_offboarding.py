@@ -0,0 +1,34 @@
+from app import models
+from app.holdings import rebuild_holdings
+from tests.conftest import assert_matches_rebuild, create_asset, create_employee
+
+
+def test_offboarding_reclaims_everything_in_one_call(client, db):
+    department = client.post("/api/departments/", json={"name": "Sales"}).json()
+    employee = create_employee(client, department_id=department["id"])
+    laptop = create_asset(client, "LAP-001")
+    phone = create_asset(client, "PHN-001")
+    for asset in (laptop, phone):
+        client.post("/api/assignments", json={"asset_id": asset["id"], "employee_id": employee["id"]})
+
+    result = client.post(f"/api/employees/{employee['id']}/offboard").json()
+    assert (result["employees"], result["assignments_closed"], result["assets_reclaimed"]) == (1, 2, 2)
+
+    assert client.get(f"/api/employees/{employee['id']}").json()["employment_status"] == "Inactive"
+    for asset in (laptop, phone):
+        reclaimed = client.get(f"/api/assets/{asset['id']}").json()
+        assert (reclaimed["status"], reclaimed["current_employee_id"]) == ("In Stock", None)
+        history = client.get(f"/api/assets/{asset['id']}/history").json()
+        assert history[0]["returned_date"] is not None
+    assert_matches_rebuild(db, models.AssetHolding, ("scope", "scope_id"), rebuild_holdings)
+
+
+def test_batch_offboarding_by_code(client):
+    first = create_employee(client, "E-001")
+    second = create_employee(client, "E-002")
+
+    result = client.post("/api/employees/offboard", json={"employee_codes": ["E-001", "E-002"]}).json()
+    assert result["employees"] == 2
+    for employee in (first, second):
+        assert client.get(f"/api/employees/{employee['id']}").json()["employment_status"] == "Inactive"
+    assert client.post("/api/employees/offboard", json={"employee_codes": ["E-404"]}).status_code == 404
@@ -0,0 +1,44 @@
+from tests.conftest import create_asset
+
+
+def pages(client, url, **params):
+    """Follow X-Next-Cursor to the end; returns the start dates of each page."""
+    result, cursor = [], None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        result.append([log["start_date"] for log in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return result
+
+
+def test_maintenance_pages_follow_the_cursor(client):
+    asset = create_asset(client)
+    # Two logs on the same day, so the id breaks the tie
+    for start in ("2026-01-10", "2026-02-10", "2026-02-10", "2026-03-10", "2026-04-10"):
+        client.post("/api/maintenance-logs/", json={"asset_id": asset["id"], "start_date": start, "status": "Completed"})
+    url = f"/api/assets/{asset['id']}/maintenance"
+
+    assert pages(client, url, limit=2) == [["2026-04-10", "2026-03-10"], ["2026-02-10", "2026-02-10"], ["2026-01-10"]]
+    assert pages(client, url, limit=2, **{"from": "2026-02-01", "to": "2026-03-31"}) == [
+        ["2026-03-10", "2026-02-10"], ["2026-02-10"]
+    ]
+    assert client.get(url, params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_history_pages_follow_the_cursor(client):
+    asset = create_asset(client)
+    employee = client.post(
+        "/api/employees/", json={"employee_code": "E-1", "first_name": "A", "last_name": "B", "email": "a@example.com"}
+    ).json()
+    for _ in range(3):
+        client.post("/api/assignments", json={"asset_id": asset["id"], "employee_id": employee["id"]})
+        client.post("/api/returns", json={"asset_id": asset["id"]})
+
+    url = f"/api/assets/{asset['id']}/history"
+    first = client.get(url, params={"limit": 2})
+    second = client.get(url, params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    ids = [row["id"] for row in first.json() + second.json()]
+    assert ids == sorted(ids, reverse=True) and len(ids) == 3
+    assert "X-Next-Cursor" not in second.headers
@@ -0,0 +1,27 @@
+from tests.conftest import create_asset
+
+
+def test_plan_schedules_due_assets_once(client):
+    location = client.post("/api/locations/", json={"site_name": "HQ"}).json()
+    vendor = client.post("/api/vendors/", json={"vendor_name": "Acme"}).json()
+    printers = client.post("/api/asset-categories/", json={"category_name": "Printers", "maintenance_interval_days": 180}).json()
+    common = {"category_id": printers["id"], "vendor_id": vendor["id"], "current_location_id": location["id"]}
+    due = create_asset(client, "PRN-001", purchase_date="2025-01-01", **common)
+    serviced = create_asset(client, "PRN-002", purchase_date="2025-01-01", **common)
+    create_asset(client, "PRN-003", purchase_date="2026-06-01", **common)
+    client.post(
+        "/api/maintenance-logs/",
+        json={"asset_id": serviced["id"], "maintenance_type": "Preventive", "status": "Completed",
+              "start_date": "2026-09-01", "completion_date": "2026-09-02"},
+    )
+
+    plan = client.post("/api/maintenance-logs/plan", params={"as_of": "2026-10-01"}).json()
+    assert plan["created"] == 1
+    assert plan["batches"] == [
+        {"vendor_id": vendor["id"], "location_id": location["id"], "work_orders": 1, "earliest_due": "2026-10-01"}
+    ]
+    scheduled = client.get(f"/api/assets/{due['id']}/maintenance").json()
+    assert [log["status"] for log in scheduled] == ["Scheduled"]
+
+    # An open work order is not planned twice
+    assert client.post("/api/maintenance-logs/plan", params={"as_of": "2026-10-02"}).json()["created"] == 0
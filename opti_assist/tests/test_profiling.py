@@ -0,0 +1,58 @@
+import pstats
+
+import pytest
+
+from app import profiling
+from tests.conftest import create_asset
+
+TOKEN = "s3cret"
+AUTHORIZED = {"Authorization": f"Bearer {TOKEN}"}
+
+
+@pytest.fixture
+def profiled(client, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", TOKEN)
+    profiling._profiles.clear()
+    yield client
+    profiling._profiles.clear()
+
+
+def test_requests_are_profiled_on_demand(profiled, tmp_path):
+    create_asset(profiled)
+    assert "x-profile-id" not in profiled.get("/api/assets/").headers
+    # A wrong token does not trigger profiling
+    assert "x-profile-id" not in profiled.get("/api/assets/", headers={"X-Profile": "guess"}).headers
+
+    response = profiled.get("/api/assets/", headers={"X-Profile": TOKEN})
+    profile_id = int(response.headers["x-profile-id"])
+
+    [summary] = profiled.get("/api/admin/profiles", headers=AUTHORIZED).json()
+    assert (summary["id"], summary["path"], summary["trigger"], summary["status_code"]) == (profile_id, "/api/assets/", "requested", 200)
+    assert summary["sql_count"] >= 1
+
+    detail = profiled.get(f"/api/admin/profiles/{profile_id}", headers=AUTHORIZED).json()
+    assert any("FROM assets" in statement["statement"] for statement in detail["sql"])
+    assert "list_assets" in detail["stats"]
+
+    dump = tmp_path / "profile.prof"
+    dump.write_bytes(profiled.get(f"/api/admin/profiles/{profile_id}/pstats", headers=AUTHORIZED).content)
+    assert pstats.Stats(str(dump)).total_calls > 0
+
+
+def test_profiles_require_the_token(profiled, monkeypatch):
+    profiled.get("/api/assets/", headers={"X-Profile": TOKEN})
+
+    assert profiled.get("/api/admin/profiles").status_code == 403
+    assert profiled.get("/api/admin/profiles", headers={"Authorization": "Bearer guess"}).status_code == 403
+    assert profiled.get("/api/admin/profiles/1/pstats", headers={"Authorization": TOKEN}).status_code == 403
+
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+    assert profiled.get("/api/admin/profiles", headers={"Authorization": "Bearer "}).status_code == 403
+
+
+def test_tenants_only_see_their_own_profiles(profiled, other_tenant):
+    profile_id = int(profiled.get("/api/assets/", headers={"X-Profile": TOKEN}).headers["x-profile-id"])
+
+    assert profiled.get("/api/admin/profiles", headers={**AUTHORIZED, **other_tenant}).json() == []
+    assert profiled.get(f"/api/admin/profiles/{profile_id}", headers={**AUTHORIZED, **other_tenant}).status_code == 404
+    assert profiled.get(f"/api/admin/profiles/{profile_id}", headers=AUTHORIZED).status_code == 200
@@ -0,0 +1,32 @@
+from app import compression
+from tests.conftest import create_asset
+
+
+def test_fields_narrow_the_listed_columns(client):
+    create_asset(client, "LAP-001")
+
+    rows = client.get("/api/assets/", params={"fields": "asset_tag,status"}).json()
+    assert rows == [{"asset_tag": "LAP-001", "status": "In Stock"}]
+    assert client.get("/api/assets/", params={"fields": "asset_tag,tenant_id"}).status_code == 400
+
+
+def test_large_responses_are_compressed_by_q_value(client):
+    for number in range(30):
+        create_asset(client, f"LAP-{number:03}", notes="x" * 100)
+
+    gzipped = client.get("/api/assets/", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert len(gzipped.json()) == 30
+
+    refused = client.get("/api/assets/", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in refused.headers
+
+    small = client.get("/api/assets/", params={"limit": 1}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_brotli_preference():
+    assert compression.prefers_brotli("gzip;q=0.5, br")
+    assert compression.prefers_brotli("*")
+    assert not compression.prefers_brotli("gzip, br;q=0.5")
+    assert not compression.prefers_brotli("gzip, br;q=0")
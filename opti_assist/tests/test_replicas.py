@@ -0,0 +1,43 @@
+import itertools
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import database, models
+from tests.conftest import create_asset
+
+
+@pytest.fixture
+def replica(client, monkeypatch, tmp_path):
+    """An empty stand-in replica, measured as caught up."""
+    engine = create_engine(f"sqlite:///{os.path.join(tmp_path, 'replica.db')}")
+    models.Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(database, "replica_sessions", [sessionmaker(autocommit=False, autoflush=False, bind=engine)])
+    monkeypatch.setattr(database, "_replica_lag", {})
+    monkeypatch.setattr(database, "_replica_cycle", itertools.cycle([0]))
+    database.measure_replicas()
+    yield
+    engine.dispose()
+
+
+def listed_tags(client, **headers):
+    return [asset["asset_tag"] for asset in client.get("/api/assets/", headers=headers).json()]
+
+
+def test_reads_go_to_the_replica_except_right_after_a_write(client, replica):
+    create_asset(client, "LAP-001")
+    # The write set the last-write cookie, so this client reads its own change from the primary
+    assert listed_tags(client) == ["LAP-001"]
+
+    client.cookies.clear()
+    assert listed_tags(client) == []
+    assert listed_tags(client, **{database.CONSISTENCY_HEADER: "primary"}) == ["LAP-001"]
+
+
+def test_lagging_replicas_are_skipped(client, replica, monkeypatch):
+    create_asset(client, "LAP-001")
+    client.cookies.clear()
+    monkeypatch.setattr(database, "_replica_lag", {0: (0.0, 0.0)})  # last measured long ago
+    assert listed_tags(client) == ["LAP-001"]
@@ -0,0 +1,31 @@
+from datetime import date
+
+from app.snapshots import take_snapshot
+from tests.conftest import create_asset
+
+
+def test_daily_snapshots_feed_the_trends_report(client, db):
+    location = client.post("/api/locations/", json={"site_name": "HQ"}).json()
+    create_asset(client, "LAP-001", current_location_id=location["id"], purchase_cost=1000)
+    create_asset(client, "LAP-002", current_location_id=location["id"], purchase_cost=500)
+    retired = create_asset(client, "LAP-003", current_location_id=location["id"])
+    client.delete(f"/api/assets/{retired['id']}")
+
+    assert take_snapshot(db, date(2026, 1, 1))["rows"] == 1
+    create_asset(client, "LAP-004")
+    assert take_snapshot(db, date(2026, 1, 2))["rows"] == 2
+    # A day is only recorded once
+    assert take_snapshot(db, date(2026, 1, 2))["rows"] == 0
+
+    trends = client.get("/api/reports/stock-trends", params={"from": "2026-01-01", "to": "2026-01-02"}).json()
+    assert [(point["snapshot_date"], point["location_id"], point["asset_count"], point["total_value"]) for point in trends] == [
+        ("2026-01-01", location["id"], 2, 1500.0),
+        ("2026-01-02", 0, 1, 1200.0),
+        ("2026-01-02", location["id"], 2, 1500.0),
+    ]
+
+    by_status = client.get(
+        "/api/reports/stock-trends", params={"from": "2026-01-02", "to": "2026-01-02", "group_by": "status"}
+    ).json()
+    assert [(point["status"], point["asset_count"], point["location_id"]) for point in by_status] == [("In Stock", 3, None)]
+    assert client.get("/api/reports/stock-trends", params={"group_by": "vendor"}).status_code == 400
@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+
+from app import database, migrate
+
+STARTUP_CHECK = """
+from fastapi.testclient import TestClient
+from app.main import app
+with TestClient(app) as client:
+    assert client.get("/").status_code == 200
+"""
+
+
+def test_app_starts_without_a_reachable_database():
+    environment = dict(os.environ, DATABASE_URL="sqlite:////nonexistent/opti_assist.db")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", STARTUP_CHECK], cwd=root, env=environment, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_migrate_leaves_an_up_to_date_schema_alone(client):
+    assert migrate.upgrade_schema(database.init_engine()) == []
@@ -0,0 +1,38 @@
+from tests.conftest import create_asset
+
+
+def test_assets_are_invisible_to_other_tenants(client, other_tenant):
+    asset = create_asset(client)
+
+    assert client.get("/api/assets/", headers=other_tenant).json() == []
+    assert client.get(f"/api/assets/{asset['id']}", headers=other_tenant).status_code == 404
+    assert client.get(f"/api/assets/tag/{asset['asset_tag']}", headers=other_tenant).status_code == 404
+    assert client.patch(f"/api/assets/{asset['id']}", json={"asset_name": "Taken"}, headers=other_tenant).status_code == 404
+    assert client.delete(f"/api/assets/{asset['id']}", headers=other_tenant).status_code == 404
+
+    assert client.get(f"/api/assets/{asset['id']}").json()["asset_name"] == "Laptop"
+
+
+def test_asset_tags_are_unique_per_tenant(client, other_tenant):
+    create_asset(client, "LAP-001")
+    create_asset(client, "LAP-001", headers=other_tenant)
+
+    duplicate = client.post("/api/assets/", json={"asset_tag": "LAP-001", "asset_name": "Laptop"})
+    assert duplicate.status_code == 400
+
+
+def test_cannot_assign_to_another_tenants_employee(client, other_tenant):
+    asset = create_asset(client)
+    stranger = client.post(
+        "/api/employees/",
+        json={"employee_code": "E-9", "first_name": "Grace", "last_name": "Hopper", "email": "grace@example.com"},
+        headers=other_tenant,
+    ).json()
+
+    response = client.post("/api/assignments", json={"asset_id": asset["id"], "employee_id": stranger["id"]})
+    assert response.status_code == 404
+    assert client.get(f"/api/assets/{asset['id']}").json()["status"] == "In Stock"
+
+
+def test_unknown_tenant_is_rejected(client):
+    assert client.get("/api/assets/", headers={"X-Tenant-ID": "999"}).status_code == 404